@@ -3,23 +3,63 @@ Endpoints de Autenticación
 ==========================
 
 Login y gestión de tokens.
+
+Tras un login exitoso, si la contraseña está hasheada con un costo bcrypt
+distinto a BCRYPT_ROUNDS se vuelve a hashear con el costo actual.
+
+Los logins pasan primero por el límite de intentos por IP y por usuario
+(core/rate_limit.py): al superarlo se responde 429 sin verificar la
+contraseña.
+
+El login entrega un access token (corto) y un refresh token rotativo
+(services/token_service.py). POST /auth/refresh renueva ambos sin
+verificar la contraseña (sin bcrypt); POST /auth/logout revoca la sesión.
 """
 
 from datetime import datetime
 from typing import Any
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from beanie import PydanticObjectId
 
-from core.security import verify_password, create_access_token
-from schemas.auth import LoginRequest, TokenResponse, CurrentUserResponse
+from core.security import (
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
+    create_access_token
+)
+from core.principal_cache import invalidate_principal
+from core.rate_limit import throttle_login
+from schemas.auth import LoginRequest, TokenResponse, RefreshRequest, CurrentUserResponse
 from models.user import User
 from models.student import Student
 from api.dependencies import get_current_user
+from services import token_service
 from typing import Union
 
 router = APIRouter()
 
 
+async def _token_response(user_type: str, user_id: PydanticObjectId, role: str) -> TokenResponse:
+    """Access token + refresh token nuevo para una sesión"""
+    access_token = create_access_token(
+        data={
+            "sub": str(user_id),
+            "user_type": user_type,
+            "role": role
+        }
+    )
+    refresh_token = await token_service.issue_refresh_token(user_type, user_id)
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer",
+        user_type=user_type,
+        user_id=str(user_id),
+        role=role
+    )
+
+
 @router.post(
     "/login",
     response_model=TokenResponse,
@@ -27,10 +67,11 @@ router = APIRouter()
     responses={
         200: {"description": "Login exitoso, retorna JWT token"},
         401: {"description": "Credenciales incorrectas"},
-        403: {"description": "Usuario inactivo"}
+        403: {"description": "Usuario inactivo"},
+        429: {"description": "Demasiados intentos (ver header Retry-After)"}
     }
 )
-async def login_user(login_data: LoginRequest) -> Any:
+async def login_user(login_data: LoginRequest, request: Request) -> Any:
     """
     Login para administradores
     
@@ -42,6 +83,9 @@ async def login_user(login_data: LoginRequest) -> Any:
     
     **Retorna:** JWT Token de acceso
     """
+    # Límite de intentos (antes de bcrypt)
+    await throttle_login(request, "user", login_data.username)
+    
     # Buscar usuario por username
     user = await User.find_one(User.username == login_data.username)
     
@@ -53,7 +97,7 @@ async def login_user(login_data: LoginRequest) -> Any:
         )
     
     # Verificar contraseña
-    if not verify_password(login_data.password, user.password):
+    if not await verify_password_async(login_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas",
@@ -67,26 +111,17 @@ async def login_user(login_data: LoginRequest) -> Any:
             detail="Usuario inactivo"
         )
     
+    # Rehashear si cambió el costo de bcrypt (BCRYPT_ROUNDS)
+    if password_needs_rehash(user.password):
+        user.password = await get_password_hash_async(login_data.password)
+    
     # Actualizar último acceso
     user.ultimo_acceso = datetime.utcnow()
-    await user.save()
+    await user.save_changes()
+    invalidate_principal("user", user.id)
     
-    # Crear token
-    access_token = create_access_token(
-        data={
-            "sub": str(user.id),
-            "user_type": "user",
-            "role": user.rol.value
-        }
-    )
-    
-    return TokenResponse(
-        access_token=access_token,
-        token_type="bearer",
-        user_type="user",
-        user_id=str(user.id),
-        role=user.rol.value
-    )
+    # Crear tokens
+    return await _token_response("user", user.id, user.rol.value)
 
 
 @router.post(
@@ -96,10 +131,11 @@ async def login_user(login_data: LoginRequest) -> Any:
     responses={
         200: {"description": "Login exitoso, retorna JWT token"},
         401: {"description": "Credenciales incorrectas"},
-        403: {"description": "Estudiante inactivo"}
+        403: {"description": "Estudiante inactivo"},
+        429: {"description": "Demasiados intentos (ver header Retry-After)"}
     }
 )
-async def login_student(login_data: LoginRequest) -> Any:
+async def login_student(login_data: LoginRequest, request: Request) -> Any:
     """
     Login para estudiantes
     
@@ -111,6 +147,9 @@ async def login_student(login_data: LoginRequest) -> Any:
     
     **Retorna:** JWT Token de acceso
     """
+    # Límite de intentos (antes de bcrypt)
+    await throttle_login(request, "student", login_data.username)
+    
     # Buscar estudiante por registro
     student = await Student.find_one(Student.registro == login_data.username)
     
@@ -122,7 +161,7 @@ async def login_student(login_data: LoginRequest) -> Any:
         )
     
     # Verificar contraseña
-    if not verify_password(login_data.password, student.password):
+    if not await verify_password_async(login_data.password, student.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas",
@@ -136,24 +175,97 @@ async def login_student(login_data: LoginRequest) -> Any:
             detail="Estudiante inactivo"
         )
     
-    # Crear token
+    # Rehashear si cambió el costo de bcrypt (BCRYPT_ROUNDS)
+    if password_needs_rehash(student.password):
+        nuevo_hash = await get_password_hash_async(login_data.password)
+        await student.set({Student.password: nuevo_hash})
+        invalidate_principal("student", student.id)
+    
+    # Crear tokens
+    return await _token_response("student", student.id, "student")
+
+
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+    summary="Renovar Access Token",
+    responses={
+        200: {"description": "Nuevo access token y nuevo refresh token"},
+        401: {"description": "Refresh token inválido, expirado o ya usado; o usuario inactivo"}
+    }
+)
+async def refresh_token(data: RefreshRequest) -> Any:
+    """
+    Obtener un nuevo access token con el refresh token
+    
+    **Acceso público** (el refresh token es la credencial)
+    
+    - El refresh token es de **un solo uso**: la respuesta trae uno nuevo
+      que reemplaza al anterior.
+    - Reutilizar un refresh token ya rotado cierra todas las sesiones del
+      usuario (protección ante robo). Uno cerrado con logout solo responde 401.
+    - No vuelve a verificar la contraseña.
+    """
+    credenciales_invalidas = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Sesión inválida o expirada, vuelve a iniciar sesión",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    try:
+        user_type, sub, nuevo_refresh = await token_service.rotate_refresh_token(data.refresh_token)
+    except ValueError:
+        raise credenciales_invalidas
+    
+    # El rol y el estado pueden haber cambiado desde el login
+    if user_type == "user":
+        user = await User.get(sub)
+        activo, role = (user.activo, user.rol.value) if user else (False, None)
+    else:
+        student = await Student.get(sub)
+        activo, role = (student.activo, "student") if student else (False, None)
+    
+    if not activo:
+        await token_service.revoke_all_refresh_tokens(user_type, sub)
+        raise credenciales_invalidas
+    
     access_token = create_access_token(
         data={
-            "sub": str(student.id),
-            "user_type": "student",
-            "role": "student"
+            "sub": str(sub),
+            "user_type": user_type,
+            "role": role
         }
     )
     
     return TokenResponse(
         access_token=access_token,
+        refresh_token=nuevo_refresh,
         token_type="bearer",
-        user_type="student",
-        user_id=str(student.id),
-        role="student"
+        user_type=user_type,
+        user_id=str(sub),
+        role=role
     )
 
 
+@router.post(
+    "/logout",
+    status_code=204,
+    summary="Cerrar Sesión",
+    responses={
+        204: {"description": "Refresh token revocado (o ya no era válido)"}
+    }
+)
+async def logout(data: RefreshRequest) -> Response:
+    """
+    Cerrar sesión revocando el refresh token
+    
+    El access token actual sigue siendo válido hasta que venza
+    (ACCESS_TOKEN_EXPIRE_MINUTES); el cliente debe descartarlo.
+    """
+    await token_service.revoke_refresh_token(data.refresh_token)
+    return Response(status_code=204)
+
+
 @router.get(
     "/me",
     response_model=CurrentUserResponse,
@@ -32,6 +32,7 @@ async def read_courses(
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo"),
     tipo_curso: Optional[TipoCurso] = Query(None, description="Filtrar por tipo de curso"),
     modalidad: Optional[Modalidad] = Query(None, description="Filtrar por modalidad"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (meta.nextCursor). Activa paginación por cursor e ignora `page`"),
     current_user: Union[User, Student] = Depends(get_current_user)
 ) -> Any:
     """
@@ -44,20 +45,27 @@ async def read_courses(
     - `activo`: True/False
     - `tipo_curso`: diplomado, curso, taller, seminario
     - `modalidad`: presencial, virtual, híbrido
+    
+    **Paginación por cursor (opcional):**
+    - Enviar `cursor` con el `meta.nextCursor` de la respuesta anterior
     """
-    courses, total_count = await course_service.get_courses(
-        page=page,
-        per_page=per_page,
-        q=q,
-        activo=activo,
-        tipo_curso=tipo_curso,
-        modalidad=modalidad
-    )
+    try:
+        courses, total_count, next_cursor = await course_service.get_courses(
+            page=page,
+            per_page=per_page,
+            q=q,
+            activo=activo,
+            tipo_curso=tipo_curso,
+            modalidad=modalidad,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Calcular metadatos
     total_pages = math.ceil(total_count / per_page)
-    has_next = page < total_pages
-    has_prev = page > 1
+    has_next = next_cursor is not None
+    has_prev = page > 1 or cursor is not None
     
     return {
         "data": courses,
@@ -67,7 +75,8 @@ async def read_courses(
             totalItems=total_count,
             totalPages=total_pages,
             hasNextPage=has_next,
-            hasPrevPage=has_prev
+            hasPrevPage=has_prev,
+            nextCursor=next_cursor
         )
     }
 
@@ -0,0 +1,160 @@
+"""
+API de Dashboard
+================
+
+Indicadores para el panel de administración.
+
+Los indicadores de pagos leen solo los acumulados (`payment_rollups`, ver
+services/dashboard_service.py), nunca la colección `payments`.
+
+Permisos:
+---------
+- GET /dashboard/ingresos: ADMIN/SUPERADMIN
+- GET /dashboard/pendientes: ADMIN/SUPERADMIN
+- POST /dashboard/rollups/reconstruir: SUPERADMIN
+- GET /dashboard/metricas: SUPERADMIN
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from beanie import PydanticObjectId
+from models.user import User
+from services import dashboard_service
+from api.dependencies import require_admin, require_superadmin
+
+router = APIRouter()
+
+
+def _parse_mes(mes: str) -> datetime:
+    """'YYYY-MM' → primer día del mes"""
+    try:
+        return datetime.strptime(mes, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de mes inválido. Usar YYYY-MM")
+
+
+@router.get(
+    "/ingresos",
+    summary="Ingresos por Curso y Mes",
+    responses={
+        200: {"description": "Ingresos aprobados agrupados por curso y mes"},
+        400: {"description": "Formato de mes inválido"},
+        403: {"description": "Sin permisos - Solo Admin"}
+    }
+)
+async def get_ingresos_por_curso(
+    *,
+    desde: Optional[str] = Query(None, description="Mes inicial (YYYY-MM), inclusive"),
+    hasta: Optional[str] = Query(None, description="Mes final (YYYY-MM), inclusive"),
+    curso_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por curso"),
+    current_user: User = Depends(require_admin)
+) -> Any:
+    """
+    Ingresos (pagos aprobados) por curso y mes
+
+    **Requiere:** Admin o SuperAdmin
+
+    El mes es el de subida del comprobante (hora boliviana).
+
+    **Retorna:** Lista de `{curso_id, nombre_programa, codigo, mes,
+    cantidad_pagos, monto_aprobado}`, del mes más reciente al más antiguo
+    """
+    desde_dt = _parse_mes(desde) if desde else None
+    hasta_dt = None
+    if hasta:
+        # Último día del mes
+        siguiente = _parse_mes(hasta) + timedelta(days=32)
+        hasta_dt = siguiente.replace(day=1) - timedelta(days=1)
+
+    return await dashboard_service.get_ingresos_por_curso_mes(
+        desde=desde_dt,
+        hasta=hasta_dt,
+        curso_id=curso_id
+    )
+
+
+@router.get(
+    "/pendientes",
+    summary="Pagos Pendientes de Revisión",
+    responses={
+        200: {"description": "Cola de pagos pendientes por curso"},
+        403: {"description": "Sin permisos - Solo Admin"}
+    }
+)
+async def get_pendientes(
+    current_user: User = Depends(require_admin)
+) -> Any:
+    """
+    Pagos pendientes de revisión (backlog)
+
+    **Requiere:** Admin o SuperAdmin
+
+    **Retorna:**
+    - `total_pendientes`: Cantidad total de pagos pendientes
+    - `monto_pendiente`: Suma de montos pendientes (Bs)
+    - `por_curso`: Cantidad, monto y día del pendiente más antiguo por curso
+    """
+    return await dashboard_service.get_pendientes_backlog()
+
+
+@router.post(
+    "/rollups/reconstruir",
+    summary="Reconstruir Acumulados",
+    responses={
+        200: {"description": "Acumulados recalculados desde los pagos"},
+        403: {"description": "Sin permisos - Solo SuperAdmin"}
+    }
+)
+async def reconstruir_rollups(
+    current_user: User = Depends(require_superadmin)
+) -> Any:
+    """
+    Recalcular los acumulados del dashboard desde la colección de pagos
+
+    **Requiere:** SuperAdmin
+
+    Normalmente no hace falta: los acumulados se actualizan solos al crear,
+    aprobar o rechazar pagos. Usar si se modificaron pagos directamente en la
+    base de datos. También disponible por consola:
+    `python -m scripts.rebuild_payment_rollups`
+    """
+    return await dashboard_service.reconstruir_rollups()
+
+
+@router.get(
+    "/metricas",
+    summary="Métricas del Servidor",
+    responses={
+        200: {"description": "Métricas internas de este worker"},
+        403: {"description": "Sin permisos - Solo SuperAdmin"}
+    }
+)
+async def get_metricas(
+    current_user: User = Depends(require_superadmin)
+) -> Any:
+    """
+    Métricas internas del proceso que atiende la petición
+    
+    **Requiere:** SuperAdmin
+    
+    Cada worker tiene sus propios contadores (se reinician al reiniciar).
+    
+    **Retorna:**
+    - `password_hashing`: Costo bcrypt actual y, por operación (hash/verify),
+      cantidad, tiempo promedio y máximo en ms
+    - `pagination_count_cache`: Aciertos/fallos de la caché de totales
+    - `principal_cache`: Aciertos/fallos de la caché de usuarios autenticados
+    - `login_throttle`: Intentos de login permitidos y frenados (por IP / usuario)
+    """
+    from core.principal_cache import principal_cache_stats
+    from core.rate_limit import login_throttle_stats
+    from core.security import password_hashing_stats
+    from services import pagination
+    
+    return {
+        "password_hashing": password_hashing_stats(),
+        "pagination_count_cache": pagination.count_cache_stats(),
+        "principal_cache": principal_cache_stats(),
+        "login_throttle": login_throttle_stats(),
+    }
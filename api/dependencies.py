@@ -11,6 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from beanie import PydanticObjectId
 
 from core.security import decode_access_token
+from core.principal_cache import get_principal, set_principal
 from models.user import User
 from models.student import Student
 from models.enums import UserRole
@@ -25,6 +26,9 @@ async def get_current_user(
     """
     Obtener el usuario actual desde el token JWT
     
+    El usuario se reutiliza unos segundos desde la caché de usuarios
+    autenticados (core/principal_cache.py) en lugar de leerlo en cada petición.
+    
     En modo desarrollo (DEVELOPMENT_MODE=True), retorna un usuario admin mock
     sin requerir autenticación.
     
@@ -77,6 +81,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Usuario reciente en caché (solo se cachean usuarios activos)
+    cached = get_principal(user_type, user_id)
+    if cached is not None:
+        return cached
+    
     # Buscar usuario según el tipo
     if user_type == "user":
         user = await User.get(PydanticObjectId(user_id))
@@ -85,6 +94,7 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Usuario no encontrado o inactivo"
             )
+        set_principal(user_type, user_id, user)
         return user
     elif user_type == "student":
         student = await Student.get(PydanticObjectId(user_id))
@@ -93,6 +103,7 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Estudiante no encontrado o inactivo"
             )
+        set_principal(user_type, user_id, student)
         return student
     else:
         raise HTTPException(
@@ -14,13 +14,14 @@ Permisos:
 - GET /enrollments/course/{course_id}: ADMIN
 """
 
+from functools import partial
 from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Path
 from models.enrollment import Enrollment
 from models.student import Student
 from models.user import User
 from models.enums import EstadoInscripcion, EstadoRequisito
-from core.cloudinary_utils import upload_image, upload_pdf
+from core.storage import DOCUMENT_TYPES, store_upload
 from schemas.requisito import RequisitoResponse, RequisitoRechazarRequest, RequisitoListResponse
 from schemas.enrollment import (
     EnrollmentCreate,
@@ -113,6 +114,7 @@ async def list_enrollments(
     estado: Optional[EstadoInscripcion] = Query(None, description="Filtrar por estado"),
     curso_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por Curso ID"),
     estudiante_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por Estudiante ID"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (meta.nextCursor). Activa paginación por cursor e ignora `page`"),
     current_user: User | Student = Depends(get_current_user)
 ) -> Any:
     """
@@ -131,6 +133,7 @@ async def list_enrollments(
     **Paginación:**
     - `page`: Número de página (default: 1)
     - `per_page`: Elementos por página (default: 10, max: 500)
+    - `cursor`: (Opcional) `meta.nextCursor` de la respuesta anterior, paginación por cursor
     
     **Retorna:**
     ```json
@@ -142,46 +145,44 @@ async def list_enrollments(
         "totalItems": 36,
         "totalPages": 4,
         "hasNextPage": True,
-        "hasPrevPage": False
+        "hasPrevPage": False,
+        "nextCursor": "eyJrIjogIjIwMjQtMTItMTVUMTQ6MzA6MDAiLCAiaWQiOiAiLi4uIn0"
       }
     }
     ```
     """
-    # Si es admin, retorna todas (paginadas en DB)
-    if isinstance(current_user, User):
-        enrollments, total_count = await enrollment_service.get_all_enrollments(
-            page=page,
-            per_page=per_page,
-            q=q,
-            estado=estado,
-            curso_id=curso_id,
-            estudiante_id=estudiante_id
-        )
-    
-    # Si es estudiante, solo sus inscripciones (paginadas en memoria por ahora)
-    elif isinstance(current_user, Student):
-        all_enrollments = await enrollment_service.get_enrollments_by_student(
-            student_id=current_user.id
-        )
+    try:
+        # Si es admin, retorna todas (paginadas en DB)
+        if isinstance(current_user, User):
+            enrollments, total_count, next_cursor = await enrollment_service.get_all_enrollments(
+                page=page,
+                per_page=per_page,
+                q=q,
+                estado=estado,
+                curso_id=curso_id,
+                estudiante_id=estudiante_id,
+                cursor=cursor
+            )
         
-        # Aplicar filtro de estado si lo pidió
-        if estado:
-            all_enrollments = [e for e in all_enrollments if e.estado == estado]
-            
-        total_count = len(all_enrollments)
+        # Si es estudiante, solo sus inscripciones (misma consulta paginada en DB, fijando su ID)
+        elif isinstance(current_user, Student):
+            enrollments, total_count, next_cursor = await enrollment_service.get_all_enrollments(
+                page=page,
+                per_page=per_page,
+                estado=estado,
+                estudiante_id=current_user.id,
+                cursor=cursor
+            )
         
-        # Aplicar paginación manual
-        start = (page - 1) * per_page
-        end = start + per_page
-        enrollments = all_enrollments[start:end]
-    
-    else:
-        raise HTTPException(status_code=403, detail="No autorizado")
+        else:
+            raise HTTPException(status_code=403, detail="No autorizado")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Calcular metadatos comunes
     total_pages = math.ceil(total_count / per_page) if total_count > 0 else 0
-    has_next = page < total_pages
-    has_prev = page > 1
+    has_next = next_cursor is not None
+    has_prev = page > 1 or cursor is not None
     
     # Convertir fechas a hora boliviana
     enriched_enrollments = []
@@ -197,7 +198,8 @@ async def list_enrollments(
             totalItems=total_count,
             totalPages=total_pages,
             hasNextPage=has_next,
-            hasPrevPage=has_prev
+            hasPrevPage=has_prev,
+            nextCursor=next_cursor
         )
     }
 
@@ -517,6 +519,9 @@ async def subir_requisito(
     
     **Resubida:**
     Si un requisito fue rechazado, puedes volver a subirlo usando el mismo índice.
+    
+    Si el archivo es idéntico a uno que ya subiste como requisito (en esta u
+    otra inscripción), se reutiliza sin volver a transferirlo.
     """
     if not isinstance(current_user, Student):
         raise HTTPException(403, "Solo estudiantes")
@@ -536,17 +541,21 @@ async def subir_requisito(
         descripcion_safe = enrollment.requisitos[index].descripcion.replace(' ', '_').replace('/', '_')
         public_id = f"req_{index}_{descripcion_safe}"
         
-        image_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-        
-        if file.content_type in image_types:
-            documento_url = await upload_image(file, folder, public_id)
-        elif file.content_type == "application/pdf":
-            documento_url = await upload_pdf(file, folder, public_id)
-        else:
-            raise HTTPException(400, f"Formato no permitido: {file.content_type}")
+        stored = await store_upload(
+            file,
+            folder,
+            public_id,
+            DOCUMENT_TYPES,
+            find_existing=partial(enrollment_service.find_requisito, student_id=current_user.id),
+            with_preview=True
+        )
         
-        enrollment.requisitos[index].subir_documento(documento_url)
-        await enrollment.save()
+        enrollment.requisitos[index].subir_documento(
+            stored.url,
+            sha256=stored.sha256,
+            preview_url=stored.preview_url
+        )
+        await enrollment_service.guardar_requisito(enrollment, index)
         
         return enrollment.requisitos[index]
     except HTTPException:
@@ -602,7 +611,7 @@ async def aprobar_requisito(
         raise HTTPException(400, f"No se puede aprobar en estado {requisito.estado}")
     
     enrollment.requisitos[index].aprobar(current_user.username)
-    await enrollment.save()
+    await enrollment_service.guardar_requisito(enrollment, index)
     
     return enrollment.requisitos[index]
 
@@ -660,6 +669,6 @@ async def rechazar_requisito(
         raise HTTPException(400, f"No se puede rechazar en estado {requisito.estado}")
     
     enrollment.requisitos[index].rechazar(current_user.username, rechazo.motivo)
-    await enrollment.save()
+    await enrollment_service.guardar_requisito(enrollment, index)
     
     return enrollment.requisitos[index]
@@ -60,12 +60,12 @@ async def create_payment_config(
     
     **El sistema automáticamente:**
     - ✅ Valida la imagen
-    - ✅ Sube QR a Cloudinary
+    - ✅ Sube QR al almacenamiento de archivos
     - ✅ Guarda configuración en MongoDB
     
     Los estudiantes verán esta info al realizar pagos.
     """
-    from core.cloudinary_utils import upload_image
+    from core.storage import upload_image
     
     try:
         # Verificar que no exista ya una configuración
@@ -76,7 +76,7 @@ async def create_payment_config(
                 detail="Ya existe una configuración de pagos activa. Use PUT para actualizar."
             )
         
-        # Subir imagen del QR a Cloudinary
+        # Subir imagen del QR al almacenamiento configurado
         folder = "payment_config"
         public_id = "qr_payment"
         qr_url = await upload_image(file, folder, public_id)
@@ -166,7 +166,7 @@ async def update_payment_config(
     - Cambiar QR: Subir nuevo `file`
     - Cambiar cuenta: Modificar `numero_cuenta`
     """
-    from core.cloudinary_utils import upload_image
+    from core.storage import upload_image
     
     try:
         # Obtener configuración actual
@@ -177,7 +177,7 @@ async def update_payment_config(
                 detail="No existe una configuración para actualizar. Use POST para crear."
             )
         
-        # Si se proporciona nueva imagen, subirla a Cloudinary
+        # Si se proporciona nueva imagen, subirla al almacenamiento configurado
         if file:
             folder = "payment_config"
             public_id = "qr_payment"
@@ -198,7 +198,7 @@ async def update_payment_config(
         
         # Actualizar auditoría
         config.actualizado_por = current_user.username
-        await config.save()
+        await config.save_changes()
         
         return config
         
@@ -6,18 +6,20 @@ Endpoints para gestionar pagos de estudiantes.
 
 Permisos:
 ---------
+- POST /payments/upload-intent: STUDENT (subida directa del comprobante)
 - POST /payments/: STUDENT (solo sus pagos)
 - GET /payments/: ADMIN (todos) / STUDENT (solo los suyos)
 - GET /payments/{id}: ADMIN / STUDENT (si es suyo)
 - PUT /payments/{id}/aprobar: ADMIN/SUPERADMIN
 - PUT /payments/{id}/rechazar: ADMIN/SUPERADMIN
+- POST /payments/bulk: ADMIN/SUPERADMIN
+- POST /payments/resumen: ADMIN / STUDENT (solo sus inscripciones)
 - GET /payments/enrollment/{enrollment_id}: ADMIN / STUDENT (si es suya)
 - GET /payments/pendientes: ADMIN
 """
 
 from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from models.payment import Payment
 from models.student import Student
 from models.user import User
 from models.enums import EstadoPago
@@ -26,7 +28,12 @@ from schemas.payment import (
     PaymentResponse,
     PaymentApproval,
     PaymentRejection,
-    PaymentWithDetails
+    PaymentWithDetails,
+    PaymentBulkRequest,
+    PaymentBulkResponse,
+    PaymentResumenRequest,
+    PaymentResumen,
+    PaymentUploadIntent
 )
 from services import payment_service
 from beanie import PydanticObjectId
@@ -35,6 +42,45 @@ from api.dependencies import require_admin, get_current_user
 router = APIRouter()
 
 
+@router.post(
+    "/upload-intent",
+    response_model=PaymentUploadIntent,
+    summary="Preparar Subida Directa de Comprobante",
+    responses={
+        200: {"description": "Parámetros firmados para subir el comprobante"},
+        403: {"description": "Solo estudiantes"},
+        501: {"description": "El almacenamiento configurado no soporta subidas directas"}
+    }
+)
+async def create_upload_intent(
+    current_user: Student = Depends(get_current_user)
+) -> Any:
+    """
+    Obtener parámetros firmados para subir el comprobante directo al almacenamiento
+    
+    **Requiere:** Estudiante autenticado
+    
+    **Flujo en dos pasos:**
+    1. Este endpoint retorna `upload_url` y `fields`. El cliente hace un POST
+       multipart a `upload_url` con todos los `fields` y el archivo en `file`.
+    2. Con la respuesta del almacenamiento, registrar el pago en `POST /payments/`
+       enviando `comprobante_url` (= `secure_url`) y `firma` (= `signature`)
+       en lugar de `file`.
+    
+    El archivo queda en la carpeta del estudiante y solo se aceptan JPG, PNG,
+    WEBP o PDF. La firma vence en `expires_in` segundos.
+    """
+    from core.storage import create_upload_intent as crear_intencion
+    
+    if not isinstance(current_user, Student):
+        raise HTTPException(
+            status_code=403,
+            detail="Solo los estudiantes pueden subir comprobantes de pago"
+        )
+    
+    return crear_intencion(f"payments/{current_user.id}", prefix="voucher")
+
+
 @router.post(
     "/",
     response_model=PaymentResponse,
@@ -48,9 +94,11 @@ router = APIRouter()
 )
 async def create_payment(
     *,
-    file: UploadFile = File(..., description="Comprobante de pago (imagen JPG/PNG/WEBP o PDF)"),
+    file: Optional[UploadFile] = File(None, description="Comprobante de pago (imagen JPG/PNG/WEBP o PDF)"),
     inscripcion_id: str = Form(..., description="ID de la inscripción"),
     numero_transaccion: str = Form(..., description="Número de transacción bancaria"),
+    comprobante_url: Optional[str] = Form(None, description="URL del comprobante subido directamente (ver /payments/upload-intent)"),
+    firma: Optional[str] = Form(None, description="Firma devuelta por el almacenamiento junto a `comprobante_url`"),
     current_user: Student = Depends(get_current_user)
 ) -> Any:
     """
@@ -63,6 +111,10 @@ async def create_payment(
     - `inscripcion_id`: ID de su inscripción
     - `numero_transaccion`: Número de transacción del banco
     
+    **Subida directa (recomendada):** en lugar de `file`, enviar
+    `comprobante_url` y `firma` obtenidos al subir el archivo con los
+    parámetros de `POST /payments/upload-intent`. El archivo no pasa por la API.
+    
     **El sistema automáticamente:**
     - ✅ **Detecta qué te falta pagar** (Matrícula -> Cuota 1 -> Cuota 2...)
     - ✅ **Revisa "huecos"**: Si te rechazaron la matrícula, te sugerirá pagarla de nuevo
@@ -71,11 +123,16 @@ async def create_payment(
     
     **El admin debe aprobar** el pago para que se actualicen los totales.
     
+    **Comprobantes repetidos:** si el archivo es idéntico a uno que ya subiste,
+    se reutiliza sin volver a transferirlo. Si el mismo comprobante ya se usó
+    en otro pago, el nuevo queda marcado en `posible_duplicado_de`.
+    
     **Formatos permitidos:**
     - Imágenes: JPG, PNG, WEBP (máx 5MB)
     - PDF (máx 10MB)
     """
-    from core.cloudinary_utils import upload_image, upload_pdf
+    from functools import partial
+    from core.storage import DOCUMENT_TYPES, store_upload, verify_direct_upload
     from schemas.payment import PaymentCreate
     
     # Solo estudiantes pueden crear pagos
@@ -85,38 +142,56 @@ async def create_payment(
             detail="Solo los estudiantes pueden subir comprobantes de pago"
         )
     
+    if (file is None) == (comprobante_url is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Envía el comprobante en `file` o, si lo subiste directamente, en `comprobante_url` con su `firma`"
+        )
+    
     try:
-        # Detectar tipo de archivo y subir según corresponda
         folder = f"payments/{current_user.id}"
-        safe_transaction = numero_transaccion.replace(' ', '_').replace('/', '_')
-        public_id = f"voucher_{safe_transaction}"
-        
-        # Tipos de archivo permitidos
-        image_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-        pdf_type = "application/pdf"
         
-        if file.content_type in image_types:
-            # Es una imagen - usar upload_image
-            comprobante_url = await upload_image(file, folder, public_id)
-            
-        elif file.content_type == pdf_type:
-            # Es un PDF - usar upload_pdf
-            comprobante_url = await upload_pdf(file, folder, public_id)
-            
+        if comprobante_url is not None:
+            # Subida directa: solo verificar firma y carpeta del estudiante
+            if not firma:
+                raise HTTPException(status_code=400, detail="Falta la `firma` del comprobante")
+            stored = await verify_direct_upload(comprobante_url, firma, folder)
+            # Una subida firmada sirve para un solo pago
+            if await payment_service.comprobante_en_uso(stored.url):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Este comprobante ya fue registrado en otro pago"
+                )
+            payment_in = PaymentCreate(
+                inscripcion_id=inscripcion_id,
+                numero_transaccion=numero_transaccion,
+                comprobante_url=stored.url,
+                comprobante_preview_url=stored.preview_url,
+                comprobante_md5=stored.md5
+            )
         else:
-            # Tipo no permitido
-            raise HTTPException(
-                status_code=400,
-                detail=f"Formato no permitido: {file.content_type}. "
-                       f"Use imagen (JPG, PNG, WEBP) o PDF"
+            # Subir comprobante (imagen o PDF) al almacenamiento configurado
+            safe_transaction = numero_transaccion.replace(' ', '_').replace('/', '_')
+            public_id = f"voucher_{safe_transaction}"
+            # (si ya subió un archivo idéntico, se reutiliza su URL)
+            stored = await store_upload(
+                file,
+                folder,
+                public_id,
+                DOCUMENT_TYPES,
+                find_existing=partial(payment_service.find_comprobante, student_id=current_user.id),
+                with_preview=True
+            )
+            
+            # Crear schema con los datos + URL generada
+            payment_in = PaymentCreate(
+                inscripcion_id=inscripcion_id,
+                numero_transaccion=numero_transaccion,
+                comprobante_url=stored.url,
+                comprobante_preview_url=stored.preview_url,
+                comprobante_sha256=stored.sha256,
+                comprobante_md5=stored.md5
             )
-        
-        # Crear schema con los datos + URL generada
-        payment_in = PaymentCreate(
-            inscripcion_id=inscripcion_id,
-            numero_transaccion=numero_transaccion,
-            comprobante_url=comprobante_url
-        )
         
         # Crear pago usando el servicio
         payment = await payment_service.create_payment(
@@ -151,10 +226,11 @@ async def list_payments(
     *,
     page: int = Query(1, ge=1, description="Número de página"),
     per_page: int = Query(10, ge=1, le=500, description="Elementos por página"),
-    q: Optional[str] = Query(None, description="Búsqueda por transacción o comprobante"),
+    q: Optional[str] = Query(None, description="Búsqueda por número de transacción o concepto"),
     estado: Optional[EstadoPago] = Query(None, description="Filtrar por estado"),
     curso_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por Curso ID"),
     estudiante_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por Estudiante ID"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (meta.nextCursor). Activa paginación por cursor e ignora `page`"),
     current_user: User | Student = Depends(get_current_user)
 ) -> Any:
     """
@@ -168,48 +244,46 @@ async def list_payments(
     - `estado`: pendiente, aprobado, rechazado
     - `curso_id`: Pagos de un curso específico
     - `estudiante_id`: Pagos de un estudiante
-    """
-    # Si es admin, retorna todos (paginadas en DB)
-    if isinstance(current_user, User):
-        payments, total_count = await payment_service.get_all_payments(
-            page=page,
-            per_page=per_page,
-            q=q,
-            estado=estado,
-            curso_id=curso_id,
-            estudiante_id=estudiante_id
-        )
     
-    # Si es estudiante, solo sus pagos (paginadas en memoria por ahora)
-    elif isinstance(current_user, Student):
-        all_payments = await payment_service.get_payments_by_student(
-            student_id=current_user.id
-        )
+    **Paginación por cursor (opcional):**
+    - Enviar `cursor` con el `meta.nextCursor` de la respuesta anterior
+    - Cada página cuesta lo mismo sin importar su profundidad
+    """
+    try:
+        # Si es admin, retorna todos (paginadas en DB)
+        if isinstance(current_user, User):
+            payments, total_count, next_cursor = await payment_service.get_all_payments(
+                page=page,
+                per_page=per_page,
+                q=q,
+                estado=estado,
+                curso_id=curso_id,
+                estudiante_id=estudiante_id,
+                cursor=cursor
+            )
         
-        # Aplicar filtro de estado si lo pidió
-        if estado:
-            all_payments = [p for p in all_payments if p.estado_pago == estado]
-            
-        total_count = len(all_payments)
+        # Si es estudiante, solo sus pagos (misma consulta paginada en DB, fijando su ID)
+        elif isinstance(current_user, Student):
+            payments, total_count, next_cursor = await payment_service.get_all_payments(
+                page=page,
+                per_page=per_page,
+                estado=estado,
+                estudiante_id=current_user.id,
+                cursor=cursor
+            )
         
-        # Aplicar paginación manual
-        start = (page - 1) * per_page
-        end = start + per_page
-        payments = all_payments[start:end]
-    
-    else:
-        raise HTTPException(status_code=403, detail="No autorizado")
+        else:
+            raise HTTPException(status_code=403, detail="No autorizado")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Calcular metadatos comunes
     total_pages = math.ceil(total_count / per_page) if total_count > 0 else 0
-    has_next = page < total_pages
-    has_prev = page > 1
+    has_next = next_cursor is not None
+    has_prev = page > 1 or cursor is not None
     
     # ✅ ENRIQUECER PAGOS con datos legibles (nombre estudiante, progreso, etc.)
-    enriched_payments = []
-    for payment in payments:
-        enriched = await payment_service.enrich_payment_with_details(payment)
-        enriched_payments.append(enriched)
+    enriched_payments = await payment_service.enrich_payments_with_details(payments)
     
     return {
         "data": enriched_payments,
@@ -219,7 +293,8 @@ async def list_payments(
             totalItems=total_count,
             totalPages=total_pages,
             hasNextPage=has_next,
-            hasPrevPage=has_prev
+            hasPrevPage=has_prev,
+            nextCursor=next_cursor
         )
     }
 
@@ -342,6 +417,96 @@ async def rechazar_pago(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post(
+    "/bulk",
+    response_model=PaymentBulkResponse,
+    summary="Aprobar/Rechazar Pagos en Lote",
+    responses={
+        200: {"description": "Lote procesado, con un resultado por cada decisión"},
+        403: {"description": "Sin permisos - Solo Admin"},
+        422: {"description": "Datos inválidos"}
+    }
+)
+async def procesar_pagos_en_lote(
+    *,
+    lote: PaymentBulkRequest,
+    current_user: User = Depends(require_admin)
+) -> Any:
+    """
+    Aprobar y/o rechazar varios pagos en una sola petición
+    
+    **Requiere:** Admin o SuperAdmin
+    
+    Pensado para vaciar la cola de revisión (`GET /payments/pendientes/list`)
+    de una sola vez en lugar de llamar `/aprobar` y `/rechazar` por cada pago.
+    
+    **Cada decisión:**
+    - `payment_id`: ID del pago
+    - `accion`: `aprobar` o `rechazar`
+    - `motivo`: Obligatorio si se rechaza
+    
+    **Comportamiento:**
+    - Las decisiones inválidas (pago inexistente, no pendiente, duplicado,
+      sin motivo) **no** frenan al resto del lote
+    - Retorna un resultado por decisión (`ok`, `estado_pago`, `error`)
+    - Los totales de cada inscripción se actualizan igual que al aprobar uno por uno
+    """
+    return await payment_service.procesar_pagos_en_lote(
+        decisiones=lote.decisiones,
+        admin_username=current_user.username
+    )
+
+
+@router.post(
+    "/resumen",
+    response_model=List[PaymentResumen],
+    summary="Resumen de Pagos de Varias Inscripciones",
+    responses={
+        200: {"description": "Un resumen por inscripción, en el orden recibido"},
+        403: {"description": "Sin permisos - Alguna inscripción no es tuya"},
+        422: {"description": "Datos inválidos"}
+    }
+)
+async def get_resumenes_pagos(
+    *,
+    solicitud: PaymentResumenRequest,
+    current_user: User | Student = Depends(get_current_user)
+) -> Any:
+    """
+    Obtener el resumen de pagos de varias inscripciones en una sola petición
+    
+    Pensado para listados (ej: inscritos de un curso) que muestran el estado
+    de pagos de cada fila, en lugar de llamar
+    `/enrollment/{enrollment_id}/resumen` por cada una.
+    
+    Cada resumen incluye: total_pagos, pendientes, aprobados, rechazados y
+    monto_total_aprobado (en cero si la inscripción no tiene pagos).
+    
+    Permisos:
+    - ADMIN: Cualquier inscripción
+    - STUDENT: Solo sus inscripciones
+    """
+    enrollment_ids = list(dict.fromkeys(solicitud.inscripcion_ids))
+    
+    # Si es estudiante, validar que todas las inscripciones sean suyas
+    if isinstance(current_user, Student):
+        from services import enrollment_service
+        propias = await enrollment_service.count_enrollments_of_student(
+            enrollment_ids, current_user.id
+        )
+        if propias != len(enrollment_ids):
+            raise HTTPException(
+                status_code=403,
+                detail="No tienes permiso para ver el resumen de alguna de estas inscripciones"
+            )
+    
+    resumenes = await payment_service.get_resumenes_pagos_enrollments(enrollment_ids)
+    return [
+        {"inscripcion_id": enrollment_id, **resumen}
+        for enrollment_id, resumen in resumenes.items()
+    ]
+
+
 @router.get("/enrollment/{enrollment_id}", response_model=List[PaymentResponse])
 async def get_payments_by_enrollment(
     *,
@@ -371,12 +536,8 @@ async def get_payments_by_enrollment(
     
     payments = await payment_service.get_payments_by_enrollment(enrollment_id)
     
-    # Enriquecer lista
-    enriched = []
-    for p in payments:
-        enriched.append(await payment_service.enrich_payment_with_details(p))
-        
-    return enriched
+    # Enriquecer lista (consultas en lote)
+    return await payment_service.enrich_payments_with_details(payments)
 
 
 @router.get("/enrollment/{enrollment_id}/resumen")
@@ -431,15 +592,14 @@ async def get_payments_pendientes(
     - Dashboard de admin (mostrar pagos por revisar)
     - Notificaciones (cantidad de pagos pendientes)
     - Procesamiento batch de aprobaciones
+    
+    Para la lista de revisión usar `comprobante_preview_url` (WebP de pocos
+    KB) y abrir `comprobante_url` solo al ver el detalle.
     """
     payments = await payment_service.get_payments_pendientes()
     
-    # Enriquecer lista
-    enriched = []
-    for p in payments:
-        enriched.append(await payment_service.enrich_payment_with_details(p))
-        
-    return enriched
+    # Enriquecer lista (consultas en lote)
+    return await payment_service.enrich_payments_with_details(payments)
 
 
 @router.get(
@@ -477,12 +637,9 @@ async def generar_reporte_excel_pagos(
     
     **Retorna:** Archivo Excel para descargar
     """
-    from datetime import datetime, date, timedelta
+    from datetime import datetime, date
     from fastapi.responses import StreamingResponse
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill
-    from io import BytesIO
-    from models.enrollment import Enrollment
+    from services import report_service
     
     # Procesar fechas
     if not fecha_desde:
@@ -496,84 +653,18 @@ async def generar_reporte_excel_pagos(
     except:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Usar YYYY-MM-DD")
     
-    # Obtener pagos del rango de fechas (ordenados por más reciente primero)
-    payments = await Payment.find(
-        Payment.fecha_subida >= fecha_desde_dt,
-        Payment.fecha_subida <= fecha_hasta_dt
-    ).sort("-fecha_subida").to_list()
-    
-    # Crear Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Pagos"
-    
-    # Encabezados (Nuevo orden solicitado)
-    headers = ["Nombre del Estudiante", "Fecha", "Moneda", "Monto", "Concepto", "Total Cuotas", "Nº de Transacción", "Estado", "Descripción"]
-    ws.append(headers)
-    
-    # Estilo de encabezados
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Activar filtros en los encabezados
-    ws.auto_filter.ref = ws.dimensions
-    
-    # Llenar datos
-    for payment in payments:
-        # Obtener estudiante
-        student = await Student.get(payment.estudiante_id)
-        nombre_estudiante = student.nombre if student and student.nombre else "Sin nombre"
-        
-        # Obtener enrollment para sacar el Total de Cuotas
-        total_cuotas = 0
-        try:
-            # Optimizacion: Usar proyección para solo traer cantidad_cuotas si es posible,
-            # pero Enrollment.get() trae todo.
-            enrollment = await Enrollment.get(payment.inscripcion_id)
-            if enrollment:
-                total_cuotas = enrollment.cantidad_cuotas
-        except:
-            pass
-        
-        # Preparar fila
-        # Ajustar fecha a hora boliviana (UTC-4)
-        from core.timezone_utils import to_bolivia_time
-        fecha_bolivia = to_bolivia_time(payment.fecha_subida)
-
-        row = [
-            nombre_estudiante,
-            fecha_bolivia,
-            "Bs",  # Moneda
-            payment.cantidad_pago,
-            payment.concepto or "",
-            total_cuotas,
-            payment.numero_transaccion or "",
-            payment.estado_pago.value if payment.estado_pago else "",
-            "" # Descripción vacía
-        ]
-        ws.append(row)
-    
-    # Ajustar ancho de columnas
-    column_widths = [30, 20, 10, 15, 20, 15, 25, 15, 30]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[chr(64 + i)].width = width
-    
-    # Guardar en BytesIO
-    excel_file = BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
+    # Generar Excel (agregación + cursor + openpyxl write-only, memoria constante)
+    excel_file = await report_service.generar_reporte_pagos_excel(
+        fecha_desde=fecha_desde_dt,
+        fecha_hasta=fecha_hasta_dt
+    )
     
     # Nombre del archivo
     filename = f"reporte_pagos_{fecha_desde}_{fecha_hasta}.xlsx"
     
-    # Retornar archivo
+    # Retornar archivo por chunks (el archivo temporal se cierra al terminar)
     return StreamingResponse(
-        excel_file,
+        report_service.iter_file(excel_file),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -28,6 +28,7 @@ async def read_students(
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     estado_titulo: Optional[str] = Query(None, description="Filtrar por estado del título (pendiente, verificado, etc)"),
     curso_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por curso inscrito"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (meta.nextCursor). Activa paginación por cursor e ignora `page`"),
     current_user: User = Depends(require_admin)
 ) -> Any:
     """
@@ -44,20 +45,25 @@ async def read_students(
     **Paginación:**
     - `page`: Página actual (default: 1)
     - `per_page`: Elementos por página (default: 10, max: 100)
+    - `cursor`: (Opcional) `meta.nextCursor` de la respuesta anterior, paginación por cursor
     """
-    students, total_count = await student_service.get_students(
-        page=page,
-        per_page=per_page,
-        q=q,
-        activo=activo,
-        estado_titulo=estado_titulo,
-        curso_id=curso_id
-    )
+    try:
+        students, total_count, next_cursor = await student_service.get_students(
+            page=page,
+            per_page=per_page,
+            q=q,
+            activo=activo,
+            estado_titulo=estado_titulo,
+            curso_id=curso_id,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Calcular metadatos
     total_pages = math.ceil(total_count / per_page)
-    has_next = page < total_pages
-    has_prev = page > 1
+    has_next = next_cursor is not None
+    has_prev = page > 1 or cursor is not None
     
     return {
         "data": students,
@@ -67,7 +73,8 @@ async def read_students(
             totalItems=total_count,
             totalPages=total_pages,
             hasNextPage=has_next,
-            hasPrevPage=has_prev
+            hasPrevPage=has_prev,
+            nextCursor=next_cursor
         )
     }
 
@@ -176,8 +183,12 @@ async def update_student_self(
             detail="Este endpoint es solo para estudiantes. Los admins deben usar PUT /students/{id}"
         )
     
-    # Actualizar el perfil del estudiante autenticado
-    student = await student_service.update_student(student=current_user, student_in=student_in)
+    # Actualizar el perfil del estudiante autenticado (leído de nuevo: el de
+    # la sesión puede venir de la caché y tener unos segundos)
+    student = await Student.get(current_user.id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+    student = await student_service.update_student(student=student, student_in=student_in)
     return student
 
 
@@ -207,20 +218,34 @@ async def change_password(
     3. Mínimo 5 caracteres
     4. Se hashea automáticamente
     """
-    from core.security import verify_password, get_password_hash
+    from core.security import verify_password_async, get_password_hash_async
+    from core.principal_cache import invalidate_principal
      
+    # Releer el estudiante: `current_user` puede venir de la caché de
+    # usuarios autenticados (con el hash anterior si la contraseña cambió
+    # hace poco en otro worker)
+    student = await Student.get(current_user.id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+    
     # Verificar que la contraseña actual sea correcta
-    if not verify_password(password_data.current_password, current_user.password):
+    if not await verify_password_async(password_data.current_password, student.password):
         raise HTTPException(
             status_code=400,
             detail="La contraseña actual es incorrecta"
         )
     
     # Actualizar la contraseña (ya viene validada que new_password == confirm_password)
-    current_user.password = get_password_hash(password_data.new_password)
-    await current_user.save()
+    # Solo se escribe el campo password
+    nuevo_hash = await get_password_hash_async(password_data.new_password)
+    await student.set({Student.password: nuevo_hash})
+    invalidate_principal("student", student.id)
     
-    return current_user
+    # Cerrar las demás sesiones (refresh tokens)
+    from services import token_service
+    await token_service.revoke_all_refresh_tokens("student", student.id)
+    
+    return student
 
 
 @router.put(
@@ -327,7 +352,7 @@ async def upload_student_photo(
     **Formatos permitidos:** JPG, PNG, WEBP  
     **Tamaño máximo:** 5MB
     """
-    from core.cloudinary_utils import upload_image
+    from core.storage import upload_image
     
     student = await student_service.get_student(id=id)
     if not student:
@@ -340,14 +365,14 @@ async def upload_student_photo(
             detail="No tienes permiso para subir archivos a este estudiante"
         )
     
-    # Subir imagen a Cloudinary
+    # Subir imagen al almacenamiento configurado
     folder = f"students/{id}/photo"
     public_id = f"photo_{id}"
     foto_url = await upload_image(file, folder, public_id)
     
     # Actualizar URL en el estudiante
     student.foto_url = foto_url
-    await student.save()
+    await student.save_changes()
     
     return student
 
@@ -0,0 +1,82 @@
+"""
+Caché en Memoria
+================
+
+Caché simple por proceso con expiración (TTL), desalojo LRU y métricas.
+
+No es compartida entre workers: cada proceso tiene la suya. Se usa para datos
+que pueden estar unos segundos desactualizados (ej: totales de paginación).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Caché con TTL y tamaño máximo (LRU)
+
+    Uso:
+    ----
+    cache = TTLCache(maxsize=1000, ttl=30)
+    cache.set("clave", 42)
+    cache.get("clave")  # 42 (o None si expiró)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obtener un valor, o None si no existe o expiró"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guardar un valor (desaloja el menos usado si se llena)"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Eliminar una clave (no falla si no existe)"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vaciar la caché"""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Métricas de uso"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -2,14 +2,36 @@
 Utilidades para subir archivos a Cloudinary
 ============================================
 
-Funciones para subir y gestionar archivos en Cloudinary.
+Llamadas al SDK de Cloudinary usadas por el backend de almacenamiento
+`CloudinaryStorage` (core/storage.py). La validación de archivos (tipo,
+tamaño) vive en core/storage.py y es común a todos los backends.
+
+El SDK de Cloudinary es bloqueante, así que cada llamada corre en un pool de
+hilos dedicado y acotado (no en el event loop), con:
+- Un semáforo que limita las operaciones simultáneas por worker, para que una
+  ola de subidas (ej: cierre de plazo de pagos) no acapare la API.
+- Un timeout por llamada (espera en cola + subida).
+
+Subida directa (sin pasar por la API): `direct_upload_params` firma los
+parámetros para que el cliente suba a Cloudinary, `verify_direct_upload`
+comprueba la firma de la respuesta de Cloudinary antes de aceptar la URL, y
+`resource_info` lee de la Admin API el formato, tamaño y MD5 reales del
+archivo (lo que reporte el cliente no es confiable).
 """
 
+import asyncio
+import re
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
-from fastapi import UploadFile, HTTPException
+import cloudinary.utils
 from core.config import settings
-from typing import Optional
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
 
 # Configurar Cloudinary
 cloudinary.config(
@@ -19,138 +41,236 @@ cloudinary.config(
     secure=True
 )
 
+# Subida por partes de archivos grandes (Cloudinary exige partes de al menos 5MB)
+CHUNKED_UPLOAD_THRESHOLD = 6 * 1024 * 1024  # 6MB
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB
 
-async def upload_pdf(
-    file: UploadFile,
-    folder: str,
-    public_id: Optional[str] = None
-) -> str:
+# Vigencia de una firma de subida (Cloudinary rechaza timestamps de más de 1 hora)
+DIRECT_UPLOAD_EXPIRES_IN = 3600
+
+# URL de entrega: https://res.cloudinary.com/<cloud>/<tipo>/upload/v<versión>/<public_id>[.<ext>]
+_DELIVERY_URL = re.compile(
+    r"^https://res\.cloudinary\.com/(?P<cloud>[^/]+)/(?P<tipo>image|raw)/upload/"
+    r"v(?P<version>\d+)/(?P<public_id>[^.]+)(?:\.\w+)?$"
+)
+
+# Pool de hilos dedicado (no comparte el threadpool por defecto de Starlette)
+_executor = ThreadPoolExecutor(
+    max_workers=settings.STORAGE_MAX_WORKERS,
+    thread_name_prefix="cloudinary"
+)
+_semaphore = asyncio.Semaphore(settings.STORAGE_MAX_CONCURRENCY)
+
+
+async def _run_blocking(func: Callable[..., Any], *args, call_timeout: float, **kwargs) -> Any:
     """
-    Subir un archivo PDF a Cloudinary
-    
-    Args:
-        file: Archivo a subir
-        folder: Carpeta en Cloudinary (ej: "students/cv")
-        public_id: ID público (nombre del archivo sin extensión)
-        
-    Returns:
-        URL del archivo subido
-        
+    Ejecutar una llamada bloqueante del SDK en el pool dedicado
+
     Raises:
-        HTTPException: Si el archivo no es PDF o hay error al subir
+        asyncio.TimeoutError: Si la espera + ejecución supera `call_timeout`
     """
-    # Validar que sea PDF
-    if not file.content_type == "application/pdf":
-        raise HTTPException(
-            status_code=400,
-            detail=f"El archivo debe ser PDF, recibido: {file.content_type}"
-        )
-    
-    # Validar tamaño (máximo 10MB)
-    file.file.seek(0, 2)  # Ir al final del archivo
-    file_size = file.file.tell()  # Obtener tamaño
-    file.file.seek(0)  # Volver al inicio
-    
-    if file_size > 10 * 1024 * 1024:  # 10MB
-        raise HTTPException(
-            status_code=400,
-            detail="El archivo es demasiado grande (máximo 10MB)"
-        )
-    
-    try:
-        # Subir a Cloudinary
-        result = cloudinary.uploader.upload(
-            file.file,
-            folder=folder,
-            public_id=public_id,
-            resource_type="raw",  # Para PDFs
-            overwrite=True
-        )
-        
-        return result["secure_url"]
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al subir archivo: {str(e)}"
-        )
+    async def _guarded():
+        async with _semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+    return await asyncio.wait_for(_guarded(), timeout=call_timeout)
+
 
+def shutdown_executor() -> None:
+    """Liberar el pool de hilos (al apagar la aplicación)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
 
-async def upload_image(
-    file: UploadFile,
-    folder: str,
-    public_id: Optional[str] = None
+
+async def upload(
+    fileobj: BinaryIO,
+    public_id: str,
+    resource_type: str,
+    size: Optional[int] = None
 ) -> str:
     """
-    Subir una imagen a Cloudinary
-    
+    Subir un archivo a Cloudinary
+
+    Los archivos "raw" (PDFs) de más de CHUNKED_UPLOAD_THRESHOLD se suben por
+    partes (`upload_large`), sin mandar todo el cuerpo en una sola petición.
+
     Args:
-        file: Archivo a subir
-        folder: Carpeta en Cloudinary (ej: "students/photos")
-        public_id: ID público opcional (nombre del archivo)
-        
+        fileobj: Archivo (binario) a subir
+        public_id: ID público completo, con carpeta (ej: "payments/<id>/voucher_1")
+        resource_type: "image" (ya reducidas a WebP, ver core/images.py) o "raw" (PDFs)
+        size: Tamaño en bytes (si se conoce)
+
     Returns:
-        URL de la imagen subida
-        
+        URL segura del archivo subido
+
     Raises:
-        HTTPException: Si el archivo no es imagen o hay error al subir
-    """
-    # Validar que sea imagen
-    allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400,
-            detail=f"El archivo debe ser imagen (JPG, PNG, WEBP), recibido: {file.content_type}"
-        )
-    
-    # Validar tamaño (máximo 5MB)
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(
-            status_code=400,
-            detail="La imagen es demasiado grande (máximo 5MB)"
-        )
-    
-    try:
-        # Subir a Cloudinary con transformaciones
-        result = cloudinary.uploader.upload(
-            file.file,
-            folder=folder,
-            public_id=public_id,
-            resource_type="image",
-            overwrite=True,
-            transformation=[
-                {"width": 800, "height": 800, "crop": "limit"},  # Redimensionar
-                {"quality": "auto"},  # Calidad automática
-                {"fetch_format": "auto"}  # Formato automático
-            ]
-        )
-        
-        return result["secure_url"]
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al subir imagen: {str(e)}"
-        )
+        asyncio.TimeoutError: Si se agota STORAGE_UPLOAD_TIMEOUT
+    """
+    options = {
+        "timeout": settings.STORAGE_UPLOAD_TIMEOUT,  # Timeout HTTP del SDK (libera el hilo)
+        "public_id": public_id,
+        "resource_type": resource_type,
+        "overwrite": True,
+    }
+    if resource_type == "raw" and size is not None and size > CHUNKED_UPLOAD_THRESHOLD:
+        func = cloudinary.uploader.upload_large
+        options["chunk_size"] = CHUNKED_UPLOAD_CHUNK_SIZE
+    else:
+        func = cloudinary.uploader.upload
+
+    result = await _run_blocking(
+        func,
+        fileobj,
+        call_timeout=settings.STORAGE_UPLOAD_TIMEOUT,
+        **options
+    )
+    return result["secure_url"]
+
+
+async def download(public_id: str, resource_type: str) -> bytes:
+    """
+    Descargar el contenido de un archivo de Cloudinary
+
+    Raises:
+        asyncio.TimeoutError: Si se agota STORAGE_UPLOAD_TIMEOUT
+    """
+    url, _ = cloudinary.utils.cloudinary_url(public_id, resource_type=resource_type, secure=True)
+
+    def _fetch() -> bytes:
+        with urllib.request.urlopen(url, timeout=settings.STORAGE_UPLOAD_TIMEOUT) as response:
+            return response.read()
+
+    return await _run_blocking(_fetch, call_timeout=settings.STORAGE_UPLOAD_TIMEOUT)
 
 
-async def delete_file(public_id: str, resource_type: str = "raw") -> bool:
+async def destroy(public_id: str, resource_type: str) -> bool:
     """
     Eliminar un archivo de Cloudinary
-    
-    Args:
-        public_id: ID público del archivo
-        resource_type: Tipo de recurso ("raw" para PDFs, "image" para imágenes)
-        
+
     Returns:
-        True si se eliminó correctamente
+        True si se eliminó correctamente (False si falló o se agotó el tiempo)
     """
     try:
-        result = cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        result = await _run_blocking(
+            cloudinary.uploader.destroy,
+            public_id,
+            call_timeout=settings.STORAGE_DELETE_TIMEOUT,
+            timeout=settings.STORAGE_DELETE_TIMEOUT,
+            resource_type=resource_type
+        )
         return result.get("result") == "ok"
     except Exception:
         return False
+
+
+def signed_url(public_id: str, resource_type: str, expires_in: int) -> str:
+    """
+    URL de descarga firmada que expira en `expires_in` segundos
+
+    (Solo firma localmente, no hace llamadas de red)
+    """
+    return cloudinary.utils.private_download_url(
+        public_id,
+        "",
+        resource_type=resource_type,
+        type="upload",
+        expires_at=int(time.time()) + expires_in
+    )
+
+
+def direct_upload_params(public_id: str, allowed_formats: List[str]) -> Dict[str, Any]:
+    """
+    Parámetros firmados para que el cliente suba un archivo directo a Cloudinary
+
+    La firma cubre `public_id`, `allowed_formats` y `timestamp`: el cliente
+    no puede cambiar el destino ni el formato, y la firma vence en
+    DIRECT_UPLOAD_EXPIRES_IN.
+
+    Returns:
+        {"upload_url": ..., "fields": {...}} para un POST multipart con `file`
+    """
+    params = {
+        "public_id": public_id,
+        "allowed_formats": ",".join(allowed_formats),
+        "timestamp": int(time.time()),
+    }
+    params["signature"] = cloudinary.utils.api_sign_request(params, settings.CLOUDINARY_API_SECRET)
+    params["api_key"] = settings.CLOUDINARY_API_KEY
+    return {
+        "upload_url": cloudinary.utils.cloudinary_api_url("upload", resource_type="auto"),
+        "fields": params,
+    }
+
+
+def verify_direct_upload(url: str, signature: str) -> Optional[str]:
+    """
+    Verificar la URL de una subida directa con la firma que devolvió Cloudinary
+
+    (Solo verifica localmente, no hace llamadas de red)
+
+    Returns:
+        `public_id` del archivo si la firma es válida, None si no
+    """
+    match = _DELIVERY_URL.match(url)
+    if not match or match.group("cloud") != settings.CLOUDINARY_CLOUD_NAME:
+        return None
+    public_id = match.group("public_id")
+    if not cloudinary.utils.verify_api_response_signature(public_id, match.group("version"), signature):
+        return None
+    return public_id
+
+
+async def resource_info(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Formato, tamaño y MD5 de un archivo subido, según Cloudinary (Admin API)
+
+    Una llamada a la Admin API por subida directa (cuenta para su límite
+    por hora).
+
+    Args:
+        url: URL de entrega del archivo (ya verificada)
+
+    Returns:
+        {"resource_type", "format", "bytes", "etag"} o None si la URL no es
+        de Cloudinary
+
+    Raises:
+        asyncio.TimeoutError: Si se agota STORAGE_UPLOAD_TIMEOUT
+    """
+    match = _DELIVERY_URL.match(url)
+    if not match:
+        return None
+    result = await _run_blocking(
+        cloudinary.api.resource,
+        match.group("public_id"),
+        resource_type=match.group("tipo"),
+        call_timeout=settings.STORAGE_UPLOAD_TIMEOUT
+    )
+    return {
+        "resource_type": result["resource_type"],
+        "format": result.get("format"),
+        "bytes": result["bytes"],
+        "etag": result.get("etag"),
+    }
+
+
+def preview_url(public_id: str) -> str:
+    """
+    URL de una vista previa WebP pequeña, generada por Cloudinary al pedirla
+
+    Sirve para archivos subidos directamente por el cliente (tipo "image";
+    en los PDFs Cloudinary usa la primera página).
+    """
+    from core.images import PREVIEW_MAX_DIMENSION
+
+    url, _ = cloudinary.utils.cloudinary_url(
+        public_id,
+        resource_type="image",
+        format="webp",
+        page=1,
+        width=PREVIEW_MAX_DIMENSION,
+        height=PREVIEW_MAX_DIMENSION,
+        crop="limit",
+        secure=True
+    )
+    return url
@@ -27,11 +27,57 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str =  Field(..., env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int =  Field(..., env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    # Refresh tokens rotativos (POST /auth/refresh)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = Field(30, env="REFRESH_TOKEN_EXPIRE_DAYS")
     
-    # Cloudinary
-    CLOUDINARY_CLOUD_NAME: str = Field(..., env="CLOUDINARY_CLOUD_NAME")
-    CLOUDINARY_API_KEY: str = Field(..., env="CLOUDINARY_API_KEY")
-    CLOUDINARY_API_SECRET: str = Field(..., env="CLOUDINARY_API_SECRET")
+    # Contraseñas (bcrypt, fuera del event loop)
+    # Costo (log2 de iteraciones): cada +1 duplica el tiempo de hash/verificación.
+    # Al cambiarlo, cada contraseña se rehashea en su siguiente login exitoso.
+    BCRYPT_ROUNDS: int = Field(12, ge=4, le=31, env="BCRYPT_ROUNDS")
+    # Hilos dedicados a bcrypt (hashes simultáneos por worker)
+    BCRYPT_MAX_WORKERS: int = Field(2, env="BCRYPT_MAX_WORKERS")
+    
+    # Límite de intentos de login (core/rate_limit.py), por worker.
+    # Ráfaga máxima (BURST) y recarga por minuto, por IP y por usuario.
+    LOGIN_RATE_LIMIT_ENABLED: bool = Field(True, env="LOGIN_RATE_LIMIT_ENABLED")
+    LOGIN_IP_BURST: int = Field(60, env="LOGIN_IP_BURST")
+    LOGIN_IP_PER_MINUTE: int = Field(30, env="LOGIN_IP_PER_MINUTE")
+    LOGIN_USERNAME_BURST: int = Field(5, env="LOGIN_USERNAME_BURST")
+    LOGIN_USERNAME_PER_MINUTE: int = Field(5, env="LOGIN_USERNAME_PER_MINUTE")
+    RATE_LIMIT_MAX_KEYS: int = Field(10000, env="RATE_LIMIT_MAX_KEYS")
+    
+    # Caché de usuarios autenticados (core/principal_cache.py)
+    # Segundos que se reutiliza el usuario del token sin consultar la base de datos.
+    # 0 = consultar en cada petición.
+    PRINCIPAL_CACHE_SECONDS: int = Field(30, env="PRINCIPAL_CACHE_SECONDS")
+    PRINCIPAL_CACHE_MAXSIZE: int = Field(4096, env="PRINCIPAL_CACHE_MAXSIZE")
+    
+    # Paginación
+    # Segundos que se cachea el total (totalItems) de un listado por filtro.
+    # 0 = conteo exacto en cada página (por defecto).
+    PAGINATION_COUNT_CACHE_SECONDS: int = Field(0, env="PAGINATION_COUNT_CACHE_SECONDS")
+    
+    # Almacenamiento de archivos (core/storage.py)
+    # "cloudinary" (CDN) o "local" (disco, servido en LOCAL_STORAGE_URL)
+    STORAGE_BACKEND: str = Field("cloudinary", env="STORAGE_BACKEND")
+    LOCAL_STORAGE_DIR: str = Field("media", env="LOCAL_STORAGE_DIR")
+    LOCAL_STORAGE_URL: str = Field("/media", env="LOCAL_STORAGE_URL")
+    
+    # Cloudinary (requerido si STORAGE_BACKEND = "cloudinary")
+    CLOUDINARY_CLOUD_NAME: Optional[str] = Field(None, env="CLOUDINARY_CLOUD_NAME")
+    CLOUDINARY_API_KEY: Optional[str] = Field(None, env="CLOUDINARY_API_KEY")
+    CLOUDINARY_API_SECRET: Optional[str] = Field(None, env="CLOUDINARY_API_SECRET")
+    
+    # Subidas/eliminaciones en Cloudinary (fuera del event loop)
+    # Hilos dedicados, operaciones simultáneas por worker y timeouts (segundos)
+    STORAGE_MAX_WORKERS: int = Field(4, env="STORAGE_MAX_WORKERS")
+    STORAGE_MAX_CONCURRENCY: int = Field(8, env="STORAGE_MAX_CONCURRENCY")
+    STORAGE_UPLOAD_TIMEOUT: float = Field(60.0, env="STORAGE_UPLOAD_TIMEOUT")
+    STORAGE_DELETE_TIMEOUT: float = Field(15.0, env="STORAGE_DELETE_TIMEOUT")
+    
+    # Tamaño máximo del cuerpo de una petición multipart (bytes).
+    # Mayor al archivo más grande permitido (PDF 10MB) + campos del formulario.
+    MAX_UPLOAD_BODY_SIZE: int = Field(11 * 1024 * 1024, env="MAX_UPLOAD_BODY_SIZE")
     
     
     model_config = {
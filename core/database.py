@@ -8,6 +8,8 @@ Manejo de la conexión asíncrona a MongoDB usando Motor y Beanie ODM.
 import motor.motor_asyncio
 from beanie import init_beanie
 from .config import settings
+from .indexes import ensure_indexes
+from .search import backfill_search_tokens
 
 # Importar todos los modelos para registrarlos en Beanie
 from models.user import User
@@ -17,6 +19,8 @@ from models.enrollment import Enrollment
 from models.payment import Payment
 from models.payment_config import PaymentConfig
 from models.discount import Discount
+from models.payment_rollup import PaymentRollup
+from models.refresh_token import RefreshToken
 
 async def init_db():
     """
@@ -29,9 +33,11 @@ async def init_db():
         settings.MONGODB_URL
     )
     
+    database = client[settings.DATABASE_NAME]
+    
     # Inicializar Beanie con la base de datos y los modelos
     await init_beanie(
-        database=client[settings.DATABASE_NAME],
+        database=database,
         document_models=[
             User,
             Student,
@@ -40,6 +46,25 @@ async def init_db():
             Payment,
             PaymentConfig,
             Discount,
+            PaymentRollup,
+            RefreshToken,
         ]
     )
     print(f"[OK] Conectado a MongoDB ({settings.DATABASE_NAME}) y Beanie inicializado.")
+    
+    # Crear índices faltantes y reportar drift contra el manifiesto (core/indexes.py)
+    await ensure_indexes(database)
+    
+    # Completar tokens de búsqueda de documentos anteriores (core/search.py)
+    for document_model in (Student, Course, Payment):
+        await backfill_search_tokens(document_model)
+    
+    # Primer arranque con acumulados del dashboard: calcularlos desde los pagos
+    if (
+        await PaymentRollup.get_motor_collection().estimated_document_count() == 0
+        and await Payment.get_motor_collection().estimated_document_count() > 0
+    ):
+        from services.dashboard_service import reconstruir_rollups
+        resultado = await reconstruir_rollups()
+        print(f"[OK] Acumulados del dashboard calculados: {resultado['acumulados']}")
+
@@ -0,0 +1,168 @@
+"""
+Procesamiento de Imágenes
+=========================
+
+Etapa previa al almacenamiento para las imágenes subidas (fotos de perfil,
+QR, comprobantes en imagen). Funciona igual con cualquier backend.
+
+¿Qué hace?
+----------
+1. Decodifica la imagen (JPEG se decodifica ya reducido, ver `Image.draft`)
+2. Aplica la orientación EXIF y descarta los metadatos (EXIF, GPS, etc.)
+3. Reduce al límite de IMAGE_MAX_DIMENSION x IMAGE_MAX_DIMENSION (sin ampliar)
+4. Re-codifica a WebP
+
+Además genera vistas previas (`make_preview`) de comprobantes y requisitos:
+una WebP pequeña de la imagen o de la primera página del PDF (pypdfium2),
+para que las pantallas de revisión no descarguen el archivo completo.
+
+Es trabajo de CPU: se ejecuta en el threadpool, nunca en el event loop.
+PDFium (pypdfium2) no es thread-safe, así que los PDFs se renderizan de a
+uno (`_pdfium_lock`).
+
+Uso:
+----
+from core.images import process_image_async, make_preview_async
+
+processed = await process_image_async(upload.file)
+preview = await make_preview_async(upload.file, upload.content_type)
+"""
+
+import io
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Mismo límite que aplicaba la transformación de Cloudinary
+IMAGE_MAX_DIMENSION = 800
+WEBP_QUALITY = 80
+WEBP_CONTENT_TYPE = "image/webp"
+
+# Vistas previas (listas de revisión)
+PREVIEW_MAX_DIMENSION = 320
+PREVIEW_QUALITY = 70
+PDF_CONTENT_TYPE = "application/pdf"
+
+# PDFium no es thread-safe: todo uso de pypdfium2 va bajo este lock
+# (Pillow sigue en paralelo en el threadpool)
+_pdfium_lock = threading.Lock()
+
+
+@dataclass
+class ProcessedImage:
+    """Imagen lista para guardar"""
+    file: BinaryIO  # Posicionado al inicio
+    content_type: str
+    size: int
+    width: int
+    height: int
+
+
+def _encode_webp(img: Image.Image, max_dimension: int, quality: int) -> ProcessedImage:
+    """Reducir a `max_dimension` (sin ampliar) y codificar en WebP, sin metadatos"""
+    has_alpha = img.mode in ("RGBA", "LA") or "transparency" in img.info
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    # Sin `exif=`: los metadatos no se copian
+    img.save(output, format="WEBP", quality=quality, method=4)
+    size = output.tell()
+    output.seek(0)
+    return ProcessedImage(
+        file=output,
+        content_type=WEBP_CONTENT_TYPE,
+        size=size,
+        width=img.width,
+        height=img.height
+    )
+
+
+def process_image(fileobj: BinaryIO) -> ProcessedImage:
+    """
+    Reducir y convertir una imagen a WebP, sin metadatos
+
+    Args:
+        fileobj: Imagen original (JPEG, PNG o WEBP)
+
+    Returns:
+        ProcessedImage en WebP
+
+    Raises:
+        HTTPException 400: Si la imagen está dañada o no se puede decodificar
+    """
+    limit = (IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION)
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as img:
+            # JPEG: decodificar directamente a una escala menor (más rápido)
+            img.draft("RGB", limit)
+            img = ImageOps.exif_transpose(img)
+            return _encode_webp(img, IMAGE_MAX_DIMENSION, WEBP_QUALITY)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise HTTPException(
+            status_code=400,
+            detail="La imagen está dañada o no se puede leer"
+        )
+
+
+async def process_image_async(fileobj: BinaryIO) -> ProcessedImage:
+    """`process_image` en el threadpool (no bloquea el event loop)"""
+    from starlette.concurrency import run_in_threadpool
+    return await run_in_threadpool(process_image, fileobj)
+
+
+def make_preview(fileobj: BinaryIO, content_type: str) -> ProcessedImage:
+    """
+    Vista previa WebP de máx PREVIEW_MAX_DIMENSION px
+
+    Args:
+        fileobj: Imagen o PDF (queda posicionado al inicio)
+        content_type: Tipo detectado del archivo (PDF: se usa la primera página)
+
+    Returns:
+        ProcessedImage en WebP
+
+    Raises:
+        ValueError: Si el archivo no se puede decodificar
+    """
+    limit = (PREVIEW_MAX_DIMENSION, PREVIEW_MAX_DIMENSION)
+    fileobj.seek(0)
+    try:
+        if content_type == PDF_CONTENT_TYPE:
+            import pypdfium2 as pdfium
+
+            data = fileobj.read()
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(data)
+                try:
+                    page = pdf[0]
+                    # Renderizar directo al tamaño final (escala en puntos PDF)
+                    scale = PREVIEW_MAX_DIMENSION / max(page.get_size())
+                    bitmap = page.render(scale=scale)
+                    # Copia propia de la imagen: el bitmap de PDFium se
+                    # libera aquí, dentro del lock
+                    img = bitmap.to_pil().copy()
+                    bitmap.close()
+                    page.close()
+                finally:
+                    pdf.close()
+            return _encode_webp(img, PREVIEW_MAX_DIMENSION, PREVIEW_QUALITY)
+
+        with Image.open(fileobj) as img:
+            img.draft("RGB", limit)
+            img = ImageOps.exif_transpose(img)
+            return _encode_webp(img, PREVIEW_MAX_DIMENSION, PREVIEW_QUALITY)
+    except Exception as e:
+        raise ValueError(f"No se pudo generar la vista previa: {e}")
+    finally:
+        fileobj.seek(0)
+
+
+async def make_preview_async(fileobj: BinaryIO, content_type: str) -> ProcessedImage:
+    """`make_preview` en el threadpool (no bloquea el event loop)"""
+    from starlette.concurrency import run_in_threadpool
+    return await run_in_threadpool(make_preview, fileobj, content_type)
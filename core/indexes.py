@@ -0,0 +1,349 @@
+"""
+Manifiesto de Índices
+=====================
+
+Declaración central de los índices de MongoDB de cada documento Beanie,
+pensados a partir de los patrones de acceso reales de los servicios.
+
+¿Cómo se usa?
+-------------
+`init_db` llama a `ensure_indexes(database)` al iniciar la aplicación:
+
+1. Crea los índices del manifiesto que falten en la colección.
+2. Reporta "drift": índices con el mismo nombre pero distinta definición,
+   e índices que existen en la colección pero no están en el manifiesto.
+
+El drift solo se reporta, nunca se eliminan índices automáticamente.
+
+Índices únicos:
+---------------
+Los índices `unique` son la única protección contra duplicados en varios
+flujos (ej: `aprobado_unico` al aprobar pagos, `estudiante_curso_activa_unique`
+al inscribir): los servicios ya no consultan antes de escribir. Si uno no
+existe con la definición del manifiesto (no se pudo crear por duplicados
+previos o por versión de MongoDB, o tiene otra definición), `ensure_indexes`
+lanza `IndexIntegrityError` y la aplicación no arranca. Los documentos
+duplicados que lo impiden se listan con `python -m scripts.find_duplicate_keys`.
+
+Requiere MongoDB 6.0 o superior (filtros parciales con `$in`).
+
+Convenciones:
+-------------
+- Todos los índices llevan nombre explícito (así se detecta el drift).
+- Los índices compuestos siguen la regla igualdad → orden → rango, para que
+  los `sort("-fecha_...")` se resuelvan con el mismo índice del filtro.
+- Los índices de orden terminan en `_id` desc: es el desempate estable que
+  usa la paginación (offset y cursor, ver services/pagination.py).
+"""
+
+from collections.abc import Mapping
+from typing import Dict, List, Type
+
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from models.user import User
+from models.student import Student
+from models.course import Course
+from models.enrollment import Enrollment
+from models.enums import EstadoInscripcion
+from models.payment import Payment
+from models.payment_config import PaymentConfig
+from models.discount import Discount
+from models.payment_rollup import PaymentRollup
+from models.refresh_token import RefreshToken
+
+
+INDEX_MANIFEST: Dict[Type, List[IndexModel]] = {
+    User: [
+        # Login de admins y validación de duplicados
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Listado paginado
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_desc"),
+    ],
+    Student: [
+        # Login de estudiantes (registro = username)
+        IndexModel([("registro", ASCENDING)], name="registro_unique", unique=True),
+        IndexModel([("carnet", ASCENDING)], name="carnet"),
+        # Listado paginado y filtros
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_desc"),
+        IndexModel(
+            [("activo", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="activo_created_at"
+        ),
+        # Filtro "estudiantes de un curso" (multikey)
+        IndexModel(
+            [("lista_cursos_ids", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="lista_cursos_ids_created_at"
+        ),
+        # Búsqueda por texto (q) con tokens de prefijo (multikey, ver core/search.py)
+        IndexModel(
+            [("search_tokens", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="search_tokens_created_at"
+        ),
+    ],
+    Course: [
+        IndexModel([("codigo", ASCENDING)], name="codigo"),
+        # Listado paginado y filtros
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_desc"),
+        IndexModel(
+            [("activo", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="activo_created_at"
+        ),
+        # Búsqueda por texto (q)
+        IndexModel(
+            [("search_tokens", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="search_tokens_created_at"
+        ),
+    ],
+    Enrollment: [
+        # Una sola inscripción no cancelada por estudiante y curso: es la única
+        # validación de duplicados en create_enrollment (si no se puede crear,
+        # la aplicación no arranca). Parcial con $in (MongoDB 6.0+) porque los
+        # filtros parciales no admiten $ne. Reemplaza a "estudiante_curso":
+        # eliminar ese índice antiguo (queda reportado fuera del manifiesto)
+        IndexModel(
+            [("estudiante_id", ASCENDING), ("curso_id", ASCENDING)],
+            name="estudiante_curso_activa_unique",
+            unique=True,
+            partialFilterExpression={"estado": {"$in": [
+                estado.value for estado in EstadoInscripcion
+                if estado != EstadoInscripcion.CANCELADO
+            ]}}
+        ),
+        IndexModel(
+            [("estudiante_id", ASCENDING), ("fecha_inscripcion", DESCENDING), ("_id", DESCENDING)],
+            name="estudiante_fecha_inscripcion"
+        ),
+        # Inscritos de un curso
+        IndexModel(
+            [("curso_id", ASCENDING), ("fecha_inscripcion", DESCENDING), ("_id", DESCENDING)],
+            name="curso_fecha_inscripcion"
+        ),
+        # Listado paginado y filtro por estado
+        IndexModel(
+            [("estado", ASCENDING), ("fecha_inscripcion", DESCENDING), ("_id", DESCENDING)],
+            name="estado_fecha_inscripcion"
+        ),
+        IndexModel([("fecha_inscripcion", DESCENDING), ("_id", DESCENDING)], name="fecha_inscripcion_desc"),
+        # Reutilizar documentos de requisitos ya subidos (mismo hash)
+        IndexModel(
+            [("estudiante_id", ASCENDING), ("requisitos.sha256", ASCENDING)],
+            name="estudiante_requisitos_sha256",
+            partialFilterExpression={"requisitos.sha256": {"$type": "string"}}
+        ),
+    ],
+    Payment: [
+        # Checklist de pagos y validación anti-duplicados al aprobar
+        IndexModel(
+            [
+                ("inscripcion_id", ASCENDING),
+                ("estado_pago", ASCENDING),
+                ("concepto", ASCENDING),
+                ("numero_cuota", ASCENDING),
+            ],
+            name="inscripcion_estado_concepto"
+        ),
+        # Un solo pago APROBADO por concepto/cuota de una inscripción
+        # (garantiza el anti-duplicados de aprobar_pago de forma atómica)
+        IndexModel(
+            [
+                ("inscripcion_id", ASCENDING),
+                ("concepto", ASCENDING),
+                ("numero_cuota", ASCENDING),
+            ],
+            name="aprobado_unico",
+            unique=True,
+            partialFilterExpression={"estado_pago": "aprobado"}
+        ),
+        # Pagos de una inscripción / estudiante / curso (más reciente primero)
+        IndexModel(
+            [("inscripcion_id", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)],
+            name="inscripcion_fecha_subida"
+        ),
+        IndexModel(
+            [("estudiante_id", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)],
+            name="estudiante_fecha_subida"
+        ),
+        IndexModel(
+            [("curso_id", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)],
+            name="curso_fecha_subida"
+        ),
+        # Cola de revisión (pendientes) y filtro por estado
+        IndexModel(
+            [("estado_pago", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)],
+            name="estado_fecha_subida"
+        ),
+        # Listado paginado y rango de fechas del reporte Excel
+        IndexModel([("fecha_subida", DESCENDING), ("_id", DESCENDING)], name="fecha_subida_desc"),
+        # Búsqueda por texto (q)
+        IndexModel(
+            [("search_tokens", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)],
+            name="search_tokens_fecha_subida"
+        ),
+        # Comprobantes idénticos (mismo hash): reutilizar la URL y marcar duplicados
+        IndexModel(
+            [("comprobante_sha256", ASCENDING), ("fecha_subida", DESCENDING)],
+            name="comprobante_sha256_fecha_subida",
+            partialFilterExpression={"comprobante_sha256": {"$type": "string"}}
+        ),
+        # Idem por MD5 (subidas directas: el almacenamiento solo reporta MD5)
+        IndexModel(
+            [("comprobante_md5", ASCENDING), ("fecha_subida", DESCENDING)],
+            name="comprobante_md5_fecha_subida",
+            partialFilterExpression={"comprobante_md5": {"$type": "string"}}
+        ),
+        # Subida directa: una URL firmada no se puede reutilizar en otro pago
+        IndexModel([("comprobante_url", ASCENDING)], name="comprobante_url"),
+    ],
+    PaymentConfig: [
+        IndexModel([("is_active", ASCENDING)], name="is_active"),
+    ],
+    Discount: [
+        # Descuentos aplicables a un estudiante (multikey)
+        IndexModel(
+            [("lista_estudiantes", ASCENDING), ("activo", ASCENDING)],
+            name="lista_estudiantes_activo"
+        ),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_desc"),
+    ],
+    PaymentRollup: [
+        # Un acumulado por día/curso/estado (destino de los $inc con upsert)
+        IndexModel(
+            [("dia", ASCENDING), ("curso_id", ASCENDING), ("estado_pago", ASCENDING)],
+            name="dia_curso_estado_unique",
+            unique=True
+        ),
+        # Dashboard: ingresos (APROBADO) y pendientes por rango de días
+        IndexModel(
+            [("estado_pago", ASCENDING), ("dia", ASCENDING)],
+            name="estado_dia"
+        ),
+        # Limpieza de acumulados no tocados al reconstruir
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    RefreshToken: [
+        # POST /auth/refresh y logout: búsqueda por hash del token
+        IndexModel([("token_hash", ASCENDING)], name="token_hash_unique", unique=True),
+        # Revocar todas las sesiones de un usuario (cambio de contraseña, reuso)
+        IndexModel([("sub", ASCENDING), ("user_type", ASCENDING)], name="sub_user_type"),
+        # MongoDB borra los tokens vencidos (TTL)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+class IndexIntegrityError(RuntimeError):
+    """Un índice único del manifiesto no existe con su definición"""
+
+
+# Opciones de índice que forman parte de la definición (se comparan en el drift)
+_COMPARED_OPTIONS = (
+    "unique",
+    "sparse",
+    "partialFilterExpression",
+    "expireAfterSeconds",
+    "weights",
+    "default_language",
+)
+
+
+def _normalize(spec: dict) -> dict:
+    """Reduce una definición de índice a lo que importa para compararla"""
+    key = spec["key"]
+    items = key.items() if isinstance(key, Mapping) else key
+    normalized = {
+        # index_information() puede devolver 1.0 en lugar de 1
+        "key": [
+            (field, int(direction) if isinstance(direction, float) else direction)
+            for field, direction in items
+        ]
+    }
+    for option in _COMPARED_OPTIONS:
+        if spec.get(option) not in (None, False):
+            normalized[option] = spec[option]
+    return normalized
+
+
+async def ensure_indexes(database) -> dict:
+    """
+    Reconciliar los índices de la base de datos con el manifiesto
+
+    Args:
+        database: Base de datos de Motor (AsyncIOMotorDatabase)
+
+    Raises:
+        IndexIntegrityError: Si un índice único del manifiesto no se pudo
+            crear o tiene otra definición (después de reportar todo)
+
+    Returns:
+        dict con el resultado por colección:
+        {
+            "payments": {
+                "created": [...],   # índices creados ahora
+                "drift": [...],     # mismo nombre, definición distinta
+                "extra": [...],     # existen pero no están en el manifiesto
+                "errors": [...]     # no se pudieron crear (ej: duplicados en un unique)
+            },
+            ...
+        }
+    """
+    report = {}
+    integrity_errors = []
+
+    for document_model, indexes in INDEX_MANIFEST.items():
+        collection_name = document_model.Settings.name
+        collection = database[collection_name]
+        existing = await collection.index_information()
+
+        result = {"created": [], "drift": [], "extra": [], "errors": []}
+        declared_names = set()
+
+        for index in indexes:
+            spec = index.document
+            name = spec["name"]
+            declared_names.add(name)
+
+            if name in existing:
+                if _normalize(existing[name]) != _normalize(spec):
+                    result["drift"].append(name)
+                    if spec.get("unique"):
+                        integrity_errors.append(
+                            f"{collection_name}.{name}: definición distinta al manifiesto"
+                        )
+                continue
+
+            try:
+                await collection.create_indexes([index])
+                result["created"].append(name)
+            except OperationFailure as e:
+                result["errors"].append(f"{name}: {e}")
+                if spec.get("unique"):
+                    integrity_errors.append(f"{collection_name}.{name}: {e}")
+
+        result["extra"] = sorted(
+            name for name in existing
+            if name != "_id_" and name not in declared_names
+        )
+
+        report[collection_name] = result
+
+        # Reporte en consola (mismo estilo que init_db)
+        if result["created"]:
+            print(f"[OK] Índices creados en {collection_name}: {', '.join(result['created'])}")
+        if result["drift"]:
+            print(f"[WARN] Índices con definición distinta al manifiesto en {collection_name}: {', '.join(result['drift'])}")
+        if result["extra"]:
+            print(f"[WARN] Índices fuera del manifiesto en {collection_name}: {', '.join(result['extra'])}")
+        for error in result["errors"]:
+            print(f"[ERROR] No se pudo crear índice en {collection_name}: {error}")
+
+    # Sin sus índices únicos la aplicación aceptaría duplicados en silencio
+    if integrity_errors:
+        raise IndexIntegrityError(
+            "Faltan índices únicos. Listar los documentos duplicados con "
+            "`python -m scripts.find_duplicate_keys`, corregirlos (o actualizar "
+            "MongoDB) y reiniciar: " + "; ".join(integrity_errors)
+        )
+
+    return report
@@ -0,0 +1,59 @@
+"""
+Caché de Usuarios Autenticados
+==============================
+
+`get_current_user` (api/dependencies.py) resuelve el usuario del token en
+cada petición. Esta caché por proceso guarda el documento (User o Student)
+unos segundos, con clave (user_type, sub), para no consultar la base de
+datos en cada petición.
+
+- TTL corto (PRINCIPAL_CACHE_SECONDS, 0 = desactivada) y desalojo LRU.
+- Cada petición recibe una copia: modificarla no afecta a la caché.
+- Al cambiar `activo`, `rol` o la contraseña (o cualquier otro dato) los
+  servicios llaman a `invalidate_principal`, así una desactivación tiene
+  efecto inmediato en este worker y en los demás a más tardar en el TTL.
+"""
+
+from typing import Any, Optional
+
+from core.cache import TTLCache
+from core.config import settings
+
+_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_SECONDS
+)
+
+
+def _enabled() -> bool:
+    return settings.PRINCIPAL_CACHE_SECONDS > 0
+
+
+def get_principal(user_type: str, sub: str) -> Optional[Any]:
+    """Copia del usuario cacheado, o None si no está (o expiró)"""
+    if not _enabled():
+        return None
+    principal = _cache.get((user_type, sub))
+    return principal.model_copy(deep=True) if principal is not None else None
+
+
+def set_principal(user_type: str, sub: str, principal: Any) -> None:
+    """Guardar un usuario activo recién leído de la base de datos"""
+    if _enabled():
+        _cache.set((user_type, sub), principal.model_copy(deep=True))
+
+
+def invalidate_principal(user_type: str, sub: Any) -> None:
+    """
+    Descartar un usuario de la caché
+
+    Args:
+        user_type: "user" o "student" (igual que en el token)
+        sub: ID del usuario (ObjectId o str)
+    """
+    _cache.delete((user_type, str(sub)))
+
+
+def principal_cache_stats() -> dict:
+    """Métricas de la caché (ver TTLCache.stats)"""
+    return _cache.stats()
@@ -0,0 +1,163 @@
+"""
+Límite de Intentos (Rate Limiting)
+==================================
+
+Protege los endpoints de login: verificar una contraseña (bcrypt) es caro a
+propósito, así que una ráfaga de intentos (credential stuffing) puede
+saturar la CPU de todos los workers.
+
+¿Cómo funciona?
+---------------
+Token buckets: cada clave tiene una "cubeta" de `capacity` fichas que se
+rellena a `refill_per_second`. Cada intento gasta una ficha; sin fichas se
+responde 429 con `Retry-After`, antes de llegar a bcrypt.
+
+`throttle_login` usa dos cubetas por intento:
+- Por IP (LOGIN_IP_*): frena ráfagas contra muchos usuarios desde un origen.
+  Más generosa: un curso entero puede entrar desde la misma red.
+- Por usuario (LOGIN_USERNAME_*): frena ataques a una cuenta desde muchas IPs.
+
+La IP es `request.client.host`. Detrás de un proxy, uvicorn debe correr con
+`--proxy-headers` (y `--forwarded-allow-ips`) para que sea la del cliente.
+
+Backends:
+---------
+`RateLimitBackend` es la interfaz. Por defecto se usa `InMemoryRateLimiter`
+(por proceso, con tamaño máximo y desalojo LRU); un backend compartido
+(ej: Redis) puede reemplazarlo con `set_rate_limiter(...)`.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from core.config import settings
+
+
+class RateLimitBackend(ABC):
+    """Interfaz de almacenamiento de token buckets"""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        """
+        Gastar una ficha de la cubeta `key`
+
+        Returns:
+            0 si se permitió; si no, segundos hasta que haya una ficha
+        """
+
+
+class InMemoryRateLimiter(RateLimitBackend):
+    """
+    Token buckets en memoria del proceso
+
+    Acotado a `maxsize` claves: al llenarse se desaloja la menos usada
+    (equivale a darle la cubeta llena si vuelve). No es compartido entre
+    workers: el límite efectivo es por worker.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_per_second)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / refill_per_second
+
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+_limiter: Optional[RateLimitBackend] = None
+
+
+def get_rate_limiter() -> RateLimitBackend:
+    """Backend configurado, creado una sola vez"""
+    global _limiter
+    if _limiter is None:
+        _limiter = InMemoryRateLimiter(maxsize=settings.RATE_LIMIT_MAX_KEYS)
+    return _limiter
+
+
+def set_rate_limiter(backend: RateLimitBackend) -> None:
+    """Reemplazar el backend (ej: uno compartido entre workers)"""
+    global _limiter
+    _limiter = backend
+
+
+# ============================================================================
+# LOGIN
+# ============================================================================
+
+_counters: Dict[str, int] = {
+    "allowed": 0,
+    "throttled_ip": 0,
+    "throttled_username": 0,
+}
+
+
+def login_throttle_stats() -> Dict[str, int]:
+    """Intentos de login permitidos y frenados (por IP / por usuario)"""
+    return dict(_counters)
+
+
+def _too_many(retry_after: float) -> HTTPException:
+    seconds = max(1, int(retry_after + 0.999))
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Demasiados intentos de inicio de sesión. Intenta nuevamente en {seconds} segundos",
+        headers={"Retry-After": str(seconds)},
+    )
+
+
+async def throttle_login(request: Request, user_type: str, username: str) -> None:
+    """
+    Gastar un intento de login (por IP y por usuario)
+
+    Llamar antes de buscar al usuario y verificar la contraseña.
+
+    Args:
+        request: Petición (para la IP del cliente)
+        user_type: "user" o "student" (cubetas separadas por endpoint)
+        username: Usuario o registro que se intenta
+
+    Raises:
+        HTTPException 429: Si se superó el límite (con header Retry-After)
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+
+    limiter = get_rate_limiter()
+    ip = request.client.host if request.client else "desconocida"
+
+    retry_after = await limiter.take(
+        f"login:ip:{ip}",
+        settings.LOGIN_IP_BURST,
+        settings.LOGIN_IP_PER_MINUTE / 60
+    )
+    if retry_after:
+        _counters["throttled_ip"] += 1
+        raise _too_many(retry_after)
+
+    retry_after = await limiter.take(
+        f"login:{user_type}:{username.strip().lower()}",
+        settings.LOGIN_USERNAME_BURST,
+        settings.LOGIN_USERNAME_PER_MINUTE / 60
+    )
+    if retry_after:
+        _counters["throttled_username"] += 1
+        raise _too_many(retry_after)
+
+    _counters["allowed"] += 1
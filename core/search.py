@@ -0,0 +1,130 @@
+"""
+Búsqueda Indexada
+=================
+
+Búsqueda por texto (`q`) de los listados usando un campo de tokens indexado.
+
+¿Cómo funciona?
+---------------
+Cada documento buscable guarda `search_tokens`: los prefijos de cada palabra
+de sus campos de búsqueda, normalizados (minúsculas y sin acentos).
+
+    "José Pérez"  →  ["j", "jo", "jos", "jose", "p", "pe", "per", "pere", "perez"]
+
+El campo se recalcula al escribir el documento (eventos de Beanie en el
+modelo) y tiene un índice multikey, así la consulta
+
+    {"search_tokens": {"$all": ["jose", "pe"]}}
+
+se resuelve por índice y su costo no crece con el tamaño de la colección.
+Los documentos anteriores a este campo se completan al iniciar la aplicación
+(`backfill_search_tokens`, llamado desde `init_db`).
+
+Semántica:
+----------
+- Cada palabra de `q` debe ser prefijo de alguna palabra del documento
+  ("jos per" encuentra "José Pérez"; "erez" no).
+- No distingue mayúsculas ni acentos.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+# Largo máximo de prefijo indexado (palabras de búsqueda más largas se recortan)
+MAX_PREFIX_LENGTH = 15
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos ("Pérez" → "perez")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _words(text: str) -> List[str]:
+    """Palabras alfanuméricas normalizadas de un texto"""
+    return _WORD_RE.findall(normalize(text))
+
+
+def build_search_tokens(*values: Optional[str]) -> List[str]:
+    """
+    Calcular los tokens de búsqueda de un documento
+
+    Args:
+        values: Valores de los campos buscables (None se ignora)
+
+    Returns:
+        Lista ordenada y sin repetidos de prefijos normalizados
+    """
+    tokens = set()
+    for value in values:
+        if not value:
+            continue
+        for word in _words(str(value)):
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                tokens.add(word[:length])
+    return sorted(tokens)
+
+
+def search_terms(q: str) -> List[str]:
+    """Términos de búsqueda de `q`, recortados al largo indexado"""
+    return [word[:MAX_PREFIX_LENGTH] for word in _words(q)]
+
+
+def search_filter(q: Optional[str]) -> Optional[dict]:
+    """
+    Filtro de MongoDB para una búsqueda por texto
+
+    Args:
+        q: Texto de búsqueda del usuario
+
+    Returns:
+        Filtro sobre `search_tokens`, o None si `q` no tiene términos
+    """
+    terms = search_terms(q or "")
+    if not terms:
+        return None
+    return {"search_tokens": {"$all": terms}}
+
+
+
+async def backfill_search_tokens(document_model, batch_size: int = 500) -> int:
+    """
+    Calcular `search_tokens` de documentos guardados antes de la búsqueda indexada
+
+    Los documentos nuevos o modificados ya se indexan solos al guardarse.
+    Esto solo recorre los que no tienen el campo y los actualiza por lotes.
+
+    Args:
+        document_model: Modelo Beanie con `actualizar_search_tokens`
+        batch_size: Documentos por bulk_write
+
+    Returns:
+        Cantidad de documentos actualizados
+    """
+    from pymongo import UpdateOne
+
+    collection = document_model.get_motor_collection()
+    operaciones = []
+    total = 0
+
+    async for documento in document_model.find({"search_tokens": {"$exists": False}}):
+        documento.actualizar_search_tokens()
+        operaciones.append(UpdateOne(
+            {"_id": documento.id},
+            {"$set": {"search_tokens": documento.search_tokens}}
+        ))
+        if len(operaciones) >= batch_size:
+            await collection.bulk_write(operaciones, ordered=False)
+            total += len(operaciones)
+            operaciones = []
+
+    if operaciones:
+        await collection.bulk_write(operaciones, ordered=False)
+        total += len(operaciones)
+
+    if total:
+        print(f"[OK] Tokens de búsqueda calculados en {document_model.Settings.name}: {total}")
+    return total
@@ -3,15 +3,77 @@ Módulo de Seguridad
 ===================
 
 Funciones para autenticación y manejo de contraseñas.
+
+bcrypt es lento a propósito (~200-300 ms por operación con el costo por
+defecto) y bloquea el hilo que lo ejecuta. En los endpoints usar siempre las
+versiones async (`verify_password_async`, `get_password_hash_async`), que
+corren en un pool de hilos dedicado y acotado (BCRYPT_MAX_WORKERS): un
+login masivo no congela el event loop ni acapara el threadpool de Starlette.
+
+El tiempo de cada operación se acumula en `password_hashing_stats()`.
+
+El costo se configura con BCRYPT_ROUNDS. Los hashes con otro costo se
+actualizan solos en el siguiente login exitoso (`password_needs_rehash`),
+sin forzar un cambio de contraseña.
 """
 
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import partial
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 import bcrypt
 from core.config import settings
 
 
+# ============================================================================
+# CONTRASEÑAS
+# ============================================================================
+
+# Pool de hilos dedicado (bcrypt libera el GIL mientras calcula)
+_bcrypt_executor = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_MAX_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+
+
+class _HashingMetrics:
+    """Cantidad y duración de las operaciones de bcrypt, por tipo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    def record(self, op: str, seconds: float) -> None:
+        with self._lock:
+            m = self._ops.setdefault(op, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            m["count"] += 1
+            m["total_seconds"] += seconds
+            m["max_seconds"] = max(m["max_seconds"], seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                op: {
+                    "count": int(m["count"]),
+                    "avg_ms": round(m["total_seconds"] / m["count"] * 1000, 1),
+                    "max_ms": round(m["max_seconds"] * 1000, 1),
+                }
+                for op, m in self._ops.items()
+            }
+
+
+_metrics = _HashingMetrics()
+
+
+def password_hashing_stats() -> Dict[str, Any]:
+    """Métricas de bcrypt: {"hash"|"verify": {count, avg_ms, max_ms}} y costo actual"""
+    return {"rounds": settings.BCRYPT_ROUNDS, **_metrics.stats()}
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verificar si una contraseña coincide con su hash
@@ -25,12 +87,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    start = time.perf_counter()
+    try:
+        return bcrypt.checkpw(password_bytes, hashed_bytes)
+    finally:
+        _metrics.record("verify", time.perf_counter() - start)
 
 
 def get_password_hash(password: str) -> str:
     """
-    Hashear una contraseña usando bcrypt
+    Hashear una contraseña usando bcrypt (costo BCRYPT_ROUNDS)
     
     Args:
         password: Contraseña en texto plano
@@ -39,11 +105,57 @@ def get_password_hash(password: str) -> str:
         Contraseña hasheada
     """
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    start = time.perf_counter()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
+    _metrics.record("hash", time.perf_counter() - start)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Verificar si un hash bcrypt usa un costo distinto a BCRYPT_ROUNDS
+    
+    Formato bcrypt: $2b$<costo>$<salt+hash>
+    
+    Returns:
+        True si hay que volver a hashear la contraseña (tras verificarla)
+    """
+    try:
+        cost = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return False
+    return cost != settings.BCRYPT_ROUNDS
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` en el pool de bcrypt (no bloquea el event loop)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _bcrypt_executor,
+        partial(verify_password, plain_password, hashed_password)
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """`get_password_hash` en el pool de bcrypt (no bloquea el event loop)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _bcrypt_executor,
+        partial(get_password_hash, password)
+    )
+
+
+def shutdown_password_executor() -> None:
+    """Liberar el pool de bcrypt (al apagar la aplicación)"""
+    _bcrypt_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================================
+# TOKENS
+# ============================================================================
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Crear un token JWT
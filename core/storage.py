@@ -0,0 +1,602 @@
+"""
+Almacenamiento de Archivos
+==========================
+
+Interfaz asíncrona de almacenamiento (comprobantes, requisitos, fotos, QR)
+con backends intercambiables, elegidos por `STORAGE_BACKEND`:
+
+- "cloudinary" (por defecto): CDN de Cloudinary (core/cloudinary_utils.py)
+- "local": disco local, servido por una ruta estática (LOCAL_STORAGE_URL).
+  Útil para pruebas de carga sin red y para instalaciones on-premise.
+
+Uso:
+----
+from core.storage import upload_image, upload_pdf, upload_document
+
+url = await upload_document(file, folder="payments/<id>", public_id="voucher_1")
+
+Las funciones `upload_*` validan el archivo por su contenido (tipo real y
+tamaño, ver core/uploads.py), reducen y convierten las imágenes a WebP
+(core/images.py) y delegan en `get_storage().put(...)`. Los archivos se identifican con una clave
+"carpeta/public_id", igual en todos los backends.
+
+`store_upload` además retorna el SHA-256 del contenido, opcionalmente guarda
+una vista previa WebP (`with_preview`, clave "<clave>_preview") y, si se le
+pasa `find_existing`, reutiliza un archivo idéntico ya guardado.
+
+Subida directa (comprobantes): `create_upload_intent` entrega parámetros
+firmados para que el cliente suba sin pasar por la API, y
+`verify_direct_upload` valida la URL resultante (firma, tipo, tamaño y MD5
+leídos del almacenamiento). Solo Cloudinary la soporta. Estos archivos no
+pasan por core/images.py: se guardan sin reducir y con sus metadatos.
+"""
+
+import asyncio
+import glob
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile
+from core.config import settings
+from core.images import ProcessedImage, make_preview_async, process_image_async
+from core.uploads import CHUNK_SIZE, IMAGE_TYPES, PDF_TYPE, check_max_size, ingest_upload
+
+# Comprobantes y requisitos: imagen o PDF
+DOCUMENT_TYPES = IMAGE_TYPES + [PDF_TYPE]
+
+# Tipos de recurso (mismos nombres que Cloudinary)
+KIND_IMAGE = "image"
+KIND_RAW = "raw"
+
+_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    PDF_TYPE: ".pdf",
+}
+
+# Formato reportado por el almacenamiento -> MIME type
+_CONTENT_TYPES = {
+    **{ext.lstrip("."): content_type for content_type, ext in _EXTENSIONS.items()},
+    "jpeg": "image/jpeg",
+}
+
+
+class StorageBackend(ABC):
+    """
+    Interfaz de almacenamiento
+
+    Todas las operaciones son asíncronas; las implementaciones bloqueantes
+    deben correr fuera del event loop.
+    """
+
+    @abstractmethod
+    async def put(
+        self,
+        fileobj: BinaryIO,
+        key: str,
+        *,
+        kind: str,
+        content_type: str,
+        size: Optional[int] = None
+    ) -> str:
+        """Guardar un archivo (reemplaza si existe). Retorna su URL pública"""
+
+    @abstractmethod
+    async def get(self, key: str, *, kind: str) -> bytes:
+        """Leer el contenido de un archivo"""
+
+    @abstractmethod
+    async def delete(self, key: str, *, kind: str) -> bool:
+        """Eliminar un archivo. Retorna False si no existía o falló"""
+
+    @abstractmethod
+    async def signed_url(self, key: str, *, kind: str, expires_in: int = 3600) -> str:
+        """URL de descarga firmada que expira en `expires_in` segundos"""
+
+    # Subida directa del cliente al backend (sin pasar por la API)
+    supports_direct_upload: bool = False
+
+    def direct_upload_params(self, key: str, allowed_types: List[str]) -> Optional[Dict[str, Any]]:
+        """Parámetros firmados para que el cliente suba directo (None si no se soporta)"""
+        return None
+
+    def verify_direct_upload(self, url: str, signature: str) -> Optional[str]:
+        """Clave del archivo si la URL de una subida directa es auténtica, None si no"""
+        return None
+
+    async def direct_upload_info(self, url: str) -> Optional["DirectUploadInfo"]:
+        """Tipo, tamaño y MD5 reales de un archivo subido directamente (None si no se soporta)"""
+        return None
+
+    def derived_preview_url(self, key: str) -> Optional[str]:
+        """URL de una vista previa generada por el propio backend (None si no puede)"""
+        return None
+
+
+class CloudinaryStorage(StorageBackend):
+    """Backend Cloudinary (SDK en pool de hilos acotado, ver cloudinary_utils)"""
+
+    supports_direct_upload = True
+
+    async def put(
+        self,
+        fileobj: BinaryIO,
+        key: str,
+        *,
+        kind: str,
+        content_type: str,
+        size: Optional[int] = None
+    ) -> str:
+        from core import cloudinary_utils
+        return await cloudinary_utils.upload(fileobj, key, kind, size=size)
+
+    async def get(self, key: str, *, kind: str) -> bytes:
+        from core import cloudinary_utils
+        return await cloudinary_utils.download(key, kind)
+
+    async def delete(self, key: str, *, kind: str) -> bool:
+        from core import cloudinary_utils
+        return await cloudinary_utils.destroy(key, kind)
+
+    async def signed_url(self, key: str, *, kind: str, expires_in: int = 3600) -> str:
+        from core import cloudinary_utils
+        return cloudinary_utils.signed_url(key, kind, expires_in)
+
+    def direct_upload_params(self, key: str, allowed_types: List[str]) -> Dict[str, Any]:
+        from core import cloudinary_utils
+        formats = [_EXTENSIONS[t].lstrip(".") for t in allowed_types]
+        return cloudinary_utils.direct_upload_params(key, formats)
+
+    def verify_direct_upload(self, url: str, signature: str) -> Optional[str]:
+        from core import cloudinary_utils
+        return cloudinary_utils.verify_direct_upload(url, signature)
+
+    async def direct_upload_info(self, url: str) -> Optional["DirectUploadInfo"]:
+        from core import cloudinary_utils
+        info = await cloudinary_utils.resource_info(url)
+        if info is None:
+            return None
+        return DirectUploadInfo(
+            kind=info["resource_type"],
+            content_type=_CONTENT_TYPES.get((info["format"] or "").lower()),
+            size=info["bytes"],
+            md5=info["etag"]
+        )
+
+    def derived_preview_url(self, key: str) -> Optional[str]:
+        from core import cloudinary_utils
+        return cloudinary_utils.preview_url(key)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Backend de disco local
+
+    Los archivos se guardan en LOCAL_STORAGE_DIR/<clave><extensión> y se
+    sirven en LOCAL_STORAGE_URL (StaticFiles montado en main.py). Las
+    operaciones de disco corren en el threadpool de Starlette.
+
+    Los archivos servidos son públicos (como los de Cloudinary tipo
+    "upload"), así que `signed_url` retorna la URL pública.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Clave de archivo inválida: {key}")
+        return path
+
+    def _find(self, key: str) -> Optional[str]:
+        """Archivo guardado para una clave (la extensión depende del tipo)"""
+        matches = [
+            path for path in glob.glob(glob.escape(self._path(key)) + ".*")
+            if not path.endswith(".tmp")
+        ]
+        return matches[0] if matches else None
+
+    def _url(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+        return f"{self.base_url}/{relative}"
+
+    async def put(
+        self,
+        fileobj: BinaryIO,
+        key: str,
+        *,
+        kind: str,
+        content_type: str,
+        size: Optional[int] = None
+    ) -> str:
+        from starlette.concurrency import run_in_threadpool
+
+        path = self._path(key) + _EXTENSIONS.get(content_type, "")
+
+        def _write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Reemplazar versiones anteriores con otra extensión (ej: .png → .pdf)
+            for old in glob.glob(glob.escape(self._path(key)) + ".*"):
+                if old != path:
+                    os.remove(old)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as out:
+                shutil.copyfileobj(fileobj, out, CHUNK_SIZE)  # Copia por bloques
+            os.replace(tmp_path, path)
+
+        await run_in_threadpool(_write)
+        return self._url(path)
+
+    async def get(self, key: str, *, kind: str) -> bytes:
+        from starlette.concurrency import run_in_threadpool
+
+        path = self._find(key)
+        if not path:
+            raise FileNotFoundError(key)
+
+        def _read() -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+
+        return await run_in_threadpool(_read)
+
+    async def delete(self, key: str, *, kind: str) -> bool:
+        from starlette.concurrency import run_in_threadpool
+
+        path = self._find(key)
+        if not path:
+            return False
+        await run_in_threadpool(os.remove, path)
+        return True
+
+    async def signed_url(self, key: str, *, kind: str, expires_in: int = 3600) -> str:
+        path = self._find(key)
+        if not path:
+            raise FileNotFoundError(key)
+        return self._url(path)
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Backend configurado (STORAGE_BACKEND), creado una sola vez"""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "local":
+            _storage = LocalStorage(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_URL)
+        elif settings.STORAGE_BACKEND == "cloudinary":
+            _storage = CloudinaryStorage()
+        else:
+            raise ValueError(f"STORAGE_BACKEND desconocido: {settings.STORAGE_BACKEND}")
+    return _storage
+
+
+# ============================================================================
+# SUBIDAS VALIDADAS
+# ============================================================================
+
+@dataclass
+class StoredFile:
+    """Archivo ya guardado (URL y vista previa, si tiene)"""
+    url: str
+    preview_url: Optional[str] = None
+
+
+@dataclass
+class StoredUpload:
+    """Resultado de guardar un archivo subido"""
+    url: str
+    sha256: Optional[str]  # Hash del archivo original (None en subidas directas)
+    content_type: str  # Tipo guardado (las imágenes se guardan en WebP)
+    size: int  # Tamaño guardado
+    preview_url: Optional[str] = None
+    reused: bool = False  # True si se reutilizó un archivo idéntico ya guardado
+    md5: Optional[str] = None  # MD5 del archivo original (etag en Cloudinary)
+
+
+@dataclass
+class DirectUploadInfo:
+    """Datos de un archivo subido directamente, leídos del almacenamiento"""
+    kind: str
+    content_type: Optional[str]  # None si el formato no es uno permitido
+    size: int
+    md5: Optional[str]
+
+
+async def _put_preview(preview: Optional[ProcessedImage], key: str) -> Optional[str]:
+    """
+    Guardar la vista previa de un archivo
+
+    Una vista previa fallida no hace fallar la subida: se registra y se
+    retorna None (el cliente muestra el archivo completo).
+    """
+    if preview is None:
+        return None
+    try:
+        return await get_storage().put(
+            preview.file,
+            f"{key}_preview",
+            kind=KIND_IMAGE,
+            content_type=preview.content_type,
+            size=preview.size
+        )
+    except Exception as e:
+        print(f"[WARN] No se pudo guardar la vista previa de {key}: {e}")
+        return None
+
+
+async def store_upload(
+    file: UploadFile,
+    folder: str,
+    public_id: Optional[str],
+    allowed_types: List[str],
+    find_existing: Optional[Callable[[str], Awaitable[Optional[StoredFile]]]] = None,
+    with_preview: bool = False
+) -> StoredUpload:
+    """
+    Validar por contenido (core/uploads.py) y guardar en el backend
+
+    Args:
+        file: Archivo recibido
+        folder: Carpeta de destino
+        public_id: Nombre del archivo sin extensión (None: nombre único)
+        allowed_types: MIME types aceptados
+        find_existing: Búsqueda por SHA-256 de una URL ya guardada con el
+            mismo contenido. Si encuentra una, se reutiliza y no se sube.
+            Con deduplicación la clave lleva el prefijo del hash, así una
+            subida posterior con otro contenido nunca reemplaza un archivo
+            cuya URL se comparte.
+        with_preview: Guardar también una vista previa WebP pequeña
+            (primera página en los PDFs)
+
+    Raises:
+        HTTPException: Si el archivo no es válido o hay error al subir
+    """
+    upload = await ingest_upload(file, allowed_types)
+
+    if find_existing:
+        existing = await find_existing(upload.sha256)
+        if existing:
+            return StoredUpload(
+                url=existing.url,
+                sha256=upload.sha256,
+                content_type=upload.content_type,
+                size=upload.size,
+                preview_url=existing.preview_url,
+                reused=True,
+                md5=upload.md5
+            )
+
+    kind = KIND_RAW if upload.content_type == PDF_TYPE else KIND_IMAGE
+    fileobj, content_type, size = upload.file, upload.content_type, upload.size
+    if kind == KIND_IMAGE:
+        # Reducir, quitar EXIF y pasar a WebP antes de guardar
+        processed = await process_image_async(upload.file)
+        fileobj, content_type, size = processed.file, processed.content_type, processed.size
+
+    # Sin public_id: nombre único (dos archivos con el mismo nombre no se pisan)
+    key = f"{folder}/{public_id or uuid.uuid4().hex}"
+    if find_existing:
+        key = f"{key}_{upload.sha256[:16]}"
+    # La vista previa se genera antes (lee el mismo archivo); luego se suben
+    # ambos en paralelo
+    preview = None
+    if with_preview:
+        try:
+            preview = await make_preview_async(fileobj, content_type)
+        except ValueError as e:
+            print(f"[WARN] {key}: {e}")
+
+    error = "subir archivo" if kind == KIND_RAW else "subir imagen"
+    try:
+        url, preview_url = await asyncio.gather(
+            get_storage().put(
+                fileobj,
+                key,
+                kind=kind,
+                content_type=content_type,
+                size=size
+            ),
+            _put_preview(preview, key)
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tiempo de espera agotado al {error}, intenta nuevamente"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al {error}: {str(e)}"
+        )
+
+    return StoredUpload(
+        url=url,
+        sha256=upload.sha256,
+        content_type=content_type,
+        size=size,
+        preview_url=preview_url,
+        md5=upload.md5
+    )
+
+
+async def upload_pdf(
+    file: UploadFile,
+    folder: str,
+    public_id: Optional[str] = None
+) -> str:
+    """
+    Subir un archivo PDF (máx 10MB)
+
+    Args:
+        file: Archivo a subir
+        folder: Carpeta (ej: "students/cv")
+        public_id: Nombre del archivo sin extensión
+
+    Returns:
+        URL del archivo subido
+
+    Raises:
+        HTTPException: Si el contenido no es PDF, es muy grande o hay error al subir
+    """
+    stored = await store_upload(file, folder, public_id, [PDF_TYPE])
+    return stored.url
+
+
+async def upload_image(
+    file: UploadFile,
+    folder: str,
+    public_id: Optional[str] = None
+) -> str:
+    """
+    Subir una imagen JPG, PNG o WEBP (máx 5MB), guardada en WebP de máx 800x800
+
+    Args:
+        file: Archivo a subir
+        folder: Carpeta (ej: "students/photos")
+        public_id: Nombre del archivo sin extensión
+
+    Returns:
+        URL de la imagen subida
+
+    Raises:
+        HTTPException: Si el contenido no es imagen, es muy grande o hay error al subir
+    """
+    stored = await store_upload(file, folder, public_id, IMAGE_TYPES)
+    return stored.url
+
+
+async def upload_document(
+    file: UploadFile,
+    folder: str,
+    public_id: Optional[str] = None
+) -> str:
+    """
+    Subir un comprobante/documento: imagen (JPG, PNG, WEBP) o PDF
+
+    El tipo se detecta por el contenido del archivo, no por `content_type`.
+
+    Raises:
+        HTTPException: Si el formato no está permitido o hay error al subir
+    """
+    stored = await store_upload(file, folder, public_id, DOCUMENT_TYPES)
+    return stored.url
+
+
+# ============================================================================
+# SUBIDA DIRECTA
+# ============================================================================
+
+_DIRECT_UPLOAD_UNSUPPORTED = "El almacenamiento configurado no soporta subidas directas"
+
+def create_upload_intent(folder: str, prefix: str = "archivo") -> Dict[str, Any]:
+    """
+    Parámetros firmados para una subida directa a `folder`
+
+    Cada intención usa un nombre de archivo nuevo, así que una subida nunca
+    reemplaza un archivo ya registrado.
+
+    Returns:
+        {"upload_url", "fields", "expires_in"}: el cliente hace un POST
+        multipart a `upload_url` con `fields` + `file`
+
+    Raises:
+        HTTPException 501: Si el backend no soporta subidas directas
+    """
+    from core.cloudinary_utils import DIRECT_UPLOAD_EXPIRES_IN
+
+    storage = get_storage()
+    if not storage.supports_direct_upload:
+        raise HTTPException(status_code=501, detail=_DIRECT_UPLOAD_UNSUPPORTED)
+
+    key = f"{folder}/{prefix}_{uuid.uuid4().hex}"
+    params = storage.direct_upload_params(key, DOCUMENT_TYPES)
+    return {**params, "expires_in": DIRECT_UPLOAD_EXPIRES_IN}
+
+
+async def verify_direct_upload(url: str, signature: str, folder: str) -> StoredUpload:
+    """
+    Validar la URL de una subida directa
+
+    Además de la firma, lee del almacenamiento el tipo, el tamaño y el MD5
+    reales del archivo y aplica los mismos límites que `ingest_upload`
+    (5MB imágenes, 10MB PDF). Un archivo que no los cumple se elimina.
+
+    Las imágenes subidas así se guardan tal cual: no se reducen ni se les
+    quitan los metadatos EXIF (core/images.py solo procesa lo que pasa por
+    la API).
+
+    Args:
+        url: URL que devolvió el almacenamiento (`secure_url`)
+        signature: Firma de la respuesta del almacenamiento
+        folder: Carpeta donde debe estar el archivo (ej: "payments/<id>")
+
+    Returns:
+        StoredUpload con la misma URL, ya verificada, su MD5 (sin SHA-256)
+        y su vista previa si el backend la puede generar
+
+    Raises:
+        HTTPException 400: Si la firma no es válida, el archivo está fuera de
+            `folder`, o su tipo o tamaño no están permitidos
+        HTTPException 501: Si el backend no soporta subidas directas
+        HTTPException 502: Si no se pudo consultar el archivo
+    """
+    storage = get_storage()
+    if not storage.supports_direct_upload:
+        raise HTTPException(status_code=501, detail=_DIRECT_UPLOAD_UNSUPPORTED)
+
+    key = storage.verify_direct_upload(url, signature)
+    if not key or not key.startswith(folder.rstrip("/") + "/"):
+        raise HTTPException(status_code=400, detail="Comprobante inválido: la firma de la subida no es válida")
+
+    try:
+        info = await storage.direct_upload_info(url)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"No se pudo verificar el comprobante: {str(e)}")
+    if info is None:
+        raise HTTPException(status_code=502, detail="No se pudo verificar el comprobante")
+
+    try:
+        if info.content_type not in DOCUMENT_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail="Formato no permitido: el comprobante debe ser JPG, PNG, WEBP o PDF"
+            )
+        check_max_size(info.content_type, info.size)
+    except HTTPException:
+        await delete_file(key, kind=info.kind)
+        raise
+
+    return StoredUpload(
+        url=url,
+        sha256=None,
+        content_type=info.content_type,
+        size=info.size,
+        preview_url=storage.derived_preview_url(key),
+        md5=info.md5
+    )
+
+
+async def delete_file(key: str, kind: str = KIND_RAW) -> bool:
+    """
+    Eliminar un archivo
+
+    Args:
+        key: Clave "carpeta/public_id"
+        kind: "raw" para PDFs, "image" para imágenes
+
+    Returns:
+        True si se eliminó correctamente
+    """
+    try:
+        return await get_storage().delete(key, kind=kind)
+    except Exception:
+        return False
@@ -0,0 +1,202 @@
+"""
+Ingesta de Archivos Subidos
+===========================
+
+Validación de subidas sin confiar en lo que declara el cliente.
+
+¿Cómo funciona?
+---------------
+1. `UploadSizeLimitMiddleware` (main.py) revisa el `Content-Length` de las
+   peticiones multipart y responde 413 antes de leer el cuerpo si supera
+   MAX_UPLOAD_BODY_SIZE. Si no viene (chunked) o miente, cuenta los bytes a
+   medida que llegan y corta la petición en cuanto se pasa del límite.
+2. `ingest_upload` detecta el tipo real del archivo por sus primeros bytes
+   (magic bytes), no por `content_type`, y aplica el tamaño máximo de ese
+   tipo contando bytes mientras lee.
+3. En la misma lectura calcula el SHA-256 del contenido (por bloques), que
+   se usa para deduplicar comprobantes y requisitos, y el MD5 (el mismo hash
+   que reporta Cloudinary como `etag`, para comparar con subidas directas).
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Tipos detectables y su tamaño máximo
+IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp"]
+PDF_TYPE = "application/pdf"
+MAX_SIZES = {
+    "image/jpeg": 5 * 1024 * 1024,  # 5MB
+    "image/png": 5 * 1024 * 1024,
+    "image/webp": 5 * 1024 * 1024,
+    PDF_TYPE: 10 * 1024 * 1024,  # 10MB
+}
+
+CHUNK_SIZE = 64 * 1024  # 64KB
+SNIFF_SIZE = 16  # Bytes necesarios para reconocer el tipo
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """
+    Detectar el tipo de archivo por sus magic bytes
+
+    Returns:
+        MIME type detectado, o None si no es un tipo permitido
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return PDF_TYPE
+    return None
+
+
+@dataclass
+class IngestedUpload:
+    """Archivo validado, listo para enviarse al almacenamiento"""
+    file: BinaryIO  # Posicionado al inicio
+    content_type: str  # Detectado por magic bytes
+    size: int
+    sha256: str  # Hash hexadecimal del contenido
+    md5: str  # MD5 hexadecimal del contenido (comparable con el etag de Cloudinary)
+
+
+def _too_large(content_type: str) -> HTTPException:
+    max_mb = MAX_SIZES[content_type] // (1024 * 1024)
+    tipo = "El archivo" if content_type == PDF_TYPE else "La imagen"
+    return HTTPException(
+        status_code=400,
+        detail=f"{tipo} es demasiado grande (máximo {max_mb}MB)"
+    )
+
+
+def check_max_size(content_type: str, size: int) -> None:
+    """
+    Aplicar el tamaño máximo de un tipo a un archivo ya guardado
+    (ej: subidas directas, que no pasan por `ingest_upload`)
+
+    Raises:
+        HTTPException 400: Si `size` supera el máximo de `content_type`
+    """
+    if size > MAX_SIZES[content_type]:
+        raise _too_large(content_type)
+
+
+async def ingest_upload(file: UploadFile, allowed_types: Iterable[str]) -> IngestedUpload:
+    """
+    Validar un archivo subido por su contenido real
+
+    Args:
+        file: Archivo recibido
+        allowed_types: MIME types aceptados (ej: IMAGE_TYPES + [PDF_TYPE])
+
+    Returns:
+        IngestedUpload con el tipo detectado, el tamaño y los hashes
+
+    Raises:
+        HTTPException 400: Si el contenido no es de un tipo permitido o
+            supera el tamaño máximo de su tipo
+    """
+    allowed_types = list(allowed_types)
+
+    await file.seek(0)
+    head = await file.read(SNIFF_SIZE)
+    content_type = sniff_content_type(head)
+    if content_type not in allowed_types:
+        permitidos = ", ".join(
+            "PDF" if t == PDF_TYPE else t.split("/")[1].upper() for t in allowed_types
+        )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato no permitido: el contenido del archivo no es {permitidos}"
+        )
+
+    max_size = MAX_SIZES[content_type]
+
+    # El parser multipart ya conoce el tamaño: rechazar sin leer el resto
+    if file.size is not None and file.size > max_size:
+        raise _too_large(content_type)
+
+    # Contar bytes y calcular el hash mientras se lee, cortando en cuanto
+    # se pasa del límite
+    digest = hashlib.sha256(head)
+    md5 = hashlib.md5(head, usedforsecurity=False)
+    size = len(head)
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise _too_large(content_type)
+        digest.update(chunk)
+        md5.update(chunk)
+
+    await file.seek(0)
+    return IngestedUpload(
+        file=file.file,
+        content_type=content_type,
+        size=size,
+        sha256=digest.hexdigest(),
+        md5=md5.hexdigest()
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Cortar cuerpos multipart demasiado grandes lo antes posible
+
+    - `Content-Length` mayor al límite: 413 sin leer el cuerpo.
+    - Sin `Content-Length` (o incorrecto): cuenta los bytes recibidos y
+      responde 413 en cuanto se supera el límite.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_type = headers.get(b"content-type", b"")
+        if not content_type.startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self.max_body_size:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # FastAPI deja pasar HTTPException al parsear el formulario
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Archivo demasiado grande (máximo {self.max_body_size // (1024 * 1024)}MB por petición)"
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        from fastapi.responses import JSONResponse
+
+        response = JSONResponse(status_code=413, content={"detail": self._detail()})
+        await response(scope, receive, send)
@@ -3,12 +3,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
 from core.database import init_db
 from api.api import api_router
+from core.uploads import UploadSizeLimitMiddleware
 
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Cortar subidas demasiado grandes antes de leer todo el cuerpo (core/uploads.py)
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=settings.MAX_UPLOAD_BODY_SIZE)
+
 # Set all CORS enabled origins
 if settings.DEBUG:
     app.add_middleware(
@@ -23,6 +27,32 @@ if settings.DEBUG:
 async def start_db():
     await init_db()
 
+
+@app.on_event("shutdown")
+async def stop_password_hashing():
+    from core.security import shutdown_password_executor
+    shutdown_password_executor()
+
+
+@app.on_event("shutdown")
+async def stop_storage():
+    if settings.STORAGE_BACKEND == "cloudinary":
+        from core.cloudinary_utils import shutdown_executor
+        shutdown_executor()
+
+# Archivos del almacenamiento local (STORAGE_BACKEND = "local")
+if settings.STORAGE_BACKEND == "local":
+    import os
+    from urllib.parse import urlparse
+    from fastapi.staticfiles import StaticFiles
+    
+    os.makedirs(settings.LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount(
+        urlparse(settings.LOCAL_STORAGE_URL).path.rstrip("/") or "/media",
+        StaticFiles(directory=settings.LOCAL_STORAGE_DIR),
+        name="media"
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to KyC Payment System API"}
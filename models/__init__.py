@@ -16,6 +16,8 @@ Estructura:
 - discount.py: Modelo de Descuento
 - title.py: Modelo de Título/Certificado
 - user.py: Modelo de Usuario
+- payment_rollup.py: Acumulados de pagos para el dashboard
+- refresh_token.py: Refresh tokens (sesiones de larga duración)
 """
 
 from .base import MongoBaseModel, PyObjectId
@@ -38,6 +40,8 @@ from .payment_config import PaymentConfig
 from .discount import Discount
 from .title import Title
 from .user import User
+from .payment_rollup import PaymentRollup
+from .refresh_token import RefreshToken
 from .requisito import Requisito, RequisitoTemplate  # Nuevo
 
 __all__ = [
@@ -65,6 +69,8 @@ __all__ = [
     "Discount",
     "Title",
     "User",
+    "PaymentRollup",
+    "RefreshToken",
     
     # Embedded Models
     "Requisito",          # Nuevo
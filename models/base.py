@@ -31,8 +31,20 @@ class MongoBaseModel(Document):
     class Student(MongoBaseModel):
         nombre: str
         
-        class Settings:
+        class Settings(MongoBaseModel.Settings):
             name = "students"  # Nombre de la colección
+
+    Settings debe heredar de MongoBaseModel.Settings: Beanie no hereda las
+    opciones de la clase base por sí solo (quedaría sin state management).
+
+    Guardar cambios:
+    ----------------
+    - `save_changes()`: envía solo los campos modificados (`$set`), no el
+      documento entero. Es la opción para actualizar documentos leídos.
+    - `save()`: reemplaza el documento completo (altas o upserts).
+    Ninguno sirve para listas grandes (`requisitos`, `inscritos`, ...): un
+    cambio en la lista reenvía la lista entera. Para esas usar operadores
+    puntuales (`AddToSet`, `Pull`, `Set` sobre "requisitos.{i}").
     """
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -42,6 +54,22 @@ class MongoBaseModel(Document):
         """Sobrescribe save para actualizar updated_at"""
         self.updated_at = datetime.utcnow()
         return await super().save(*args, **kwargs)
+
+    async def save_changes(self, *args, **kwargs):
+        """
+        Guardar solo los campos modificados desde la lectura (`$set`)
+
+        Actualiza updated_at únicamente si hubo cambios: sin cambios no se
+        escribe nada.
+
+        Returns:
+            El documento (actualizado o sin cambios)
+        """
+        if not self.is_changed:
+            return self
+        self.updated_at = datetime.utcnow()
+        await super().save_changes(*args, **kwargs)
+        return self
     
     class Settings:
         """
@@ -19,6 +19,8 @@ Colección MongoDB: courses
 from datetime import datetime
 from typing import Optional, List
 from pydantic import Field, validator
+from beanie import before_event, Insert, Replace, Save, SaveChanges
+from core.search import build_search_tokens
 from .base import MongoBaseModel, PyObjectId
 from .enums import TipoCurso, Modalidad
 from .requisito import RequisitoTemplate
@@ -218,6 +220,15 @@ class Course(MongoBaseModel):
         description="Lista de requisitos/documentos que debe presentar el estudiante al inscribirse"
     )
     
+    # ========================================================================
+    # BÚSQUEDA
+    # ========================================================================
+    
+    search_tokens: List[str] = Field(
+        default_factory=list,
+        description="Tokens de búsqueda (prefijos normalizados de nombre y código). Se calculan al guardar"
+    )
+    
     # ========================================================================
     # VALIDADORES
     # ========================================================================
@@ -254,7 +265,12 @@ class Course(MongoBaseModel):
         """Obtiene el costo de matrícula según el tipo de estudiante"""
         return self.matricula_interno if es_interno else self.matricula_externo
     
-    class Settings:
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def actualizar_search_tokens(self):
+        """Recalcula los tokens de búsqueda (ver core/search.py)"""
+        self.search_tokens = build_search_tokens(self.nombre_programa, self.codigo)
+    
+    class Settings(MongoBaseModel.Settings):
         name = "courses"
 
     class Config:
@@ -224,7 +224,7 @@ class Discount(MongoBaseModel):
         """
         return monto * (self.porcentaje / 100)
     
-    class Settings:
+    class Settings(MongoBaseModel.Settings):
         name = "discounts"
 
     class Config:
@@ -346,5 +346,5 @@ class Enrollment(MongoBaseModel):
             "porcentaje": round(porcentaje, 2)
         }
     
-    class Settings:
+    class Settings(MongoBaseModel.Settings):
         name = "enrollments"
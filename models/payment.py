@@ -7,8 +7,10 @@ Colección MongoDB: payments
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field
+from beanie import before_event, Insert, Replace, Save, SaveChanges
+from core.search import build_search_tokens
 from .base import MongoBaseModel, PyObjectId
 from .enums import EstadoPago
 
@@ -95,6 +97,26 @@ class Payment(MongoBaseModel):
         description="URL del comprobante/voucher de pago (PDF en Cloudinary)"
     )
     
+    comprobante_preview_url: Optional[str] = Field(
+        None,
+        description="URL de la vista previa del comprobante (WebP pequeña; primera página si es PDF)"
+    )
+    
+    comprobante_sha256: Optional[str] = Field(
+        None,
+        description="SHA-256 del contenido del comprobante (deduplicación)"
+    )
+    
+    comprobante_md5: Optional[str] = Field(
+        None,
+        description="MD5 del contenido del comprobante (único hash disponible en subidas directas)"
+    )
+    
+    posible_duplicado_de: Optional[PyObjectId] = Field(
+        None,
+        description="Pago anterior con el mismo comprobante (mismos bytes), para revisión del admin"
+    )
+    
     estado_pago: EstadoPago = Field(
         default=EstadoPago.PENDIENTE,
         description="Estado: PENDIENTE, APROBADO, RECHAZADO"
@@ -124,6 +146,15 @@ class Payment(MongoBaseModel):
         description="Razón del rechazo (si estado_pago = RECHAZADO)"
     )
     
+    # ========================================================================
+    # BÚSQUEDA
+    # ========================================================================
+    
+    search_tokens: List[str] = Field(
+        default_factory=list,
+        description="Tokens de búsqueda (prefijos normalizados de número de transacción y concepto). Se calculan al guardar"
+    )
+    
     # ========================================================================
     # MÉTODOS
     # ========================================================================
@@ -155,5 +186,10 @@ class Payment(MongoBaseModel):
         self.motivo_rechazo = motivo
         self.updated_at = datetime.utcnow()
     
-    class Settings:
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def actualizar_search_tokens(self):
+        """Recalcula los tokens de búsqueda (ver core/search.py)"""
+        self.search_tokens = build_search_tokens(self.numero_transaccion, self.concepto)
+    
+    class Settings(MongoBaseModel.Settings):
         name = "payments"
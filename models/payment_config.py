@@ -142,5 +142,5 @@ class PaymentConfig(MongoBaseModel):
         self.actualizado_por = admin_username
         self.updated_at = datetime.utcnow()
     
-    class Settings:
+    class Settings(MongoBaseModel.Settings):
         name = "payment_config"
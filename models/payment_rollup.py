@@ -0,0 +1,60 @@
+"""
+Modelo de Acumulado de Pagos (Rollup)
+=====================================
+
+Contadores y montos de pagos agrupados por día × curso × estado.
+Colección MongoDB: payment_rollups
+"""
+
+from datetime import datetime
+from pydantic import Field
+from .base import MongoBaseModel, PyObjectId
+from .enums import EstadoPago
+
+
+class PaymentRollup(MongoBaseModel):
+    """
+    Acumulado de pagos de un día, un curso y un estado
+
+    ¿Por qué existe?
+    ----------------
+    El dashboard (ingresos por curso y mes, pendientes de revisión) lee solo
+    estos acumulados en lugar de recorrer la colección `payments`.
+
+    ¿Cómo se mantiene?
+    ------------------
+    - Se actualiza con `$inc` al crear, aprobar o rechazar pagos
+      (services/dashboard_service.py).
+    - El día es el de `fecha_subida` en hora boliviana: al aprobar o rechazar,
+      el pago pasa del acumulado PENDIENTE al del nuevo estado del mismo día.
+    - Se puede reconstruir desde `payments`
+      (`python -m scripts.rebuild_payment_rollups`).
+    """
+
+    dia: datetime = Field(
+        ...,
+        description="Día (hora boliviana, 00:00) de subida de los pagos"
+    )
+
+    curso_id: PyObjectId = Field(
+        ...,
+        description="ID del curso"
+    )
+
+    estado_pago: EstadoPago = Field(
+        ...,
+        description="Estado de los pagos acumulados"
+    )
+
+    cantidad: int = Field(
+        default=0,
+        description="Cantidad de pagos en este día/curso/estado"
+    )
+
+    monto: float = Field(
+        default=0.0,
+        description="Suma de cantidad_pago (Bs)"
+    )
+
+    class Settings(MongoBaseModel.Settings):
+        name = "payment_rollups"
@@ -0,0 +1,63 @@
+"""
+Modelo de Refresh Token
+=======================
+
+Sesión de larga duración de un usuario o estudiante.
+Colección MongoDB: refresh_tokens
+"""
+
+from datetime import datetime
+from typing import Optional
+from pydantic import Field
+from .base import MongoBaseModel, PyObjectId
+
+
+class RefreshToken(MongoBaseModel):
+    """
+    Refresh token emitido en el login
+
+    ¿Cómo funciona?
+    ---------------
+    - El cliente recibe el token en claro una sola vez; aquí solo se guarda
+      su SHA-256 (`token_hash`), así una copia de la base de datos no sirve
+      para iniciar sesión.
+    - Es de un solo uso: cada POST /auth/refresh lo revoca y emite otro
+      (rotación). Si llega un token ya rotado, se asume robado y se revocan
+      todas las sesiones de ese usuario; uno revocado por logout solo se
+      rechaza (`revoked_reason`).
+    - MongoDB elimina los documentos vencidos con un índice TTL sobre
+      `expires_at` (ver core/indexes.py).
+    """
+
+    token_hash: str = Field(
+        ...,
+        description="SHA-256 (hex) del token entregado al cliente"
+    )
+
+    user_type: str = Field(
+        ...,
+        description="'user' o 'student' (igual que en el access token)"
+    )
+
+    sub: PyObjectId = Field(
+        ...,
+        description="ID del usuario o estudiante"
+    )
+
+    expires_at: datetime = Field(
+        ...,
+        description="Vencimiento (UTC). MongoDB borra el documento al vencer"
+    )
+
+    revoked_at: Optional[datetime] = Field(
+        None,
+        description="Cuándo se revocó (rotación, logout o cambio de contraseña)"
+    )
+
+    revoked_reason: Optional[str] = Field(
+        None,
+        description="Motivo: 'rotacion', 'logout' o 'revocacion' (todas las sesiones)"
+    )
+
+    class Settings(MongoBaseModel.Settings):
+        name = "refresh_tokens"
@@ -67,25 +67,44 @@ class Requisito(BaseModel):
         description="Fecha y hora cuando el estudiante subió el documento"
     )
     
+    preview_url: Optional[str] = Field(
+        None,
+        description="URL de la vista previa del documento (WebP pequeña; primera página si es PDF)"
+    )
+    
+    sha256: Optional[str] = Field(
+        None,
+        description="SHA-256 del contenido del documento (deduplicación)"
+    )
+    
     # ========================================================================
     # MÉTODOS HELPER
     # ========================================================================
     
-    def subir_documento(self, url: str) -> None:
+    def subir_documento(
+        self,
+        url: str,
+        sha256: Optional[str] = None,
+        preview_url: Optional[str] = None
+    ) -> None:
         """
         Marca que el estudiante subió el documento
         
         Args:
             url: URL del documento en Cloudinary
+            sha256: Hash del contenido del documento
+            preview_url: URL de la vista previa del documento
             
         Cambios:
         -------
-        - url → se asigna
+        - url, sha256, preview_url → se asignan
         - estado → pasa a EN_PROCESO
         - fecha_subida → timestamp actual
         - motivo_rechazo → se limpia (por si era un rechazo previo)
         """
         self.url = url
+        self.sha256 = sha256
+        self.preview_url = preview_url
         self.estado = EstadoRequisito.EN_PROCESO
         self.fecha_subida = datetime.utcnow()
         self.motivo_rechazo = None  # Limpiar rechazo anterior
@@ -18,6 +18,8 @@ Colección MongoDB: students
 from datetime import datetime
 from typing import Optional, List
 from pydantic import Field, EmailStr
+from beanie import before_event, Insert, Replace, Save, SaveChanges
+from core.search import build_search_tokens
 from .base import MongoBaseModel, PyObjectId
 from .enums import TipoEstudiante
 
@@ -97,10 +99,14 @@ class Student(MongoBaseModel):
     es_estudiante_interno: Optional[TipoEstudiante] = Field(None,description=("Tipo de estudiante: INTERNO (de la universidad) o EXTERNO (público general). "))
     activo: bool = Field(default=True,description="Si el estudiante puede acceder al sistema y realizar acciones")
     lista_cursos_ids: List[PyObjectId] = Field(default_factory=list,description="Lista de IDs de cursos en los que el estudiante está inscrito")
+    search_tokens: List[str] = Field(default_factory=list,description="Tokens de búsqueda (prefijos normalizados de nombre, email, carnet y registro). Se calculan al guardar")
 
-
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def actualizar_search_tokens(self):
+        """Recalcula los tokens de búsqueda (ver core/search.py)"""
+        self.search_tokens = build_search_tokens(self.nombre, self.email, self.carnet, self.registro)
     
-    class Settings:
+    class Settings(MongoBaseModel.Settings):
         name = "students"
 
     class Config:
@@ -28,7 +28,7 @@ class User(MongoBaseModel):
     activo: bool = Field(default=True, description="Si el usuario puede acceder al sistema")
     ultimo_acceso: Optional[datetime] = Field(None, description="Fecha del último login exitoso")
     
-    class Settings:
+    class Settings(MongoBaseModel.Settings):
         name = "users"
 
     class Config:
@@ -57,7 +57,14 @@ from .payment import (
     PaymentUpdate,
     PaymentWithDetails,
     PaymentApproval,
-    PaymentRejection
+    PaymentRejection,
+    PaymentBulkDecision,
+    PaymentBulkRequest,
+    PaymentBulkItemResult,
+    PaymentBulkResponse,
+    PaymentResumenRequest,
+    PaymentResumen,
+    PaymentUploadIntent
 )
 
 # Discount schemas
@@ -98,6 +105,13 @@ __all__ = [
     "PaymentWithDetails",
     "PaymentApproval",
     "PaymentRejection",
+    "PaymentBulkDecision",
+    "PaymentBulkRequest",
+    "PaymentBulkItemResult",
+    "PaymentBulkResponse",
+    "PaymentResumenRequest",
+    "PaymentResumen",
+    "PaymentUploadIntent",
     # Discount
     "DiscountCreate",
     "DiscountResponse",
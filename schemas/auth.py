@@ -34,11 +34,16 @@ class TokenResponse(BaseModel):
     user_type: str = Field(..., description="Tipo de usuario: 'user' o 'student'")
     user_id: str = Field(..., description="ID del usuario")
     role: str = Field(..., description="Rol del usuario")
+    refresh_token: Optional[str] = Field(
+        None,
+        description="Refresh token (un solo uso) para obtener un nuevo access token en POST /auth/refresh"
+    )
     
     model_config = {
         "json_schema_extra": {
             "example": {
                 "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                "refresh_token": "kY3v1x...",
                 "token_type": "bearer",
                 "user_type": "user",
                 "user_id": "507f1f77bcf86cd799439015",
@@ -48,6 +53,19 @@ class TokenResponse(BaseModel):
     }
 
 
+class RefreshRequest(BaseModel):
+    """Schema para renovar el access token o cerrar sesión"""
+    refresh_token: str = Field(..., description="Refresh token recibido en el login o en el último refresh")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "refresh_token": "kY3v1x..."
+            }
+        }
+    }
+
+
 class CurrentUserResponse(BaseModel):
     """Schema para información del usuario actual"""
     id: PyObjectId = Field(..., alias="_id")
@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Optional
 from pydantic import BaseModel, Field
 
 T = TypeVar("T")
@@ -11,6 +11,10 @@ class PaginationMeta(BaseModel):
     totalPages: int = Field(..., description="Total de páginas disponibles")
     hasNextPage: bool = Field(..., description="¿Hay página siguiente?")
     hasPrevPage: bool = Field(..., description="¿Hay página anterior?")
+    nextCursor: Optional[str] = Field(
+        None,
+        description="Cursor opaco para pedir la página siguiente (`cursor=...`), null si no hay más"
+    )
 
 class PaginatedResponse(BaseModel, Generic[T]):
     """
@@ -10,10 +10,13 @@ Schemas incluidos:
 2. PaymentResponse: Para mostrar pagos
 3. PaymentUpdate: Para actualizar pagos (admin)
 4. PaymentWithDetails: Para mostrar con datos de Student, Course y Enrollment
+5. PaymentBulkRequest / PaymentBulkResponse: Aprobar/rechazar pagos en lote
+6. PaymentResumenRequest / PaymentResumen: Resumen de pagos de varias inscripciones
+7. PaymentUploadIntent: Parámetros firmados para subir el comprobante directo al almacenamiento
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 from models.enums import EstadoPago
 from models.base import PyObjectId
@@ -65,6 +68,21 @@ class PaymentCreate(BaseModel):
         description="URL del comprobante/voucher (PDF en Cloudinary)"
     )
     
+    comprobante_preview_url: Optional[str] = Field(
+        None,
+        description="URL de la vista previa del comprobante (la genera el servidor al subirlo)"
+    )
+    
+    comprobante_sha256: Optional[str] = Field(
+        None,
+        description="SHA-256 del contenido del comprobante (lo calcula el servidor al subirlo)"
+    )
+    
+    comprobante_md5: Optional[str] = Field(
+        None,
+        description="MD5 del contenido del comprobante (servidor o almacenamiento, nunca el cliente)"
+    )
+    
     model_config = {
         "json_schema_extra": {
             "example": {
@@ -140,6 +158,11 @@ class PaymentResponse(BaseModel):
         description="URL del comprobante/voucher (PDF en Cloudinary)"
     )
     
+    comprobante_preview_url: Optional[str] = Field(
+        None,
+        description="Vista previa WebP pequeña del comprobante (primera página si es PDF). Usar en listas; null si no hay"
+    )
+    
     # ========================================================================
     # CAMPOS TÉCNICOS ADICIONALES
     # ========================================================================
@@ -158,6 +181,12 @@ class PaymentResponse(BaseModel):
     
     estado_pago: EstadoPago
     
+    comprobante_sha256: Optional[str] = None
+    posible_duplicado_de: Optional[PyObjectId] = Field(
+        None,
+        description="ID de un pago anterior con el mismo comprobante (revisar antes de aprobar)"
+    )
+    
     # Auditoría
     fecha_subida: datetime
     fecha_verificacion: Optional[datetime]
@@ -188,7 +217,9 @@ class PaymentResponse(BaseModel):
                 "numero_cuota": None,
                 "cantidad_pago": 600.0,
                 "comprobante_url": "https://res.cloudinary.com/kyc/voucher_2024_001234.pdf",
+                "comprobante_preview_url": "https://res.cloudinary.com/kyc/voucher_2024_001234_preview.webp",
                 "estado_pago": "pendiente",
+                "posible_duplicado_de": None,
                 "fecha_subida": "2024-12-15T14:30:00",
                 "fecha_verificacion": None,
                 "verificado_por": None,
@@ -325,3 +356,156 @@ class PaymentWithDetails(PaymentResponse):
             }
         }
     }
+
+
+class PaymentBulkDecision(BaseModel):
+    """
+    Decisión individual dentro de un lote de aprobación/rechazo
+    
+    Uso: POST /payments/bulk
+    """
+    
+    payment_id: PyObjectId = Field(
+        ...,
+        description="ID del pago"
+    )
+    
+    accion: Literal["aprobar", "rechazar"] = Field(
+        ...,
+        description="Acción a aplicar: 'aprobar' o 'rechazar'"
+    )
+    
+    motivo: Optional[str] = Field(
+        None,
+        min_length=1,
+        description="Razón del rechazo (obligatorio si accion = 'rechazar')"
+    )
+
+
+class PaymentBulkRequest(BaseModel):
+    """
+    Schema para aprobar/rechazar varios pagos en una sola petición
+    
+    Uso: POST /payments/bulk
+    """
+    
+    decisiones: List[PaymentBulkDecision] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Lista de decisiones (máx 500)"
+    )
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "decisiones": [
+                    {"payment_id": "507f1f77bcf86cd799439014", "accion": "aprobar"},
+                    {
+                        "payment_id": "507f1f77bcf86cd799439015",
+                        "accion": "rechazar",
+                        "motivo": "Voucher ilegible"
+                    }
+                ]
+            }
+        }
+    }
+
+
+class PaymentBulkItemResult(BaseModel):
+    """Resultado de una decisión del lote"""
+    
+    payment_id: PyObjectId
+    accion: str
+    ok: bool = Field(..., description="¿Se aplicó la decisión?")
+    estado_pago: Optional[EstadoPago] = Field(
+        None,
+        description="Estado final del pago (si se aplicó)"
+    )
+    error: Optional[str] = Field(
+        None,
+        description="Motivo por el que no se aplicó"
+    )
+
+
+class PaymentBulkResponse(BaseModel):
+    """
+    Respuesta de POST /payments/bulk
+    
+    Incluye un resultado por cada decisión, en el mismo orden recibido.
+    """
+    
+    procesados: int = Field(..., description="Decisiones aplicadas")
+    aprobados: int = Field(..., description="Pagos aprobados")
+    rechazados: int = Field(..., description="Pagos rechazados")
+    errores: int = Field(..., description="Decisiones no aplicadas")
+    resultados: List[PaymentBulkItemResult]
+
+
+class PaymentResumenRequest(BaseModel):
+    """
+    Schema para pedir el resumen de pagos de varias inscripciones
+    
+    Uso: POST /payments/resumen
+    """
+    
+    inscripcion_ids: List[PyObjectId] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="IDs de las inscripciones (máx 500)"
+    )
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "inscripcion_ids": [
+                    "507f1f77bcf86cd799439013",
+                    "507f1f77bcf86cd799439016"
+                ]
+            }
+        }
+    }
+
+
+class PaymentResumen(BaseModel):
+    """Resumen de pagos de una inscripción"""
+    
+    inscripcion_id: PyObjectId
+    total_pagos: int = Field(..., description="Cantidad total de pagos")
+    pendientes: int = Field(..., description="Pagos pendientes de revisión")
+    aprobados: int = Field(..., description="Pagos aprobados")
+    rechazados: int = Field(..., description="Pagos rechazados")
+    monto_total_aprobado: float = Field(..., description="Suma de pagos aprobados (Bs)")
+
+
+class PaymentUploadIntent(BaseModel):
+    """
+    Parámetros firmados para subir un comprobante directo al almacenamiento
+    
+    Uso: POST /payments/upload-intent
+    
+    El cliente hace un POST multipart a `upload_url` con todos los `fields`
+    más el archivo en `file`, y luego registra el pago en POST /payments/
+    con la `secure_url` y la `signature` de la respuesta.
+    """
+    
+    upload_url: str = Field(..., description="URL a la que el cliente sube el archivo")
+    fields: Dict[str, Any] = Field(..., description="Campos firmados a enviar junto al archivo")
+    expires_in: int = Field(..., description="Segundos de validez de la firma")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "upload_url": "https://api.cloudinary.com/v1_1/kyc/auto/upload",
+                "fields": {
+                    "public_id": "payments/507f1f77bcf86cd799439011/voucher_3f2a9c0e8b7d4e1fa6c5b4d3e2f1a0b9",
+                    "allowed_formats": "jpg,png,webp,pdf",
+                    "timestamp": 1734273000,
+                    "signature": "a1b2c3d4e5f6...",
+                    "api_key": "123456789012345"
+                },
+                "expires_in": 3600
+            }
+        }
+    }
@@ -53,6 +53,8 @@ class RequisitoResponse(BaseModel):
     motivo_rechazo: Optional[str] = None
     revisado_por: Optional[str] = None
     fecha_subida: Optional[datetime] = None
+    preview_url: Optional[str] = None
+    sha256: Optional[str] = None
     
     model_config = {
         "from_attributes": True,
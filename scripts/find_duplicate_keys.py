@@ -0,0 +1,98 @@
+"""
+Detectar Duplicados que Bloquean Índices Únicos
+===============================================
+
+`ensure_indexes` (core/indexes.py) no deja arrancar la aplicación si un
+índice único del manifiesto no se puede crear. La causa habitual son datos
+anteriores duplicados (ej: dos pagos APROBADOS de la misma cuota, dos
+usuarios con el mismo email, dos inscripciones activas al mismo curso).
+
+Este script recorre los índices únicos del manifiesto y, para cada uno,
+lista los grupos de documentos que comparten la clave (respetando el filtro
+parcial del índice), con sus `_id`. No modifica nada: corregir cada caso
+(rechazar o cancelar el duplicado, renombrar el usuario, etc.) es una
+decisión del negocio.
+
+Uso (desde la raíz del proyecto):
+---------------------------------
+python -m scripts.find_duplicate_keys
+python -m scripts.find_duplicate_keys --collection payments
+"""
+
+import argparse
+import asyncio
+from typing import Optional
+
+import motor.motor_asyncio
+
+from core.config import settings
+from core.indexes import INDEX_MANIFEST
+
+
+async def find_duplicates(database, collection_filter: Optional[str] = None) -> int:
+    """
+    Listar los grupos duplicados de cada índice único
+
+    Returns:
+        Cantidad de grupos duplicados encontrados
+    """
+    total = 0
+
+    for document_model, indexes in INDEX_MANIFEST.items():
+        collection_name = document_model.Settings.name
+        if collection_filter and collection_name != collection_filter:
+            continue
+        collection = database[collection_name]
+
+        for index in indexes:
+            spec = index.document
+            if not spec.get("unique"):
+                continue
+
+            fields = [field for field, _ in spec["key"].items()]
+            pipeline = []
+            if spec.get("partialFilterExpression"):
+                pipeline.append({"$match": spec["partialFilterExpression"]})
+            pipeline += [
+                {"$group": {
+                    "_id": {field.replace(".", "_"): f"${field}" for field in fields},
+                    "ids": {"$push": "$_id"},
+                    "n": {"$sum": 1}
+                }},
+                {"$match": {"n": {"$gt": 1}}},
+            ]
+
+            grupos = await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+            if not grupos:
+                print(f"[OK] {collection_name}.{spec['name']}: sin duplicados")
+                continue
+
+            total += len(grupos)
+            print(f"[WARN] {collection_name}.{spec['name']}: {len(grupos)} claves duplicadas")
+            for grupo in grupos:
+                ids = ", ".join(str(id) for id in grupo["ids"])
+                print(f"    {grupo['_id']} -> _id: {ids}")
+
+    return total
+
+
+async def main(collection_filter: Optional[str]) -> None:
+    # Conexión directa (sin init_db): init_db no arranca si faltan índices únicos
+    client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
+    database = client[settings.DATABASE_NAME]
+    try:
+        total = await find_duplicates(database, collection_filter)
+    finally:
+        client.close()
+
+    if total:
+        print(f"[WARN] {total} claves duplicadas: corregirlas y reiniciar la aplicación")
+    else:
+        print("[OK] Sin duplicados en los índices únicos")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Listar duplicados que impiden crear los índices únicos")
+    parser.add_argument("--collection", default=None, help="Revisar solo esta colección (ej: payments)")
+    args = parser.parse_args()
+    asyncio.run(main(args.collection))
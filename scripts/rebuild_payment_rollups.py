@@ -0,0 +1,34 @@
+"""
+Reconstruir Acumulados de Pagos
+===============================
+
+Recalcula la colección `payment_rollups` desde `payments`, por lotes.
+
+Uso (desde la raíz del proyecto):
+---------------------------------
+python -m scripts.rebuild_payment_rollups
+python -m scripts.rebuild_payment_rollups --batch-size 5000
+"""
+
+import argparse
+import asyncio
+
+from core.database import init_db
+from services import dashboard_service
+
+
+async def main(batch_size: int) -> None:
+    await init_db()
+    resultado = await dashboard_service.reconstruir_rollups(batch_size=batch_size)
+    print(
+        f"[OK] Acumulados reconstruidos: {resultado['pagos_procesados']} pagos, "
+        f"{resultado['acumulados']} acumulados, "
+        f"{resultado['acumulados_eliminados']} eliminados"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruir acumulados de pagos del dashboard")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Pagos por lote (default: 1000)")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
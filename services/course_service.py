@@ -17,7 +17,8 @@ async def get_course(id: PydanticObjectId) -> Optional[Course]:
     return await Course.get(id)
 
 from models.enums import TipoCurso, Modalidad
-from beanie.operators import Or
+from services import pagination
+from core.search import search_filter
 
 async def get_courses(
     page: int = 1,
@@ -25,8 +26,9 @@ async def get_courses(
     q: Optional[str] = None,
     activo: Optional[bool] = None,
     tipo_curso: Optional[TipoCurso] = None,
-    modalidad: Optional[Modalidad] = None
-) -> tuple[List[Course], int]:
+    modalidad: Optional[Modalidad] = None,
+    cursor: Optional[str] = None
+) -> tuple[List[Course], int, Optional[str]]:
     """
     Obtiene múltiples cursos con paginación y filtros
     
@@ -37,18 +39,17 @@ async def get_courses(
         activo: Filtrar por estado activo/inactivo
         tipo_curso: Filtrar por tipo de curso
         modalidad: Filtrar por modalidad
+        cursor: Cursor keyset de la página anterior (opcional, ignora `page`)
+    
+    Returns:
+        (cursos, total, next_cursor)
     """
     query = Course.find()
     
-    # 1. Búsqueda por texto (q)
-    if q:
-        regex_pattern = {"$regex": q, "$options": "i"}
-        query = query.find(
-            Or(
-                Course.nombre_programa == regex_pattern,
-                Course.codigo == regex_pattern
-            )
-        )
+    # 1. Búsqueda por texto (q) - tokens indexados (core/search.py)
+    filtro_busqueda = search_filter(q)
+    if filtro_busqueda:
+        query = query.find(filtro_busqueda)
         
     # 2. Filtro Activo
     if activo is not None:
@@ -62,10 +63,13 @@ async def get_courses(
     if modalidad:
         query = query.find(Course.modalidad == modalidad)
     
-    total_count = await query.count()
-    skip = (page - 1) * per_page
-    courses = await query.sort("-created_at").skip(skip).limit(per_page).to_list()
-    return courses, total_count
+    return await pagination.paginate(
+        query,
+        sort_field="created_at",
+        page=page,
+        per_page=per_page,
+        cursor=cursor
+    )
 
 async def create_course(course_in: CourseCreate) -> Course:
     """Crea un nuevo curso"""
@@ -86,7 +90,7 @@ async def update_course(
     for field, value in update_data.items():
         setattr(course, field, value)
         
-    await course.save()
+    await course.save_changes()
     return course
 
 async def delete_course(id: PydanticObjectId) -> Optional[Course]:
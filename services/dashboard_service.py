@@ -0,0 +1,281 @@
+"""
+Servicio de Dashboard
+=====================
+
+Acumulados de pagos (rollups) y consultas del dashboard de administración.
+
+¿Cómo funciona?
+---------------
+1. Cada pago suma en el acumulado de su día (hora boliviana), curso y estado
+   (colección `payment_rollups`, modelo PaymentRollup).
+2. create_payment suma en PENDIENTE; aprobar/rechazar mueven el pago de
+   PENDIENTE al nuevo estado con `$inc` (sin leer el acumulado).
+3. Los endpoints del dashboard solo agregan sobre `payment_rollups`, cuyo
+   tamaño depende de días × cursos, no de la cantidad de pagos.
+4. `reconstruir_rollups` recalcula todo desde `payments` por lotes (ej: si
+   se editaron pagos a mano o falló una actualización incremental).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+
+from models.payment import Payment
+from models.payment_rollup import PaymentRollup
+from models.enums import EstadoPago
+from core.timezone_utils import BOLIVIA_OFFSET
+
+# Clave de un acumulado: (día, curso_id, estado)
+RollupKey = Tuple[datetime, PydanticObjectId, EstadoPago]
+
+
+class _PagoRollup(BaseModel):
+    """Proyección mínima de Payment para reconstruir acumulados"""
+    id: PydanticObjectId = Field(alias="_id")
+    fecha_subida: datetime
+    curso_id: PydanticObjectId
+    estado_pago: EstadoPago
+    cantidad_pago: float
+
+
+def dia_bolivia(fecha: datetime) -> datetime:
+    """Día (00:00 hora boliviana) de una fecha UTC"""
+    local = fecha + BOLIVIA_OFFSET
+    return datetime(local.year, local.month, local.day)
+
+
+def _clave(payment, estado: EstadoPago) -> RollupKey:
+    return (dia_bolivia(payment.fecha_subida), payment.curso_id, estado)
+
+
+def _operaciones_incremento(
+    deltas: Dict[RollupKey, List[float]],
+    ahora: datetime
+) -> List[UpdateOne]:
+    """UpdateOne con `$inc` (upsert) por cada acumulado afectado"""
+    operaciones = []
+    for (dia, curso_id, estado), (cantidad, monto) in deltas.items():
+        operaciones.append(UpdateOne(
+            {"dia": dia, "curso_id": curso_id, "estado_pago": estado.value},
+            {
+                "$inc": {"cantidad": cantidad, "monto": monto},
+                "$set": {"updated_at": ahora},
+                "$setOnInsert": {"created_at": ahora}
+            },
+            upsert=True
+        ))
+    return operaciones
+
+
+def _sumar(deltas: Dict[RollupKey, List[float]], clave: RollupKey, cantidad: int, monto: float):
+    delta = deltas.setdefault(clave, [0, 0.0])
+    delta[0] += cantidad
+    delta[1] += monto
+
+
+async def _aplicar(deltas: Dict[RollupKey, List[float]]) -> None:
+    if not deltas:
+        return
+    await PaymentRollup.get_motor_collection().bulk_write(
+        _operaciones_incremento(deltas, datetime.utcnow()),
+        ordered=False
+    )
+
+
+# ============================================================================
+# ACTUALIZACIÓN INCREMENTAL
+# ============================================================================
+
+async def registrar_pago_creado(payment: Payment) -> None:
+    """Sumar un pago nuevo en su acumulado (estado actual del pago)"""
+    deltas = {}
+    _sumar(deltas, _clave(payment, payment.estado_pago), 1, payment.cantidad_pago)
+    await _aplicar(deltas)
+
+
+async def registrar_cambios_estado(
+    cambios: List[Tuple[Payment, EstadoPago]],
+    estado_anterior: EstadoPago = EstadoPago.PENDIENTE
+) -> None:
+    """
+    Mover pagos de un estado a otro en los acumulados
+
+    Args:
+        cambios: Lista de (pago, estado nuevo)
+        estado_anterior: Estado desde el que se movieron (PENDIENTE al aprobar/rechazar)
+    """
+    deltas = {}
+    for payment, estado_nuevo in cambios:
+        _sumar(deltas, _clave(payment, estado_anterior), -1, -payment.cantidad_pago)
+        _sumar(deltas, _clave(payment, estado_nuevo), 1, payment.cantidad_pago)
+    await _aplicar(deltas)
+
+
+# ============================================================================
+# RECONSTRUCCIÓN
+# ============================================================================
+
+async def reconstruir_rollups(batch_size: int = 1000) -> dict:
+    """
+    Recalcular todos los acumulados desde `payments`
+
+    Recorre los pagos por lotes (keyset sobre `_id`, solo los campos
+    necesarios), acumula en memoria y escribe cada acumulado con `$set`.
+    Los acumulados que no se tocaron (sin pagos) se eliminan al final, así
+    el dashboard nunca queda vacío durante la reconstrucción.
+
+    Nota: los pagos que cambien de estado mientras corre pueden quedar
+    desfasados; conviene ejecutarlo con poco tráfico.
+
+    Returns:
+        dict con pagos procesados, acumulados escritos y eliminados
+    """
+    inicio = datetime.utcnow()
+    acumulados: Dict[RollupKey, List[float]] = {}
+    procesados = 0
+    ultimo_id = None
+
+    while True:
+        query = Payment.find(Payment.id > ultimo_id) if ultimo_id else Payment.find()
+        lote = await query.sort("_id").limit(batch_size).project(_PagoRollup).to_list()
+        if not lote:
+            break
+        for pago in lote:
+            _sumar(acumulados, _clave(pago, pago.estado_pago), 1, pago.cantidad_pago)
+        procesados += len(lote)
+        ultimo_id = lote[-1].id
+
+    collection = PaymentRollup.get_motor_collection()
+    operaciones = [
+        UpdateOne(
+            {"dia": dia, "curso_id": curso_id, "estado_pago": estado.value},
+            {
+                "$set": {"cantidad": cantidad, "monto": monto, "updated_at": datetime.utcnow()},
+                "$setOnInsert": {"created_at": inicio}
+            },
+            upsert=True
+        )
+        for (dia, curso_id, estado), (cantidad, monto) in acumulados.items()
+    ]
+    for i in range(0, len(operaciones), batch_size):
+        await collection.bulk_write(operaciones[i:i + batch_size], ordered=False)
+
+    eliminados = await collection.delete_many({"updated_at": {"$lt": inicio}})
+
+    return {
+        "pagos_procesados": procesados,
+        "acumulados": len(operaciones),
+        "acumulados_eliminados": eliminados.deleted_count
+    }
+
+
+# ============================================================================
+# CONSULTAS DEL DASHBOARD (solo leen payment_rollups)
+# ============================================================================
+
+def _rango_dias(desde: Optional[datetime], hasta: Optional[datetime]) -> dict:
+    rango = {}
+    if desde:
+        rango["$gte"] = desde
+    if hasta:
+        rango["$lte"] = hasta
+    return {"dia": rango} if rango else {}
+
+
+_LOOKUP_CURSO = [
+    {"$lookup": {
+        "from": "courses",
+        "localField": "_id.curso_id",
+        "foreignField": "_id",
+        "pipeline": [{"$project": {"_id": 0, "nombre_programa": 1, "codigo": 1}}],
+        "as": "curso"
+    }},
+]
+
+
+async def get_ingresos_por_curso_mes(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    curso_id: Optional[PydanticObjectId] = None
+) -> List[dict]:
+    """
+    Ingresos aprobados por curso y mes
+
+    Args:
+        desde: Primer día incluido (hora boliviana)
+        hasta: Último día incluido (hora boliviana)
+        curso_id: Limitar a un curso
+
+    Returns:
+        Lista de {curso_id, nombre_programa, codigo, mes "YYYY-MM",
+        cantidad_pagos, monto_aprobado}, del mes más reciente al más antiguo
+    """
+    match = {"estado_pago": EstadoPago.APROBADO.value, **_rango_dias(desde, hasta)}
+    if curso_id:
+        match["curso_id"] = curso_id
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "curso_id": "$curso_id",
+                "mes": {"$dateToString": {"format": "%Y-%m", "date": "$dia"}}
+            },
+            "cantidad_pagos": {"$sum": "$cantidad"},
+            "monto_aprobado": {"$sum": "$monto"}
+        }},
+        {"$match": {"cantidad_pagos": {"$gt": 0}}},
+        {"$sort": {"_id.mes": -1, "monto_aprobado": -1}},
+        *_LOOKUP_CURSO,
+        {"$project": {
+            "_id": 0,
+            "curso_id": "$_id.curso_id",
+            "mes": "$_id.mes",
+            "nombre_programa": {"$arrayElemAt": ["$curso.nombre_programa", 0]},
+            "codigo": {"$arrayElemAt": ["$curso.codigo", 0]},
+            "cantidad_pagos": 1,
+            "monto_aprobado": {"$round": ["$monto_aprobado", 2]}
+        }}
+    ]
+    return await PaymentRollup.aggregate(pipeline).to_list()
+
+
+async def get_pendientes_backlog() -> dict:
+    """
+    Pagos pendientes de revisión por curso
+
+    Returns:
+        dict con total_pendientes, monto_pendiente y por_curso:
+        [{curso_id, nombre_programa, codigo, cantidad, monto, dia_mas_antiguo}]
+        ordenado por cantidad descendente
+    """
+    pipeline = [
+        {"$match": {"estado_pago": EstadoPago.PENDIENTE.value, "cantidad": {"$gt": 0}}},
+        {"$group": {
+            "_id": {"curso_id": "$curso_id"},
+            "cantidad": {"$sum": "$cantidad"},
+            "monto": {"$sum": "$monto"},
+            "dia_mas_antiguo": {"$min": "$dia"}
+        }},
+        {"$sort": {"cantidad": -1}},
+        *_LOOKUP_CURSO,
+        {"$project": {
+            "_id": 0,
+            "curso_id": "$_id.curso_id",
+            "nombre_programa": {"$arrayElemAt": ["$curso.nombre_programa", 0]},
+            "codigo": {"$arrayElemAt": ["$curso.codigo", 0]},
+            "cantidad": 1,
+            "monto": {"$round": ["$monto", 2]},
+            "dia_mas_antiguo": 1
+        }}
+    ]
+    por_curso = await PaymentRollup.aggregate(pipeline).to_list()
+
+    return {
+        "total_pendientes": sum(c["cantidad"] for c in por_curso),
+        "monto_pendiente": round(sum(c["monto"] for c in por_curso), 2),
+        "por_curso": por_curso
+    }
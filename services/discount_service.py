@@ -5,8 +5,10 @@ Servicio de Descuentos
 Lógica de negocio para operaciones CRUD de descuentos.
 """
 
+from datetime import datetime
 from typing import List, Optional
-from beanie import PydanticObjectId
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import AddToSet, Pull, Set
 from models.discount import Discount
 from schemas.discount import DiscountCreate, DiscountUpdate
 
@@ -42,7 +44,7 @@ async def update_discount(
     for field, value in update_data.items():
         setattr(discount, field, value)
     
-    await discount.save()
+    await discount.save_changes()
     return discount
 
 
@@ -66,21 +68,21 @@ async def add_student_to_discount(
     discount_id: PydanticObjectId,
     student_id: PydanticObjectId
 ) -> Discount:
-    """Agregar un estudiante a un descuento"""
-    discount = await Discount.get(discount_id)
-    if discount and student_id not in discount.lista_estudiantes:
-        discount.lista_estudiantes.append(student_id)
-        await discount.save()
-    return discount
+    """Agregar un estudiante a un descuento (sin reenviar la lista completa)"""
+    return await Discount.find_one(Discount.id == discount_id).update(
+        AddToSet({Discount.lista_estudiantes: student_id}),
+        Set({Discount.updated_at: datetime.utcnow()}),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
 
 
 async def remove_student_from_discount(
     discount_id: PydanticObjectId,
     student_id: PydanticObjectId
 ) -> Discount:
-    """Remover un estudiante de un descuento"""
-    discount = await Discount.get(discount_id)
-    if discount and student_id in discount.lista_estudiantes:
-        discount.lista_estudiantes.remove(student_id)
-        await discount.save()
-    return discount
+    """Remover un estudiante de un descuento (sin reenviar la lista completa)"""
+    return await Discount.find_one(Discount.id == discount_id).update(
+        Pull({Discount.lista_estudiantes: student_id}),
+        Set({Discount.updated_at: datetime.utcnow()}),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
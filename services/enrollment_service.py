@@ -11,14 +11,28 @@ Permisos:
 - VER inscripciones: ADMIN (todas), STUDENT (solo las suyas)
 """
 
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional
 from datetime import datetime
 from models.enrollment import Enrollment
 from models.student import Student
 from models.course import Course
 from models.enums import TipoEstudiante, EstadoInscripcion
 from schemas.enrollment import EnrollmentCreate
+from pydantic import BaseModel, Field
 from beanie import PydanticObjectId
+from beanie.operators import AddToSet, Set
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from services import pagination
+from core.search import search_filter
+from core.storage import StoredFile
+from core.principal_cache import invalidate_principal
+
+
+class _SoloId(BaseModel):
+    """Proyección mínima (solo _id) para resolver búsquedas"""
+    id: PydanticObjectId = Field(alias="_id")
 
 
 from models.discount import Discount
@@ -32,28 +46,36 @@ async def create_enrollment(enrollment_in: EnrollmentCreate, admin_username: str
     2. Calcular precios según tipo de estudiante
     3. Aplicar descuentos (del curso + seleccionado)
     4. Crear inscripción con snapshot de precios
+    
+    Raises:
+        ValueError: Si el estudiante o el curso no existen, o si el
+            estudiante ya tiene una inscripción no cancelada en el curso
     """
     
-    # 1. Obtener estudiante y curso
-    student = await Student.get(enrollment_in.estudiante_id)
+    # 1. Leer estudiante, curso (y su descuento) y descuento seleccionado
+    #    en paralelo: son lecturas independientes
+    async def _get_course_y_descuento():
+        course = await Course.get(enrollment_in.curso_id)
+        if course and course.descuento_id:
+            return course, await Discount.get(course.descuento_id)
+        return course, None
+    
+    async def _get_descuento_seleccionado():
+        if enrollment_in.descuento_id:
+            return await Discount.get(enrollment_in.descuento_id)
+        return None
+    
+    student, (course, discount_obj), discount_sel = await asyncio.gather(
+        Student.get(enrollment_in.estudiante_id),
+        _get_course_y_descuento(),
+        _get_descuento_seleccionado()
+    )
+    
     if not student:
         raise ValueError(f"Estudiante {enrollment_in.estudiante_id} no encontrado")
-    
-    course = await Course.get(enrollment_in.curso_id)
     if not course:
         raise ValueError(f"Curso {enrollment_in.curso_id} no encontrado")
     
-    # 2. Validar que no esté ya inscrito
-    existing = await Enrollment.find_one(
-        Enrollment.estudiante_id == enrollment_in.estudiante_id,
-        Enrollment.curso_id == enrollment_in.curso_id,
-        Enrollment.estado != EstadoInscripcion.CANCELADO
-    )
-    if existing:
-        raise ValueError(
-            f"El estudiante ya está inscrito en este curso (Inscripción ID: {existing.id})"
-        )
-    
     # 3. Determinar tipo de estudiante (usar el del Student)
     es_interno = student.es_estudiante_interno == TipoEstudiante.INTERNO
     
@@ -66,7 +88,6 @@ async def create_enrollment(enrollment_in: EnrollmentCreate, admin_username: str
     descuento_curso_id = None
     
     if course.descuento_id:
-        discount_obj = await Discount.get(course.descuento_id)
         if discount_obj and discount_obj.activo:
             descuento_curso = discount_obj.porcentaje
             descuento_curso_id = discount_obj.id
@@ -80,7 +101,6 @@ async def create_enrollment(enrollment_in: EnrollmentCreate, admin_username: str
     descuento_estudiante_id = None
     
     if enrollment_in.descuento_id:
-        discount_sel = await Discount.get(enrollment_in.descuento_id)
         if discount_sel and discount_sel.activo:
             descuento_personal = discount_sel.porcentaje
             descuento_estudiante_id = discount_sel.id
@@ -117,17 +137,34 @@ async def create_enrollment(enrollment_in: EnrollmentCreate, admin_username: str
         requisitos=requisitos_enrollment
     )
     
-    await enrollment.insert()
-    
-    # 9. Agregar estudiante a la lista de inscritos del curso
-    if enrollment_in.estudiante_id not in course.inscritos:
-        course.inscritos.append(enrollment_in.estudiante_id)
-        await course.save()
-    
-    # 10. Agregar curso a la lista de cursos del estudiante
-    if enrollment_in.curso_id not in student.lista_cursos_ids:
-        student.lista_cursos_ids.append(enrollment_in.curso_id)
-        await student.save()
+    # Sin consulta previa de duplicados: el índice único parcial
+    # "estudiante_curso_activa_unique" rechaza una segunda inscripción no
+    # cancelada del mismo estudiante en el mismo curso (también si llegan a la vez)
+    try:
+        await enrollment.insert()
+    except DuplicateKeyError:
+        existing = await Enrollment.find_one(
+            Enrollment.estudiante_id == enrollment_in.estudiante_id,
+            Enrollment.curso_id == enrollment_in.curso_id,
+            Enrollment.estado != EstadoInscripcion.CANCELADO
+        )
+        detalle = f" (Inscripción ID: {existing.id})" if existing else ""
+        raise ValueError(f"El estudiante ya está inscrito en este curso{detalle}")
+    
+    # 9-10. Agregar estudiante a los inscritos del curso y curso a la lista
+    #       del estudiante ($addToSet: sin reenviar las listas completas)
+    ahora = datetime.utcnow()
+    await asyncio.gather(
+        Course.find_one(Course.id == course.id).update(
+            AddToSet({Course.inscritos: enrollment_in.estudiante_id}),
+            Set({Course.updated_at: ahora})
+        ),
+        Student.find_one(Student.id == student.id).update(
+            AddToSet({Student.lista_cursos_ids: enrollment_in.curso_id}),
+            Set({Student.updated_at: ahora})
+        )
+    )
+    invalidate_principal("student", student.id)
     
     return enrollment
 
@@ -175,24 +212,82 @@ async def get_enrollments_by_course(course_id: PydanticObjectId) -> List[Enrollm
 
 from beanie.operators import In, Or
 
+
+async def count_enrollments_of_student(
+    enrollment_ids: List[PydanticObjectId],
+    student_id: PydanticObjectId
+) -> int:
+    """Contar cuántas de estas inscripciones pertenecen al estudiante"""
+    return await Enrollment.find(
+        In(Enrollment.id, enrollment_ids),
+        Enrollment.estudiante_id == student_id
+    ).count()
+
+
+async def find_requisito(
+    sha256: str,
+    student_id: PydanticObjectId
+) -> Optional[StoredFile]:
+    """
+    Documento idéntico (mismo hash) que el estudiante ya subió
+    como requisito, en cualquiera de sus inscripciones
+    
+    Se usa al subir un requisito para reutilizar el archivo guardado en vez de
+    volver a transferirlo (ej: la misma fotocopia de carnet en dos cursos).
+    """
+    doc = await Enrollment.get_motor_collection().find_one(
+        {"estudiante_id": student_id, "requisitos.sha256": sha256},
+        {"requisitos.$": 1}
+    )
+    if not doc or not doc.get("requisitos") or not doc["requisitos"][0].get("url"):
+        return None
+    requisito = doc["requisitos"][0]
+    return StoredFile(url=requisito["url"], preview_url=requisito.get("preview_url"))
+
+
+async def guardar_requisito(enrollment: Enrollment, index: int) -> None:
+    """
+    Persistir solo el requisito `index` de la inscripción (`$set` puntual)
+    
+    Subir, aprobar o rechazar un requisito modifica un único elemento:
+    no se reenvía la lista completa ni el resto del documento.
+    
+    Args:
+        enrollment: Inscripción con el requisito ya modificado en memoria
+        index: Índice del requisito modificado
+    """
+    enrollment.updated_at = datetime.utcnow()
+    await Enrollment.find_one(Enrollment.id == enrollment.id).update(
+        Set({
+            f"requisitos.{index}": enrollment.requisitos[index],
+            Enrollment.updated_at: enrollment.updated_at
+        })
+    )
+
+
 async def get_all_enrollments(
     page: int = 1,
     per_page: int = 10,
     q: Optional[str] = None,
     estado: Optional[EstadoInscripcion] = None,
     curso_id: Optional[PydanticObjectId] = None,
-    estudiante_id: Optional[PydanticObjectId] = None
-) -> tuple[List[Enrollment], int]:
+    estudiante_id: Optional[PydanticObjectId] = None,
+    cursor: Optional[str] = None
+) -> tuple[List[Enrollment], int, Optional[str]]:
     """
     Obtener todas las inscripciones con paginación y filtros
     
     Args:
         page: Número de página
         per_page: Elementos por página
-        q: Búsqueda por nombre de estudiante o curso
+        q: Búsqueda por estudiante (nombre, email, carnet, registro) o curso (nombre, código)
         estado: Filtrar por estado
         curso_id: Filtrar por ID de curso
         estudiante_id: Filtrar por ID de estudiante
+        cursor: Cursor keyset de la página anterior (opcional, ignora `page`)
+    
+    Returns:
+        (inscripciones, total, next_cursor)
     """
     query = Enrollment.find()
     
@@ -209,22 +304,14 @@ async def get_all_enrollments(
         query = query.find(Enrollment.estudiante_id == estudiante_id)
         
     # 4. Búsqueda por texto (q) - Estudiante o Curso
-    if q:
-        # Buscar estudiantes que coincidan
-        regex_pattern = {"$regex": q, "$options": "i"}
-        
-        students = await Student.find(
-            Or(
-                Student.nombre == regex_pattern,
-                Student.carnet == regex_pattern
-            )
-        ).to_list()
+    filtro_busqueda = search_filter(q)
+    if filtro_busqueda:
+        # IDs de estudiantes y cursos que coinciden (índice de tokens,
+        # solo se proyecta el _id)
+        students = await Student.find(filtro_busqueda).project(_SoloId).to_list()
         student_ids = [s.id for s in students]
         
-        # Buscar cursos que coincidan
-        courses = await Course.find(
-            Course.nombre_programa == regex_pattern
-        ).to_list()
+        courses = await Course.find(filtro_busqueda).project(_SoloId).to_list()
         course_ids = [c.id for c in courses]
         
         # Filtrar inscripciones que coincidan con estudiantes O cursos encontrados
@@ -235,11 +322,13 @@ async def get_all_enrollments(
             )
         )
     
-    total_count = await query.count()
-    skip = (page - 1) * per_page
-    
-    enrollments = await query.sort("-fecha_inscripcion").skip(skip).limit(per_page).to_list()
-    return enrollments, total_count
+    return await pagination.paginate(
+        query,
+        sort_field="fecha_inscripcion",
+        page=page,
+        per_page=per_page,
+        cursor=cursor
+    )
 
 
 async def update_enrollment_descuento(
@@ -283,9 +372,8 @@ async def update_enrollment_descuento(
     enrollment.descuento_personalizado = descuento_personalizado
     enrollment.total_a_pagar = round(total_final, 2)
     enrollment.saldo_pendiente = round(max(0, nuevo_saldo), 2)
-    enrollment.updated_at = datetime.utcnow()
     
-    await enrollment.save()
+    await enrollment.save_changes()
     return enrollment
 
 
@@ -304,18 +392,65 @@ async def cambiar_estado_enrollment(
     
     Returns:
         Inscripción actualizada
+    
+    Raises:
+        ValueError: Si la inscripción no existe, o si se reactiva y el
+            estudiante ya tiene otra inscripción activa en el curso
     """
     enrollment = await Enrollment.get(enrollment_id)
     if not enrollment:
         raise ValueError(f"Inscripción {enrollment_id} no encontrada")
     
     enrollment.estado = nuevo_estado
-    enrollment.updated_at = datetime.utcnow()
     
-    await enrollment.save()
+    # Reactivar una inscripción cancelada choca con el índice único parcial
+    # si el estudiante ya tiene otra inscripción activa en el curso
+    try:
+        await enrollment.save_changes()
+    except DuplicateKeyError:
+        raise ValueError("El estudiante ya tiene una inscripción activa en este curso")
     return enrollment
 
 
+def _pipeline_actualizar_saldo(monto_pago_aprobado: float) -> list:
+    """
+    Pipeline de update que aplica un pago aprobado a una inscripción
+    
+    - total_pagado += monto
+    - saldo_pendiente = max(0, total_a_pagar - total_pagado)
+    - estado: PENDIENTE_PAGO → ACTIVO, y COMPLETADO si ya pagó todo
+    """
+    return [
+        # Actualizar totales
+        {"$set": {
+            "total_pagado": {"$add": ["$total_pagado", monto_pago_aprobado]},
+            "updated_at": datetime.utcnow()
+        }},
+        {"$set": {
+            "saldo_pendiente": {
+                "$max": [0, {"$subtract": ["$total_a_pagar", "$total_pagado"]}]
+            }
+        }},
+        # Cambiar a COMPLETADO si pagó todo (tolerancia de 1 centavo),
+        # o a ACTIVO si pagó matrícula
+        {"$set": {
+            "estado": {"$switch": {
+                "branches": [
+                    {
+                        "case": {"$lte": ["$saldo_pendiente", 0.01]},
+                        "then": EstadoInscripcion.COMPLETADO.value
+                    },
+                    {
+                        "case": {"$eq": ["$estado", EstadoInscripcion.PENDIENTE_PAGO.value]},
+                        "then": EstadoInscripcion.ACTIVO.value
+                    }
+                ],
+                "default": "$estado"
+            }}
+        }}
+    ]
+
+
 async def actualizar_saldo_enrollment(
     enrollment_id: PydanticObjectId,
     monto_pago_aprobado: float
@@ -326,23 +461,37 @@ async def actualizar_saldo_enrollment(
     Esta función es llamada automáticamente por payment_service
     cuando se aprueba un pago.
     
+    Se ejecuta como un único update con pipeline (atómico en el servidor),
+    así no se recarga el documento completo (requisitos incluidos) y dos
+    aprobaciones simultáneas no pierden actualizaciones de total_pagado.
+    
     Args:
         enrollment_id: ID de la inscripción
         monto_pago_aprobado: Monto del pago que fue aprobado
     """
-    enrollment = await Enrollment.get(enrollment_id)
-    if not enrollment:
+    result = await Enrollment.get_motor_collection().update_one(
+        {"_id": enrollment_id},
+        _pipeline_actualizar_saldo(monto_pago_aprobado)
+    )
+    if result.matched_count == 0:
         raise ValueError(f"Inscripción {enrollment_id} no encontrada")
+
+
+async def actualizar_saldos_enrollments(montos: Dict[PydanticObjectId, float]):
+    """
+    Aplicar pagos aprobados a varias inscripciones en un solo bulk_write
     
-    # Actualizar totales
-    enrollment.actualizar_saldo(monto_pago_aprobado)
-    
-    # Cambiar estado si pagó matrícula
-    if enrollment.estado == EstadoInscripcion.PENDIENTE_PAGO:
-        enrollment.estado = EstadoInscripcion.ACTIVO
-    
-    # Cambiar a COMPLETADO si pagó todo
-    if enrollment.esta_completamente_pagado():
-        enrollment.estado = EstadoInscripcion.COMPLETADO
+    Usado por la aprobación en lote: los montos ya vienen agrupados
+    (sumados) por inscripción.
     
-    await enrollment.save()
+    Args:
+        montos: {enrollment_id: monto total aprobado}
+    """
+    if not montos:
+        return
+    
+    operations = [
+        UpdateOne({"_id": enrollment_id}, _pipeline_actualizar_saldo(monto))
+        for enrollment_id, monto in montos.items()
+    ]
+    await Enrollment.get_motor_collection().bulk_write(operations, ordered=False)
@@ -0,0 +1,228 @@
+"""
+Paginación Compartida
+=====================
+
+Helpers de paginación usados por los servicios de listados.
+
+Modos:
+------
+1. **Offset** (por defecto): `page` + `per_page` → skip/limit.
+2. **Cursor** (keyset, opcional): el cliente envía el `nextCursor` recibido
+   en la página anterior. El cursor codifica `(sort_key, _id)` de la última
+   fila y la siguiente página se obtiene con un rango sobre el índice
+   `(sort_key desc, _id desc)`, así cada página cuesta lo mismo sin importar
+   qué tan profunda sea, y no se desplaza cuando llegan registros nuevos.
+
+Todas las consultas ordenan por `(sort_key desc, _id desc)` para que el orden
+sea estable aunque haya fechas repetidas.
+
+Totales:
+--------
+En modo offset la página y el total salen de una sola agregación `$facet`.
+En modo cursor el rango va en el `$match` de nivel superior (dentro de un
+`$facet` no se usan índices) y el total sale de un `count_documents` aparte,
+en paralelo. Opcionalmente (PAGINATION_COUNT_CACHE_SECONDS > 0) el total se
+sirve desde una caché corta por filtro, o desde `estimated_document_count`
+cuando no hay filtro.
+"""
+
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pymongo import DESCENDING
+
+from core.cache import TTLCache
+from core.config import settings
+
+
+def encode_cursor(sort_value: datetime, id: PydanticObjectId) -> str:
+    """
+    Codificar un cursor opaco a partir de la última fila de una página
+
+    Args:
+        sort_value: Valor del campo de orden (fecha) de la última fila
+        id: _id de la última fila
+
+    Returns:
+        Token base64 url-safe
+    """
+    payload = json.dumps({"k": sort_value.isoformat(), "id": str(id)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, PydanticObjectId]:
+    """
+    Decodificar un cursor generado por `encode_cursor`
+
+    Raises:
+        ValueError: Si el cursor es inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["k"]), PydanticObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+
+def keyset_filter(sort_field: str, cursor: str) -> dict:
+    """
+    Filtro de rango para obtener las filas posteriores al cursor
+
+    Orden descendente: (sort_field < k) OR (sort_field == k AND _id < id)
+    """
+    sort_value, last_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "_id": {"$lt": last_id}},
+        ]
+    }
+
+
+def sort_spec(sort_field: str) -> List[Tuple[str, int]]:
+    """Orden estable (sort_field desc, _id desc)"""
+    return [(sort_field, DESCENDING), ("_id", DESCENDING)]
+
+
+# Caché de totales por filtro (solo si PAGINATION_COUNT_CACHE_SECONDS > 0)
+_count_cache = TTLCache(
+    maxsize=2048,
+    ttl=settings.PAGINATION_COUNT_CACHE_SECONDS
+)
+
+
+def _count_cache_key(document_model, filtro: dict) -> str:
+    """Clave estable (colección + filtro) para la caché de totales"""
+    return f"{document_model.Settings.name}:{json.dumps(filtro, sort_keys=True, default=str)}"
+
+
+def count_cache_stats() -> dict:
+    """Métricas de la caché de totales (ver TTLCache.stats)"""
+    return _count_cache.stats()
+
+
+async def _cached_count(document_model, filtro: dict) -> Optional[int]:
+    """
+    Total servido sin contar documentos (modo caché)
+
+    - Sin filtro: `estimated_document_count` (metadata de la colección, O(1))
+    - Con filtro: valor cacheado por TTL, o None si no hay
+    """
+    if settings.PAGINATION_COUNT_CACHE_SECONDS <= 0:
+        return None
+    if not filtro:
+        return await document_model.get_motor_collection().estimated_document_count()
+    return _count_cache.get(_count_cache_key(document_model, filtro))
+
+
+def _cache_count(document_model, filtro: dict, total_count: int) -> None:
+    """Guardar un total recién contado (solo en modo caché y con filtro)"""
+    if settings.PAGINATION_COUNT_CACHE_SECONDS > 0 and filtro:
+        _count_cache.set(_count_cache_key(document_model, filtro), total_count)
+
+
+async def paginate(
+    query,
+    *,
+    sort_field: str,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], int, Optional[str]]:
+    """
+    Ejecutar una consulta Beanie paginada (página + total)
+
+    - Offset: la página y `totalItems` salen de una sola agregación:
+
+        $match (filtro) → $sort (índice) → $facet { items: [...], total: [$count] }
+
+    - Cursor: la página es un rango sobre el índice en el `$match` de nivel
+      superior, y el total un `count_documents(filtro)` en paralelo.
+
+    Si PAGINATION_COUNT_CACHE_SECONDS > 0, el total se toma de la caché
+    (o de `estimated_document_count` si no hay filtro) y solo se consulta la
+    página, con un rango/skip sobre el índice.
+
+    Args:
+        query: Consulta FindMany con los filtros ya aplicados
+        sort_field: Campo de orden (datetime), siempre descendente
+        page: Página (solo modo offset)
+        per_page: Elementos por página
+        cursor: Cursor de la página anterior (activa el modo keyset)
+
+    Returns:
+        (items, total_count, next_cursor). next_cursor es None si no hay
+        más páginas.
+
+    Raises:
+        ValueError: Si el cursor es inválido
+    """
+    document_model = query.document_model
+    filtro = query.get_filter_query()
+    sort = {field: direction for field, direction in sort_spec(sort_field)}
+    skip = (page - 1) * per_page
+
+    # Etapas de la página: rango del cursor o skip, y límite
+    # (en modo cursor se pide una fila extra para saber si hay más)
+    if cursor:
+        rango = keyset_filter(sort_field, cursor)
+        page_stages = [{"$limit": per_page + 1}]
+    else:
+        rango = None
+        page_stages = [{"$skip": skip}, {"$limit": per_page}]
+
+    total_count = await _cached_count(document_model, filtro)
+
+    if total_count is None and not rango:
+        # Offset: página + total en una sola agregación
+        result = await document_model.aggregate([
+            {"$match": filtro},
+            {"$sort": sort},
+            {"$facet": {
+                "items": page_stages,
+                "total": [{"$count": "n"}]
+            }}
+        ]).to_list()
+        facet = result[0] if result else {"items": [], "total": []}
+        docs = facet["items"]
+        total_count = facet["total"][0]["n"] if facet["total"] else 0
+        _cache_count(document_model, filtro, total_count)
+    else:
+        # Solo la página: el rango del cursor va en el $match de nivel
+        # superior para que se resuelva sobre el índice (dentro de un
+        # $facet no se usan índices)
+        match = {"$and": [filtro, rango]} if rango else filtro
+        page_query = document_model.aggregate(
+            [{"$match": match}, {"$sort": sort}] + page_stages
+        ).to_list()
+
+        if total_count is None:
+            # Cursor sin total cacheado: count aparte (sin el rango),
+            # en paralelo con la página
+            docs, total_count = await asyncio.gather(
+                page_query,
+                document_model.get_motor_collection().count_documents(filtro)
+            )
+            _cache_count(document_model, filtro, total_count)
+        else:
+            docs = await page_query
+
+    items = [document_model.model_validate(doc) for doc in docs]
+
+    if cursor:
+        has_more = len(items) > per_page
+        items = items[:per_page]
+    else:
+        has_more = skip + len(items) < total_count
+
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_field), last.id)
+
+    return items, total_count, next_cursor
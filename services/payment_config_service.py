@@ -92,7 +92,7 @@ async def update_payment_config(
         setattr(config, field, value)
     
     config.actualizado_por = admin_username
-    await config.save()
+    await config.save_changes()
     return config
 
 
@@ -110,7 +110,7 @@ async def delete_payment_config() -> PaymentConfig:
     config = await get_payment_config()
     if config:
         config.is_active = False
-        await config.save()
+        await config.save_changes()
     return config
 
 
@@ -11,16 +11,49 @@ Permisos:
 - VER pagos: ADMIN (todos), STUDENT (solo los suyos)
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from models.payment import Payment
 from models.enrollment import Enrollment
 from models.student import Student
 from models.course import Course
 from models.enums import EstadoPago
-from schemas.payment import PaymentCreate
-from beanie import PydanticObjectId
-from services import enrollment_service
+from schemas.payment import PaymentCreate, PaymentBulkDecision
+from pydantic import BaseModel, Field
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import In, Set
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from services import dashboard_service, enrollment_service, pagination
+from core.search import search_filter
+from core.storage import StoredFile
+
+
+class _StudentNombre(BaseModel):
+    """Proyección mínima de Student para enriquecer pagos"""
+    id: PydanticObjectId = Field(alias="_id")
+    nombre: Optional[str] = None
+
+
+class _PagoConcepto(BaseModel):
+    """Proyección mínima de Payment para la validación anti-duplicados"""
+    id: PydanticObjectId = Field(alias="_id")
+    inscripcion_id: PydanticObjectId
+    concepto: str
+    numero_cuota: Optional[int] = None
+
+
+class _PagoComprobante(BaseModel):
+    """Proyección mínima de Payment para la deduplicación de comprobantes"""
+    id: PydanticObjectId = Field(alias="_id")
+    comprobante_url: str
+    comprobante_preview_url: Optional[str] = None
+
+
+class _EnrollmentCuotas(BaseModel):
+    """Proyección mínima de Enrollment para enriquecer pagos"""
+    id: PydanticObjectId = Field(alias="_id")
+    cantidad_cuotas: int = 0
 
 
 async def enrich_payment_with_details(payment: Payment) -> dict:
@@ -36,44 +69,64 @@ async def enrich_payment_with_details(payment: Payment) -> dict:
     Returns:
         dict con todos los campos del Payment + campos enriquecidos
     """
-    # Convertir Payment a dict
-    payment_dict = payment.model_dump(by_alias=True)
+    enriched = await enrich_payments_with_details([payment])
+    return enriched[0]
+
+
+async def enrich_payments_with_details(payments: List[Payment]) -> List[dict]:
+    """
+    Enriquecer una lista de pagos en lote
     
-    # 1. Obtener nombre del estudiante
-    student = await Student.get(payment.estudiante_id)
-    nombre_estudiante = student.nombre if student and student.nombre else "Sin nombre"
+    En lugar de consultar Student y Enrollment por cada pago, junta los IDs
+    distintos y los resuelve con dos consultas `$in` que solo traen los
+    campos necesarios (nombre y cantidad_cuotas). Una página cuesta siempre
+    la misma cantidad de consultas sin importar su tamaño.
+    
+    Args:
+        payments: Lista de pagos de la base de datos
+    
+    Returns:
+        Lista de dicts (mismo orden) con los campos del Payment + campos enriquecidos
+    """
+    if not payments:
+        return []
     
-    # 2. Formatear fechas a hora boliviana (UTC-4)
     from core.timezone_utils import to_bolivia_time
     
-    fecha = to_bolivia_time(payment.fecha_subida)
-    created_at_bolivia = to_bolivia_time(payment.created_at)
-    updated_at_bolivia = to_bolivia_time(payment.updated_at)
+    # 1. IDs distintos de estudiantes e inscripciones
+    student_ids = list({p.estudiante_id for p in payments})
+    enrollment_ids = list({p.inscripcion_id for p in payments})
     
-    # 3. Calcular total de cuotas
-    total_cuotas = 0
-    try:
-        enrollment = await enrollment_service.get_enrollment(payment.inscripcion_id)
-        if enrollment:
-            total_cuotas = enrollment.cantidad_cuotas
-    except:
-        total_cuotas = 0
+    # 2. Resolver nombres y cuotas en dos consultas con proyección
+    students = await Student.find(
+        In(Student.id, student_ids)
+    ).project(_StudentNombre).to_list()
+    nombres = {s.id: s.nombre for s in students}
+    
+    enrollments = await Enrollment.find(
+        In(Enrollment.id, enrollment_ids)
+    ).project(_EnrollmentCuotas).to_list()
+    cuotas = {e.id: e.cantidad_cuotas for e in enrollments}
     
-    # 4. Agregar campos enriquecidos
-    payment_dict.update({
-        # Dados legibles (mismos que reporte Excel)
-        "nombre_estudiante": nombre_estudiante,
-        "fecha": fecha,
-        "moneda": "Bs",
-        "monto": payment.cantidad_pago,
-        "estado": payment.estado_pago.value if payment.estado_pago else "",
-        "total_cuotas": total_cuotas,
-        # Campos de auditoría en hora boliviana
-        "created_at": created_at_bolivia,
-        "updated_at": updated_at_bolivia
-    })
+    # 3. Construir respuestas
+    enriched = []
+    for payment in payments:
+        payment_dict = payment.model_dump(by_alias=True)
+        payment_dict.update({
+            # Dados legibles (mismos que reporte Excel)
+            "nombre_estudiante": nombres.get(payment.estudiante_id) or "Sin nombre",
+            "fecha": to_bolivia_time(payment.fecha_subida),
+            "moneda": "Bs",
+            "monto": payment.cantidad_pago,
+            "estado": payment.estado_pago.value if payment.estado_pago else "",
+            "total_cuotas": cuotas.get(payment.inscripcion_id, 0),
+            # Campos de auditoría en hora boliviana
+            "created_at": to_bolivia_time(payment.created_at),
+            "updated_at": to_bolivia_time(payment.updated_at)
+        })
+        enriched.append(payment_dict)
     
-    return payment_dict
+    return enriched
 
 
 
@@ -148,7 +201,9 @@ async def create_payment(
     1. Validar que la inscripción existe
     2. Validar que el estudiante sea dueño de la inscripción
     3. Determinar concepto/cuota a pagar (usa get_next_pending_payment)
-    4. Crear pago con estado PENDIENTE
+    4. Marcar si el comprobante ya se usó en otro pago (mismo hash)
+    5. Crear pago con estado PENDIENTE
+    6. Sumarlo en los acumulados del dashboard
     """
     
     # 1. Obtener inscripción
@@ -168,7 +223,16 @@ async def create_payment(
     if not next_payment:
          raise ValueError("Esta inscripción ya tiene todos los pagos (Matrícula y Cuotas) en proceso o aprobados.")
 
-    # 4. Crear pago
+    # 4. Comprobante repetido (consulta por índice, no compara archivos)
+    posible_duplicado_de = None
+    if payment_in.comprobante_sha256 or payment_in.comprobante_md5:
+        posible_duplicado_de = await find_pago_duplicado(
+            payment_in.comprobante_sha256,
+            student_id,
+            md5=payment_in.comprobante_md5
+        )
+    
+    # 5. Crear pago
     payment = Payment(
         inscripcion_id=payment_in.inscripcion_id,
         estudiante_id=enrollment.estudiante_id,
@@ -178,14 +242,92 @@ async def create_payment(
         numero_transaccion=payment_in.numero_transaccion,
         cantidad_pago=next_payment["monto_sugerido"],
         comprobante_url=payment_in.comprobante_url,
+        comprobante_preview_url=payment_in.comprobante_preview_url,
+        comprobante_sha256=payment_in.comprobante_sha256,
+        comprobante_md5=payment_in.comprobante_md5,
+        posible_duplicado_de=posible_duplicado_de,
         estado_pago=EstadoPago.PENDIENTE
     )
     
     await payment.insert()
+    
+    # 6. Acumulados del dashboard (PENDIENTE)
+    await dashboard_service.registrar_pago_creado(payment)
     return payment
 
 
 
+async def find_comprobante(
+    sha256: str,
+    student_id: PydanticObjectId
+) -> Optional[StoredFile]:
+    """
+    Comprobante idéntico (mismo hash) ya subido por el estudiante
+    
+    Se usa al subir un comprobante para reutilizar el archivo guardado en vez
+    de volver a transferirlo. Solo se reutilizan archivos del mismo
+    estudiante (cada uno tiene su carpeta).
+    """
+    pago = await Payment.find(
+        {"comprobante_sha256": sha256, "estudiante_id": student_id}
+    ).project(_PagoComprobante).first_or_none()
+    if not pago:
+        return None
+    return StoredFile(url=pago.comprobante_url, preview_url=pago.comprobante_preview_url)
+
+
+async def find_pago_duplicado(
+    sha256: Optional[str],
+    student_id: PydanticObjectId,
+    md5: Optional[str] = None
+) -> Optional[PydanticObjectId]:
+    """
+    Pago anterior con el mismo comprobante que debe revisar el admin
+    
+    Es sospechoso si el comprobante ya lo usó otro estudiante, o si el mismo
+    estudiante lo usó en un pago que no fue rechazado. Volver a subir un
+    comprobante rechazado no se marca.
+    
+    Se compara por SHA-256 y/o MD5: las subidas directas solo tienen MD5
+    (el que reporta el almacenamiento), las que pasan por la API tienen ambos.
+    
+    Returns:
+        ID del pago más reciente con el mismo hash, o None
+    """
+    mismo_hash = []
+    if sha256:
+        mismo_hash.append({"comprobante_sha256": sha256})
+    if md5:
+        mismo_hash.append({"comprobante_md5": md5})
+    if not mismo_hash:
+        return None
+    
+    pago = await Payment.find(
+        {
+            "$and": [
+                {"$or": mismo_hash},
+                {"$or": [
+                    {"estudiante_id": {"$ne": student_id}},
+                    {"estado_pago": {"$ne": EstadoPago.RECHAZADO.value}},
+                ]},
+            ],
+        }
+    ).sort("-fecha_subida").project(_PagoComprobante).first_or_none()
+    return pago.id if pago else None
+
+
+async def comprobante_en_uso(url: str) -> bool:
+    """
+    ¿Algún pago ya usa este comprobante (misma URL)?
+    
+    Las subidas directas usan una URL nueva por intención, así que una URL
+    repetida es la misma subida firmada presentada otra vez.
+    """
+    return await Payment.find(
+        {"comprobante_url": url}
+    ).project(_PagoComprobante).first_or_none() is not None
+
+
 async def get_payment(id: PydanticObjectId) -> Optional[Payment]:
     """Obtener un pago por ID"""
     return await Payment.get(id)
@@ -212,26 +354,29 @@ async def get_payments_by_course(course_id: PydanticObjectId) -> List[Payment]:
     ).sort("-fecha_subida").to_list()
 
 
-from beanie.operators import Or
-
 async def get_all_payments(
     page: int = 1,
     per_page: int = 10,
     q: Optional[str] = None,
     estado: Optional[EstadoPago] = None,
     curso_id: Optional[PydanticObjectId] = None,
-    estudiante_id: Optional[PydanticObjectId] = None
-) -> tuple[List[Payment], int]:
+    estudiante_id: Optional[PydanticObjectId] = None,
+    cursor: Optional[str] = None
+) -> tuple[List[Payment], int, Optional[str]]:
     """
     Obtener todos los pagos con paginación y filtros
     
     Args:
         page: Número de página
         per_page: Elementos por página
-        q: Búsqueda por número de transacción o comprobante
+        q: Búsqueda por número de transacción o concepto
         estado: Filtrar por estado
         curso_id: Filtrar por Curso ID
         estudiante_id: Filtrar por Estudiante ID
+        cursor: Cursor keyset de la página anterior (opcional, ignora `page`)
+    
+    Returns:
+        (pagos, total, next_cursor)
     """
     query = Payment.find()
     
@@ -247,23 +392,19 @@ async def get_all_payments(
     if estudiante_id:
         query = query.find(Payment.estudiante_id == estudiante_id)
         
-    # 4. Búsqueda por texto (q)
-    if q:
-        regex_pattern = {"$regex": q, "$options": "i"}
-        query = query.find(
-            Or(
-                Payment.numero_transaccion == regex_pattern,
-                Payment.comprobante_url == regex_pattern,
-                Payment.concepto == regex_pattern
-            )
-        )
-    
-    total_count = await query.count()
-    skip = (page - 1) * per_page
+    # 4. Búsqueda por texto (q) - tokens indexados (core/search.py)
+    filtro_busqueda = search_filter(q)
+    if filtro_busqueda:
+        query = query.find(filtro_busqueda)
     
     # Ordenar por fecha descendente (más reciente primero)
-    payments = await query.sort("-fecha_subida").skip(skip).limit(per_page).to_list()
-    return payments, total_count
+    return await pagination.paginate(
+        query,
+        sort_field="fecha_subida",
+        page=page,
+        per_page=per_page,
+        cursor=cursor
+    )
 
 
 async def get_payments_pendientes() -> List[Payment]:
@@ -284,12 +425,13 @@ async def aprobar_pago(
     """
     Aprobar un pago (solo admin)
     
-    Proceso:
-    1. Obtener pago
-    2. Validar que esté PENDIENTE
-    3. Cambiar estado a APROBADO
-    4. Actualizar enrollment (total_pagado, saldo_pendiente)
-    5. Cambiar estado de enrollment si corresponde
+    Proceso (atómico, sin leer-modificar-guardar):
+    1. findOneAndUpdate condicional PENDIENTE → APROBADO
+    2. Anti-duplicados: índice único parcial `aprobado_unico` (core/indexes.py)
+       sobre (inscripcion_id, concepto, numero_cuota) de pagos APROBADOS
+    3. Actualizar enrollment con un solo update server-side
+       (total_pagado, saldo_pendiente y estado)
+    4. Mover el pago de PENDIENTE a APROBADO en los acumulados del dashboard
     
     Args:
         payment_id: ID del pago
@@ -301,47 +443,63 @@ async def aprobar_pago(
     Raises:
         ValueError: Si el pago no existe
         ValueError: Si el pago no está pendiente
+        ValueError: Si ya existe un pago aprobado para el mismo concepto/cuota
     """
+    ahora = datetime.utcnow()
     
-    # 1. Obtener pago
-    payment = await Payment.get(payment_id)
-    if not payment:
-        raise ValueError(f"Pago {payment_id} no encontrado")
-    
-    # 2. Validar estado
-    if payment.estado_pago != EstadoPago.PENDIENTE:
-        raise ValueError(
-            f"No se puede aprobar un pago que está en estado {payment.estado_pago}"
+    # 1. Aprobar solo si sigue PENDIENTE (una sola operación)
+    try:
+        payment = await Payment.find_one(
+            Payment.id == payment_id,
+            Payment.estado_pago == EstadoPago.PENDIENTE
+        ).update(
+            Set({
+                Payment.estado_pago: EstadoPago.APROBADO,
+                Payment.fecha_verificacion: ahora,
+                Payment.verificado_por: admin_username,
+                Payment.motivo_rechazo: None,
+                Payment.updated_at: ahora
+            }),
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+    except DuplicateKeyError:
+        # ✅ 2. VALIDACIÓN ANTI-DUPLICADOS (violación del índice único parcial)
+        payment = await Payment.get(payment_id)
+        existing_approved = await Payment.find_one(
+            Payment.id != payment_id,  # Excluir el pago actual
+            Payment.inscripcion_id == payment.inscripcion_id,
+            Payment.concepto == payment.concepto,
+            Payment.numero_cuota == payment.numero_cuota,
+            Payment.estado_pago == EstadoPago.APROBADO
         )
-    
-    # ✅ 3. VALIDACIÓN ANTI-DUPLICADOS
-    # Verificar que NO exista otro pago APROBADO para el mismo concepto/cuota
-    existing_approved = await Payment.find_one(
-        Payment.id != payment_id,  # Excluir el pago actual
-        Payment.inscripcion_id == payment.inscripcion_id,
-        Payment.concepto == payment.concepto,
-        Payment.numero_cuota == payment.numero_cuota,
-        Payment.estado_pago == EstadoPago.APROBADO
-    )
-    
-    if existing_approved:
         cuota_texto = f" (Cuota {payment.numero_cuota})" if payment.numero_cuota else ""
+        existente_texto = (
+            f"Pago aprobado existente: {existing_approved.id}. " if existing_approved else ""
+        )
         raise ValueError(
             f"No se puede aprobar: ya existe un pago aprobado para {payment.concepto}{cuota_texto}. "
-            f"Pago aprobado existente: {existing_approved.id}. "
+            f"{existente_texto}"
             f"Este pago parece ser un duplicado. Considera rechazarlo en su lugar."
         )
     
-    # 4. Aprobar pago
-    payment.aprobar_pago(admin_username)
-    await payment.save()
+    if not payment:
+        # Solo en el camino de error: distinguir "no existe" de "no está pendiente"
+        current = await Payment.get(payment_id)
+        if not current:
+            raise ValueError(f"Pago {payment_id} no encontrado")
+        raise ValueError(
+            f"No se puede aprobar un pago que está en estado {current.estado_pago}"
+        )
     
-    # 5. Actualizar enrollment
+    # 3. Actualizar enrollment ($add server-side, sin perder actualizaciones concurrentes)
     await enrollment_service.actualizar_saldo_enrollment(
         enrollment_id=payment.inscripcion_id,
         monto_pago_aprobado=payment.cantidad_pago
     )
     
+    # 4. Acumulados del dashboard (PENDIENTE → APROBADO)
+    await dashboard_service.registrar_cambios_estado([(payment, EstadoPago.APROBADO)])
+    
     return payment
 
 
@@ -354,9 +512,9 @@ async def rechazar_pago(
     Rechazar un pago (solo admin)
     
     Proceso:
-    1. Obtener pago
-    2. Validar que esté PENDIENTE
-    3. Cambiar estado a RECHAZADO con motivo
+    1. findOneAndUpdate condicional PENDIENTE → RECHAZADO con motivo
+       (no puede pisar un pago que otro admin acaba de aprobar)
+    2. Mover el pago de PENDIENTE a RECHAZADO en los acumulados del dashboard
     
     Args:
         payment_id: ID del pago
@@ -370,25 +528,210 @@ async def rechazar_pago(
         ValueError: Si el pago no existe
         ValueError: Si el pago no está pendiente
     """
+    ahora = datetime.utcnow()
     
-    # 1. Obtener pago
-    payment = await Payment.get(payment_id)
-    if not payment:
-        raise ValueError(f"Pago {payment_id} no encontrado")
+    payment = await Payment.find_one(
+        Payment.id == payment_id,
+        Payment.estado_pago == EstadoPago.PENDIENTE
+    ).update(
+        Set({
+            Payment.estado_pago: EstadoPago.RECHAZADO,
+            Payment.fecha_verificacion: ahora,
+            Payment.verificado_por: admin_username,
+            Payment.motivo_rechazo: motivo,
+            Payment.updated_at: ahora
+        }),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
     
-    # 2. Validar estado
-    if payment.estado_pago != EstadoPago.PENDIENTE:
+    if not payment:
+        current = await Payment.get(payment_id)
+        if not current:
+            raise ValueError(f"Pago {payment_id} no encontrado")
         raise ValueError(
-            f"No se puede rechazar un pago que está en estado {payment.estado_pago}"
+            f"No se puede rechazar un pago que está en estado {current.estado_pago}"
         )
     
-    # 3. Rechazar pago
-    payment.rechazar_pago(admin_username, motivo)
-    await payment.save()
+    # Acumulados del dashboard (PENDIENTE → RECHAZADO)
+    await dashboard_service.registrar_cambios_estado([(payment, EstadoPago.RECHAZADO)])
     
     return payment
 
 
+async def procesar_pagos_en_lote(
+    decisiones: List[PaymentBulkDecision],
+    admin_username: str
+) -> dict:
+    """
+    Aprobar/rechazar varios pagos en una sola operación (solo admin)
+    
+    Proceso (cantidad fija de consultas, sin importar el tamaño del lote):
+    1. Cargar todos los pagos del lote (1 consulta `$in`)
+    2. Cargar conceptos ya aprobados de las inscripciones involucradas (1 consulta)
+    3. Validar cada decisión en memoria (existe, PENDIENTE, motivo, duplicados)
+    4. Aplicar todas las decisiones válidas con un `bulk_write` condicional
+    5. Actualizar enrollments con un `bulk_write` agrupado por inscripción
+    6. Mover los pagos en los acumulados del dashboard (un `bulk_write`)
+    
+    Args:
+        decisiones: Lista de decisiones (aprobar/rechazar)
+        admin_username: Username del admin que procesa el lote
+    
+    Returns:
+        dict con contadores y un resultado por decisión (mismo orden)
+    """
+    # MongoDB guarda fechas con precisión de milisegundos
+    ahora = datetime.utcnow()
+    ahora = ahora.replace(microsecond=(ahora.microsecond // 1000) * 1000)
+    
+    resultados = [
+        {
+            "payment_id": d.payment_id,
+            "accion": d.accion,
+            "ok": False,
+            "estado_pago": None,
+            "error": None
+        }
+        for d in decisiones
+    ]
+    
+    # 1. Cargar pagos del lote
+    payment_ids = list({d.payment_id for d in decisiones})
+    payments = await Payment.find(In(Payment.id, payment_ids)).to_list()
+    payments_map = {p.id: p for p in payments}
+    
+    # 2. Conceptos ya aprobados (anti-duplicados)
+    inscripcion_ids = list({p.inscripcion_id for p in payments})
+    ya_aprobados = await Payment.find(
+        In(Payment.inscripcion_id, inscripcion_ids),
+        Payment.estado_pago == EstadoPago.APROBADO
+    ).project(_PagoConcepto).to_list()
+    conceptos_aprobados = {
+        (p.inscripcion_id, p.concepto, p.numero_cuota) for p in ya_aprobados
+    }
+    
+    # 3. Validar decisiones
+    vistos = set()
+    operaciones = []   # UpdateOne para bulk_write
+    indices_ops = []   # índice en `decisiones` de cada operación
+    for i, decision in enumerate(decisiones):
+        resultado = resultados[i]
+        payment = payments_map.get(decision.payment_id)
+        
+        if decision.payment_id in vistos:
+            resultado["error"] = "Pago repetido en el lote"
+            continue
+        vistos.add(decision.payment_id)
+        
+        if not payment:
+            resultado["error"] = f"Pago {decision.payment_id} no encontrado"
+            continue
+        
+        if payment.estado_pago != EstadoPago.PENDIENTE:
+            resultado["error"] = (
+                f"No se puede {decision.accion} un pago que está en estado {payment.estado_pago}"
+            )
+            continue
+        
+        if decision.accion == "aprobar":
+            clave = (payment.inscripcion_id, payment.concepto, payment.numero_cuota)
+            if clave in conceptos_aprobados:
+                cuota_texto = f" (Cuota {payment.numero_cuota})" if payment.numero_cuota else ""
+                resultado["error"] = (
+                    f"Ya existe un pago aprobado para {payment.concepto}{cuota_texto}"
+                )
+                continue
+            conceptos_aprobados.add(clave)
+            nuevo_estado = EstadoPago.APROBADO
+            motivo = None
+        else:
+            if not decision.motivo:
+                resultado["error"] = "El motivo es obligatorio para rechazar"
+                continue
+            nuevo_estado = EstadoPago.RECHAZADO
+            motivo = decision.motivo
+        
+        resultado["estado_pago"] = nuevo_estado
+        operaciones.append(UpdateOne(
+            {"_id": payment.id, "estado_pago": EstadoPago.PENDIENTE.value},
+            {"$set": {
+                "estado_pago": nuevo_estado.value,
+                "fecha_verificacion": ahora,
+                "verificado_por": admin_username,
+                "motivo_rechazo": motivo,
+                "updated_at": ahora
+            }}
+        ))
+        indices_ops.append(i)
+    
+    # 4. Aplicar decisiones válidas
+    fallidos = {}  # índice en `decisiones` -> error
+    if operaciones:
+        try:
+            bulk_result = await Payment.get_motor_collection().bulk_write(
+                operaciones, ordered=False
+            )
+            modificados = bulk_result.modified_count
+        except BulkWriteError as e:
+            modificados = e.details.get("nModified", 0)
+            for write_error in e.details.get("writeErrors", []):
+                indice = indices_ops[write_error["index"]]
+                if write_error.get("code") == 11000:
+                    fallidos[indice] = "Ya existe un pago aprobado para este concepto/cuota"
+                else:
+                    fallidos[indice] = write_error.get("errmsg", "Error al actualizar el pago")
+        
+        # Si algún pago cambió de estado entre la validación y la escritura
+        # (ej: otro admin lo procesó), identificar cuáles no se aplicaron
+        if modificados < len(operaciones) - len(fallidos):
+            candidatos = [
+                decisiones[i].payment_id for i in indices_ops if i not in fallidos
+            ]
+            aplicados = await Payment.find(
+                In(Payment.id, candidatos),
+                Payment.fecha_verificacion == ahora,
+                Payment.verificado_por == admin_username
+            ).project(_PagoConcepto).to_list()
+            aplicados_ids = {p.id for p in aplicados}
+            for i in indices_ops:
+                if i not in fallidos and decisiones[i].payment_id not in aplicados_ids:
+                    fallidos[i] = "El pago cambió de estado durante el proceso"
+    
+    # 5. Resultados y montos aprobados agrupados por inscripción
+    montos: Dict[PydanticObjectId, float] = {}
+    cambios = []  # (pago, estado nuevo) para los acumulados del dashboard
+    for i in indices_ops:
+        resultado = resultados[i]
+        if i in fallidos:
+            resultado["estado_pago"] = None
+            resultado["error"] = fallidos[i]
+            continue
+        resultado["ok"] = True
+        payment = payments_map[decisiones[i].payment_id]
+        cambios.append((payment, resultado["estado_pago"]))
+        if resultado["estado_pago"] == EstadoPago.APROBADO:
+            montos[payment.inscripcion_id] = (
+                montos.get(payment.inscripcion_id, 0.0) + payment.cantidad_pago
+            )
+    
+    await enrollment_service.actualizar_saldos_enrollments(montos)
+    await dashboard_service.registrar_cambios_estado(cambios)
+    
+    aprobados = sum(
+        1 for r in resultados if r["ok"] and r["estado_pago"] == EstadoPago.APROBADO
+    )
+    rechazados = sum(
+        1 for r in resultados if r["ok"] and r["estado_pago"] == EstadoPago.RECHAZADO
+    )
+    return {
+        "procesados": aprobados + rechazados,
+        "aprobados": aprobados,
+        "rechazados": rechazados,
+        "errores": sum(1 for r in resultados if not r["ok"]),
+        "resultados": resultados
+    }
+
+
 async def get_resumen_pagos_enrollment(enrollment_id: PydanticObjectId) -> dict:
     """
     Obtener resumen de pagos de una inscripción
@@ -401,16 +744,58 @@ async def get_resumen_pagos_enrollment(enrollment_id: PydanticObjectId) -> dict:
         - rechazados: cantidad rechazados
         - monto_total_aprobado: suma de pagos aprobados
     """
-    payments = await get_payments_by_enrollment(enrollment_id)
-    
-    resumen = {
-        "total_pagos": len(payments),
-        "pendientes": len([p for p in payments if p.estado_pago == EstadoPago.PENDIENTE]),
-        "aprobados": len([p for p in payments if p.estado_pago == EstadoPago.APROBADO]),
-        "rechazados": len([p for p in payments if p.estado_pago == EstadoPago.RECHAZADO]),
-        "monto_total_aprobado": sum(
-            p.cantidad_pago for p in payments if p.estado_pago == EstadoPago.APROBADO
-        ),
-    }
+    resumenes = await get_resumenes_pagos_enrollments([enrollment_id])
+    return resumenes[enrollment_id]
+
+
+def _sumar_si_estado(estado: EstadoPago, valor=1) -> dict:
+    """Acumulador de $group: suma `valor` solo si el pago tiene ese estado"""
+    return {"$sum": {"$cond": [{"$eq": ["$estado_pago", estado.value]}, valor, 0]}}
+
+
+async def get_resumenes_pagos_enrollments(
+    enrollment_ids: List[PydanticObjectId]
+) -> Dict[PydanticObjectId, dict]:
+    """
+    Obtener el resumen de pagos de varias inscripciones en una sola consulta
+    
+    Un solo `$group` por inscripción_id (usa el índice por inscripcion_id);
+    no se cargan los pagos en memoria.
     
-    return resumen
+    Args:
+        enrollment_ids: IDs de las inscripciones
+    
+    Returns:
+        dict {enrollment_id: resumen} con una entrada por cada ID recibido
+        (en cero si la inscripción no tiene pagos)
+    """
+    resumenes = {
+        enrollment_id: {
+            "total_pagos": 0,
+            "pendientes": 0,
+            "aprobados": 0,
+            "rechazados": 0,
+            "monto_total_aprobado": 0,
+        }
+        for enrollment_id in enrollment_ids
+    }
+    if not resumenes:
+        return resumenes
+    
+    pipeline = [
+        {"$match": {"inscripcion_id": {"$in": list(resumenes)}}},
+        {"$group": {
+            "_id": "$inscripcion_id",
+            "total_pagos": {"$sum": 1},
+            "pendientes": _sumar_si_estado(EstadoPago.PENDIENTE),
+            "aprobados": _sumar_si_estado(EstadoPago.APROBADO),
+            "rechazados": _sumar_si_estado(EstadoPago.RECHAZADO),
+            "monto_total_aprobado": _sumar_si_estado(EstadoPago.APROBADO, "$cantidad_pago"),
+        }}
+    ]
+    
+    async for grupo in Payment.aggregate(pipeline):
+        enrollment_id = grupo.pop("_id")
+        resumenes[enrollment_id].update(grupo)
+    
+    return resumenes
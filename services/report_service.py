@@ -0,0 +1,169 @@
+"""
+Servicio de Reportes
+====================
+
+Generación de reportes Excel de pagos con memoria constante.
+
+¿Cómo funciona?
+---------------
+1. Una sola agregación con `$lookup` trae nombre del estudiante y total de
+   cuotas junto a cada pago (sin consultas por fila).
+2. Las filas se leen con un cursor asíncrono, por lotes.
+3. openpyxl en modo write-only escribe cada fila directo a disco.
+4. El archivo final queda en un SpooledTemporaryFile y se envía por chunks.
+
+La memoria usada no depende del tamaño del rango de fechas.
+"""
+
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import Iterator, List
+
+from models.payment import Payment
+from core.timezone_utils import to_bolivia_time
+
+# Encabezados y anchos de columna del reporte
+HEADERS = [
+    "Nombre del Estudiante", "Fecha", "Moneda", "Monto", "Concepto",
+    "Total Cuotas", "Nº de Transacción", "Estado", "Descripción"
+]
+COLUMN_WIDTHS = [30, 20, 10, 15, 20, 15, 25, 15, 30]
+
+# Hasta este tamaño el archivo final vive en memoria, luego pasa a disco
+SPOOL_MAX_SIZE = 4 * 1024 * 1024  # 4MB
+CHUNK_SIZE = 64 * 1024  # 64KB
+
+
+def _pipeline_pagos(fecha_desde: datetime, fecha_hasta: datetime) -> List[dict]:
+    """
+    Pipeline de agregación para el reporte de pagos
+
+    Filtra por rango de fechas, ordena por más reciente primero y resuelve
+    estudiante e inscripción con `$lookup` proyectando solo lo necesario.
+    """
+    return [
+        {"$match": {"fecha_subida": {"$gte": fecha_desde, "$lte": fecha_hasta}}},
+        {"$sort": {"fecha_subida": -1}},
+        {"$lookup": {
+            "from": "students",
+            "localField": "estudiante_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "nombre": 1}}],
+            "as": "estudiante"
+        }},
+        {"$lookup": {
+            "from": "enrollments",
+            "localField": "inscripcion_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "cantidad_cuotas": 1}}],
+            "as": "inscripcion"
+        }},
+        {"$project": {
+            "_id": 0,
+            "fecha_subida": 1,
+            "cantidad_pago": 1,
+            "concepto": 1,
+            "numero_transaccion": 1,
+            "estado_pago": 1,
+            "nombre_estudiante": {"$arrayElemAt": ["$estudiante.nombre", 0]},
+            "total_cuotas": {"$arrayElemAt": ["$inscripcion.cantidad_cuotas", 0]}
+        }}
+    ]
+
+
+def _fila_reporte(doc: dict) -> list:
+    """Convierte un documento de la agregación en una fila del Excel"""
+    return [
+        doc.get("nombre_estudiante") or "Sin nombre",
+        to_bolivia_time(doc.get("fecha_subida")),  # Hora boliviana (UTC-4)
+        "Bs",  # Moneda
+        doc.get("cantidad_pago"),
+        doc.get("concepto") or "",
+        doc.get("total_cuotas") or 0,
+        doc.get("numero_transaccion") or "",
+        doc.get("estado_pago") or "",
+        ""  # Descripción vacía
+    ]
+
+
+async def generar_reporte_pagos_excel(
+    fecha_desde: datetime,
+    fecha_hasta: datetime
+) -> SpooledTemporaryFile:
+    """
+    Generar el reporte Excel de pagos de un rango de fechas
+
+    Args:
+        fecha_desde: Inicio del rango (UTC, inclusive)
+        fecha_hasta: Fin del rango (UTC, inclusive)
+
+    Returns:
+        Archivo temporal posicionado al inicio, listo para `iter_file`.
+        Quien lo consume es responsable de cerrarlo.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+    from starlette.concurrency import run_in_threadpool
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Reporte de Pagos")
+
+    # Anchos de columna (en write-only deben definirse antes de escribir filas)
+    for i, width in enumerate(COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    # Encabezados con estilo
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    header_row = []
+    for header in HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_row.append(cell)
+    ws.append(header_row)
+
+    # Filas: cursor asíncrono sobre la agregación (memoria constante)
+    total_filas = 0
+    cursor = Payment.aggregate(
+        _pipeline_pagos(fecha_desde, fecha_hasta),
+        allowDiskUse=True
+    )
+    async for doc in cursor:
+        ws.append(_fila_reporte(doc))
+        total_filas += 1
+
+    # Activar filtros en los encabezados (se escribe al cerrar la hoja)
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(HEADERS))}{total_filas + 1}"
+
+    # Guardar (comprime el xlsx) fuera del event loop
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        await run_in_threadpool(wb.save, output)
+    except Exception:
+        output.close()
+        raise
+
+    output.seek(0)
+    return output
+
+
+def iter_file(file, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Leer un archivo por chunks y cerrarlo al terminar
+
+    Pensado para StreamingResponse (Starlette lo itera en un threadpool).
+    """
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
@@ -11,6 +11,9 @@ from models.enums import EstadoTitulo
 from schemas.student import StudentCreate, StudentUpdateSelf, StudentUpdateAdmin
 from beanie import PydanticObjectId
 from beanie.operators import Or, RegEx
+from services import pagination, token_service
+from core.search import search_filter
+from core.principal_cache import invalidate_principal
 
 
 async def get_students(
@@ -19,8 +22,9 @@ async def get_students(
     q: Optional[str] = None,
     activo: Optional[bool] = None,
     estado_titulo: Optional[EstadoTitulo] = None,
-    curso_id: Optional[PydanticObjectId] = None
-) -> tuple[List[Student], int]:
+    curso_id: Optional[PydanticObjectId] = None,
+    cursor: Optional[str] = None
+) -> tuple[List[Student], int, Optional[str]]:
     """
     Obtener lista de estudiantes con filtros avanzados y paginación
     
@@ -31,25 +35,18 @@ async def get_students(
         activo: Filtrar por estado activo/inactivo
         estado_titulo: Filtrar por estado del título
         curso_id: Filtrar por inscripción en un curso
+        cursor: Cursor keyset de la página anterior (opcional, ignora `page`)
         
     Returns:
-        Tuple[List[Student], int]: (Lista de estudiantes, Total de coincidencias)
+        Tuple[List[Student], int, Optional[str]]: (Lista de estudiantes, Total de coincidencias, next_cursor)
     """
     # Iniciar consulta base
     query = Student.find()
     
-    # 1. Filtro de búsqueda (q)
-    if q:
-        # Usar sintaxis nativa de MongoDB para regex (más robusta)
-        regex_pattern = {"$regex": q, "$options": "i"}
-        query = query.find(
-            Or(
-                Student.nombre == regex_pattern,
-                Student.email == regex_pattern,
-                Student.carnet == regex_pattern,
-                Student.registro == regex_pattern
-            )
-        )
+    # 1. Filtro de búsqueda (q) - tokens indexados (core/search.py)
+    filtro_busqueda = search_filter(q)
+    if filtro_busqueda:
+        query = query.find(filtro_busqueda)
     
     # 2. Filtro por estado activo
     if activo is not None:
@@ -74,16 +71,14 @@ async def get_students(
         # lista_cursos_ids es una lista de IDs (Optimizado)
         query = query.find(Student.lista_cursos_ids == curso_id)
     
-    # Calcular total antes de paginar
-    total_count = await query.count()
-    
-    # Calcular skip
-    skip = (page - 1) * per_page
-    
     # Ejecutar consulta con paginación (ordenar por más reciente primero)
-    students = await query.sort("-created_at").skip(skip).limit(per_page).to_list()
-    
-    return students, total_count
+    return await pagination.paginate(
+        query,
+        sort_field="created_at",
+        page=page,
+        per_page=per_page,
+        cursor=cursor
+    )
 
 
 async def get_student(id: PydanticObjectId) -> Optional[Student]:
@@ -98,12 +93,12 @@ async def create_student(student_in: StudentCreate) -> Student:
     La contraseña será el carnet (hasheado automáticamente).
     El estudiante puede cambiar su contraseña después.
     """
-    from core.security import get_password_hash
+    from core.security import get_password_hash_async
     
     student_data = student_in.model_dump(exclude_unset=True)
     
     # Usar el carnet como contraseña inicial
-    student_data["password"] = get_password_hash(student_data["carnet"])
+    student_data["password"] = await get_password_hash_async(student_data["carnet"])
     
     student = Student(**student_data)
     await student.insert()
@@ -129,22 +124,26 @@ async def update_student(
         - Si se actualiza password, se hashea automáticamente
         - StudentUpdateSelf permite menos campos que StudentUpdateAdmin
     """
-    from core.security import get_password_hash
+    from core.security import get_password_hash_async
     
     # Obtener solo los campos que fueron enviados (no None por defecto)
     update_data = student_in.model_dump(exclude_unset=True)
     
     # Si se está actualizando la contraseña, hashearla
     if "password" in update_data and update_data["password"]:
-        update_data["password"] = get_password_hash(update_data["password"])
+        update_data["password"] = await get_password_hash_async(update_data["password"])
     
     # Actualizar los campos del estudiante
     for field, value in update_data.items():
         setattr(student, field, value)
     
     # Guardar cambios
-    await student.save()
+    await student.save_changes()
     
+    # activo/password pueden haber cambiado
+    invalidate_principal("student", student.id)
+    if update_data.get("password") or update_data.get("activo") is False:
+        await token_service.revoke_all_refresh_tokens("student", student.id)
     return student
 
 
@@ -153,4 +152,6 @@ async def delete_student(id: PydanticObjectId) -> Student:
     student = await Student.get(id)
     if student:
         await student.delete()
+        invalidate_principal("student", id)
+        await token_service.revoke_all_refresh_tokens("student", id)
     return student
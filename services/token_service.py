@@ -0,0 +1,136 @@
+"""
+Servicio de Refresh Tokens
+==========================
+
+Sesiones de larga duración para no repetir el login (bcrypt) cada vez que
+vence el access token.
+
+Flujo:
+------
+1. Login: se emite un access token (corto) y un refresh token (largo).
+2. POST /auth/refresh: el refresh token se canjea por un access token nuevo
+   y un refresh token nuevo; el anterior queda revocado (rotación). No usa
+   bcrypt: solo un SHA-256 y una consulta por índice.
+3. Logout: se revoca el refresh token.
+4. Cambio de contraseña o desactivación: se revocan todas las sesiones.
+
+Si llega un refresh token ya rotado (alguien lo reutilizó), se revocan
+todas las sesiones de ese usuario. Uno revocado por logout o por cambio de
+contraseña solo se rechaza (ej: una pestaña vieja tras cerrar sesión).
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import Set
+from core.config import settings
+from models.refresh_token import RefreshToken
+
+# Motivos de revocación (RefreshToken.revoked_reason)
+MOTIVO_ROTACION = "rotacion"
+MOTIVO_LOGOUT = "logout"
+MOTIVO_REVOCACION = "revocacion"
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def issue_refresh_token(user_type: str, sub: PydanticObjectId) -> str:
+    """
+    Emitir un refresh token nuevo
+
+    Returns:
+        Token en claro (se entrega al cliente una sola vez)
+    """
+    token = secrets.token_urlsafe(48)
+    await RefreshToken(
+        token_hash=_hash_token(token),
+        user_type=user_type,
+        sub=sub,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ).insert()
+    return token
+
+
+async def rotate_refresh_token(token: str) -> Tuple[str, PydanticObjectId, str]:
+    """
+    Canjear un refresh token por uno nuevo (el anterior se revoca)
+
+    La revocación es atómica: dos canjes simultáneos del mismo token no
+    pueden ganar ambos.
+
+    Returns:
+        (user_type, sub, nuevo_token)
+
+    Raises:
+        ValueError: Si el token no existe, venció o ya fue usado
+    """
+    ahora = datetime.utcnow()
+    token_hash = _hash_token(token)
+
+    refresh = await RefreshToken.find_one(
+        RefreshToken.token_hash == token_hash,
+        RefreshToken.revoked_at == None,
+        RefreshToken.expires_at > ahora
+    ).update(
+        Set({
+            RefreshToken.revoked_at: ahora,
+            RefreshToken.revoked_reason: MOTIVO_ROTACION,
+            RefreshToken.updated_at: ahora
+        }),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
+
+    if refresh is None:
+        # Token ya rotado que vuelve a usarse: posible robo.
+        # Si se revocó por logout o cambio de contraseña, solo se rechaza
+        reusado = await RefreshToken.find_one(RefreshToken.token_hash == token_hash)
+        if reusado is not None and reusado.revoked_reason == MOTIVO_ROTACION:
+            await revoke_all_refresh_tokens(reusado.user_type, reusado.sub)
+        raise ValueError("Refresh token inválido o expirado")
+
+    nuevo = await issue_refresh_token(refresh.user_type, refresh.sub)
+    return refresh.user_type, refresh.sub, nuevo
+
+
+async def revoke_refresh_token(token: str) -> bool:
+    """
+    Revocar un refresh token (logout)
+
+    Returns:
+        True si estaba activo y se revocó
+    """
+    ahora = datetime.utcnow()
+    result = await RefreshToken.find_one(
+        RefreshToken.token_hash == _hash_token(token),
+        RefreshToken.revoked_at == None
+    ).update(Set({
+        RefreshToken.revoked_at: ahora,
+        RefreshToken.revoked_reason: MOTIVO_LOGOUT,
+        RefreshToken.updated_at: ahora
+    }))
+    return bool(result and result.modified_count)
+
+
+async def revoke_all_refresh_tokens(user_type: str, sub: PydanticObjectId) -> int:
+    """
+    Revocar todas las sesiones de un usuario (cambio de contraseña, desactivación)
+
+    Returns:
+        Cantidad de tokens revocados
+    """
+    ahora = datetime.utcnow()
+    result = await RefreshToken.find(
+        RefreshToken.sub == sub,
+        RefreshToken.user_type == user_type,
+        RefreshToken.revoked_at == None
+    ).update_many(Set({
+        RefreshToken.revoked_at: ahora,
+        RefreshToken.revoked_reason: MOTIVO_REVOCACION,
+        RefreshToken.updated_at: ahora
+    }))
+    return result.modified_count if result else 0
@@ -9,6 +9,8 @@ from typing import List, Optional
 from beanie import PydanticObjectId
 from models.user import User
 from schemas.user import UserCreate, UserUpdate
+from core.principal_cache import invalidate_principal
+from services import token_service
 
 
 from models.enums import UserRole
@@ -44,10 +46,10 @@ async def create_user(user_in: UserCreate) -> User:
     
     La contraseña se hashea automáticamente antes de guardar.
     """
-    from core.security import get_password_hash
+    from core.security import get_password_hash_async
     
     user_data = user_in.model_dump()
-    user_data["password"] = get_password_hash(user_data["password"])
+    user_data["password"] = await get_password_hash_async(user_data["password"])
     
     user = User(**user_data)
     await user.insert()
@@ -63,13 +65,18 @@ async def update_user(
     
     # Si se actualiza la contraseña, hashearla
     if "password" in update_data:
-        from core.security import get_password_hash
-        update_data["password"] = get_password_hash(update_data["password"])
+        from core.security import get_password_hash_async
+        update_data["password"] = await get_password_hash_async(update_data["password"])
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    await user.save()
+    await user.save_changes()
+    
+    # activo/rol/password pueden haber cambiado
+    invalidate_principal("user", user.id)
+    if "password" in update_data or update_data.get("activo") is False:
+        await token_service.revoke_all_refresh_tokens("user", user.id)
     return user
 
 
@@ -78,4 +85,6 @@ async def delete_user(id: PydanticObjectId) -> User:
     user = await User.get(id)
     if user:
         await user.delete()
+        invalidate_principal("user", id)
+        await token_service.revoke_all_refresh_tokens("user", id)
     return user